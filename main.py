@@ -1,12 +1,16 @@
 import sys
-import ctypes
-import os
-from tkinter import Tk, messagebox
-from modules.utils import is_admin
-from modules.logger import Logger
-from panacea_ui import PanaceaApp
 
 def main():
+    # Any argument selects the headless CLI: no elevation, splash or GUI imports
+    if len(sys.argv) > 1:
+        from modules.cli import run
+        sys.exit(run(sys.argv[1:]))
+
+    import ctypes
+    from tkinter import Tk, messagebox
+    from modules.utils import is_admin
+    from modules.logger import Logger
+
     logger = Logger()
     logger.log("Application started.")
 
@@ -62,6 +66,7 @@ def main():
         splash.destroy()
     
     # --- Main App ---
+    from panacea_ui import PanaceaApp
     app = PanaceaApp(None)
     app.mainloop()
 
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import threading
+from modules.logger import Logger
+
+# (browser name, env var of the base folder, "User Data" folder, process image name)
+# Chromium builds run as chrome.exe too: tasklist gives no paths, so either one running
+# makes both count as running and neither cache is touched.
+CHROMIUM_BROWSERS = [
+    ("Chrome", "LOCALAPPDATA", r"Google\Chrome\User Data", "chrome.exe"),
+    ("Edge", "LOCALAPPDATA", r"Microsoft\Edge\User Data", "msedge.exe"),
+    ("Brave", "LOCALAPPDATA", r"BraveSoftware\Brave-Browser\User Data", "brave.exe"),
+    ("Vivaldi", "LOCALAPPDATA", r"Vivaldi\User Data", "vivaldi.exe"),
+    ("Chromium", "LOCALAPPDATA", r"Chromium\User Data", "chrome.exe"),
+]
+
+# Opera keeps a single profile; the "User Data" folder is the profile itself (cache under LOCALAPPDATA)
+OPERA_BROWSERS = [
+    ("Opera", r"Opera Software\Opera Stable", "opera.exe"),
+    ("Opera GX", r"Opera Software\Opera GX Stable", "opera.exe"),
+]
+
+CHROMIUM_CACHE_DIRS = ["Cache", "Code Cache", "GPUCache"]
+
+class BrowserProfile:
+    def __init__(self, browser, name, path, cache_dirs, process):
+        self.browser = browser
+        self.name = name
+        self.path = path
+        self.cache_dirs = cache_dirs
+        self.process = process
+
+    def __repr__(self):
+        return f"BrowserProfile({self.browser!r}, {self.name!r})"
+
+class BrowserProfileLocator:
+    """
+    Enumerates every Chromium-family and Firefox profile of the current user.
+    The result is cached after the first discover(); pass refresh=True to enumerate again.
+    """
+    def __init__(self):
+        self.logger = Logger()
+        self._profiles = None
+        self._lock = threading.Lock()
+
+    def discover(self, refresh=False):
+        with self._lock:
+            if self._profiles is None or refresh:
+                self._profiles = self._enumerate()
+                browsers = sorted({p.browser for p in self._profiles})
+                self.logger.log(f"Discovered {len(self._profiles)} browser profiles ({', '.join(browsers) or 'none'})")
+            return list(self._profiles)
+
+    def _enumerate(self):
+        profiles = []
+        local_app_data = os.environ.get('LOCALAPPDATA')
+        app_data = os.environ.get('APPDATA')
+
+        for browser, base_var, rel, process in CHROMIUM_BROWSERS:
+            base = os.environ.get(base_var)
+            if not base: continue
+            user_data = os.path.join(base, rel)
+            for name in self._list_dirs(user_data):
+                profile_path = os.path.join(user_data, name)
+                # Real profiles (Default, Profile 1..N, Guest Profile) carry a Preferences file
+                if not os.path.isfile(os.path.join(profile_path, "Preferences")):
+                    continue
+                caches = self._existing(profile_path, CHROMIUM_CACHE_DIRS)
+                if caches:
+                    profiles.append(BrowserProfile(browser, name, profile_path, caches, process))
+
+        if local_app_data:
+            for browser, rel, process in OPERA_BROWSERS:
+                caches = self._existing(os.path.join(local_app_data, rel), CHROMIUM_CACHE_DIRS)
+                if app_data:
+                    # Code Cache / GPUCache live next to the profile in Roaming
+                    caches += self._existing(os.path.join(app_data, rel), CHROMIUM_CACHE_DIRS)
+                if caches:
+                    profiles.append(BrowserProfile(browser, "Default", os.path.join(local_app_data, rel), caches, process))
+
+            # Firefox keeps one cache2 folder per (randomly named) profile
+            ff_profiles = os.path.join(local_app_data, r"Mozilla\Firefox\Profiles")
+            for name in self._list_dirs(ff_profiles):
+                caches = self._existing(os.path.join(ff_profiles, name), ["cache2"])
+                if caches:
+                    profiles.append(BrowserProfile("Firefox", name, os.path.join(ff_profiles, name), caches, "firefox.exe"))
+        return profiles
+
+    def _list_dirs(self, path):
+        try:
+            with os.scandir(path) as it:
+                return sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
+        except OSError:
+            return []
+
+    def _existing(self, base, names):
+        return [os.path.join(base, n) for n in names if os.path.isdir(os.path.join(base, n))]
+
+def get_running_process_names():
+    """Returns the lower-cased image names of all running processes, or None if tasklist failed"""
+    try:
+        output = subprocess.check_output(['tasklist', '/fo', 'csv', '/nh'],
+                                         creationflags=subprocess.CREATE_NO_WINDOW, timeout=10).decode(errors='replace')
+    except Exception as e:
+        Logger().log(f"Could not list running processes: {e}", "WARNING")
+        return None
+    names = set()
+    for line in output.splitlines():
+        # "chrome.exe","1234","Console","1","120,000 K"
+        if line.startswith('"'):
+            names.add(line[1:line.find('"', 1)].lower())
+    return names
@@ -1,109 +1,123 @@
-import os
-import shutil
-import glob
 from modules.logger import Logger
+from modules.cleanup_engine import CleanupEngine, CleanupResult
+from modules.browsers import BrowserProfileLocator, get_running_process_names
+from modules.cleanup_rules import Rule, RuleSet
 
 class CleanupManager:
+    # An analysis older than this is considered stale and the next clean walks the tree again
+    INDEX_MAX_AGE = 600
+
     def __init__(self):
         self.logger = Logger()
+        self.engine = CleanupEngine()
+        self.browser_locator = BrowserProfileLocator()
+        self.rules = RuleSet.load() # Built-in + user cleanup_rules.json
+        self._indexes = {} # "temp" / "browser" -> ScanIndex from the last dry run
+
+    def get_browser_rules(self, skip_browsers=()):
+        """One rule per cache folder of every discovered browser profile, named after the browser"""
+        rules = []
+        for profile in self.browser_locator.discover():
+            if profile.browser in skip_browsers:
+                continue
+            for cache_dir in profile.cache_dirs:
+                # Browsers expect their cache folder layout to survive, only drop the files
+                rules.append(Rule(profile.browser, cache_dir, category="browser", remove_dirs=False))
+        return rules
+
+    def get_running_browsers(self):
+        """Names of the browsers that currently have a process running, or None if that is unknown"""
+        running = get_running_process_names()
+        if running is None:
+            return None
+        return {p.browser for p in self.browser_locator.discover() if p.process in running}
 
-    def get_temp_paths(self):
-        paths = []
-        # User Temp
-        if 'TEMP' in os.environ:
-            paths.append(os.environ['TEMP'])
-        # Windows Temp
-        win_temp = os.path.join(os.environ.get('SystemRoot', 'C:\\Windows'), 'Temp')
-        if os.path.exists(win_temp):
-            paths.append(win_temp)
-        return list(set(paths)) # Remove duplicates
-
-    def clean_browser_caches(self):
-        """Clears cache for Chrome, Edge, and Firefox"""
-        deleted_count = 0
-        deleted_size = 0
-        
-        users_dir = os.path.dirname(os.environ['USERPROFILE'])
-        # We only really care about current user usually, but let's stick to env vars
-        local_app_data = os.environ.get('LOCALAPPDATA')
-        
-        if not local_app_data: return 0, 0
-
-        # Define targets
-        targets = [
-            os.path.join(local_app_data, r"Google\Chrome\User Data\Default\Cache"),
-            os.path.join(local_app_data, r"Google\Chrome\User Data\Default\Code Cache"),
-            os.path.join(local_app_data, r"Microsoft\Edge\User Data\Default\Cache"),
-            os.path.join(local_app_data, r"Microsoft\Edge\User Data\Default\Code Cache"),
-            os.path.join(local_app_data, r"Mozilla\Firefox\Profiles"), # Needs wildcard handling
-        ]
+    def clean_browser_caches(self, progress_callback=None, control=None):
+        """
+        Clears the caches of every Chromium-family and Firefox profile, skipping running browsers.
+        :param control: Optional JobControl (see modules.jobs); raises JobCancelled if cancelled.
+        Returns (files, bytes).
+        """
+        result = CleanupResult.collect(self.stream_browser_caches(progress_callback, control))
+        for browser, (c, s) in sorted(result.by_tag.items()):
+            msg = f"{browser}: {c} files, {s / (1024*1024):.2f} MB"
+            self.logger.log(f"Browser cache {msg}")
+            if progress_callback: progress_callback(msg)
+        if result.errors:
+            self.logger.log(f"Browser cache: {result.errors} files in use were skipped.")
+        return result.files, result.bytes
 
+    def stream_browser_caches(self, progress_callback=None, control=None):
+        """
+        CleanupStream of the browser cache cleanup: one CleanupEvent per deleted or skipped file
+        (tagged with the browser name), consumed lazily. Nothing is deleted until it is iterated.
+        """
         self.logger.log("Starting Browser Cleanup...")
+        running = self.get_running_browsers()
+        if running is None:
+            # Deleting under a running browser corrupts its cache: without a process list assume they all are
+            running = {p.browser for p in self.browser_locator.discover()}
+            msg = "Skipping all browsers: could not check which ones are running."
+            self.logger.log(msg, "WARNING")
+            if progress_callback: progress_callback(msg)
+        else:
+            for browser in sorted(running):
+                msg = f"Skipping {browser}: browser is running."
+                self.logger.log(msg, "WARNING")
+                if progress_callback: progress_callback(msg)
 
-        for target in targets:
-            # Handle Firefox wildcard profiles
-            if "Firefox" in target:
-                 # Look for /cache2 inside profiles
-                 if os.path.exists(target):
-                     for profile in os.listdir(target):
-                         cache_path = os.path.join(target, profile, "cache2")
-                         if os.path.exists(cache_path):
-                             c, s = self._delete_folder_contents(cache_path)
-                             deleted_count += c; deleted_size += s
-            else:
-                if os.path.exists(target):
-                    c, s = self._delete_folder_contents(target)
-                    deleted_count += c; deleted_size += s
-        
-        return deleted_count, deleted_size
-
-    def _delete_folder_contents(self, folder_path):
-        c, s = 0, 0
-        for root, dirs, files in os.walk(folder_path):
-            for name in files:
-                try:
-                    fp = os.path.join(root, name)
-                    sz = os.path.getsize(fp)
-                    os.remove(fp)
-                    c += 1; s += sz
-                except: pass
-        return c, s
-
-    def clean_temp_files(self, progress_callback=None):
-        total_deleted = 0
-        total_freed = 0
-        paths = self.get_temp_paths()
-
-        for base_path in paths:
-            self.logger.log(f"Cleaning path: {base_path}")
-            if progress_callback:
-                progress_callback(f"Scanning {base_path}...")
-
-            for root, dirs, files in os.walk(base_path):
-                for name in files:
-                    file_path = os.path.join(root, name)
-                    try:
-                        size = os.path.getsize(file_path)
-                        os.remove(file_path)
-                        total_deleted += 1
-                        total_freed += size
-                        self.logger.log(f"Deleted file: {file_path}")
-                    except Exception as e:
-                        # self.logger.log(f"Skipped file {file_path}: {e}", "WARNING")
-                        pass # Valid to skip locked files
-                
-                for name in dirs:
-                    dir_path = os.path.join(root, name)
-                    try:
-                        shutil.rmtree(dir_path)
-                        self.logger.log(f"Deleted directory: {dir_path}")
-                    except Exception as e:
-                        pass
-        
-        result_msg = f"Cleanup complete. Deleted {total_deleted} files, freed {total_freed / (1024*1024):.2f} MB."
+        index = self._take_index("browser")
+        if index is not None:
+            return self.engine.stream_index(index, skip_tags=running, control=control)
+        compiled = self.rules.compile(rules=self.get_browser_rules(skip_browsers=running))
+        return self.engine.stream_rules(compiled, control=control)
+
+    def clean_temp_files(self, progress_callback=None, control=None):
+        """Runs every enabled "temp" rule (temp folders, error reports, crash dumps, ...). Returns (files, bytes)."""
+        result = CleanupResult.collect(self.stream_temp_files(progress_callback, control))
+        total_deleted, total_freed = result.files, result.bytes
+
+        for name, (c, s) in sorted(result.by_tag.items()):
+            self.logger.log(f"{name}: {c} files, {s / (1024*1024):.2f} MB")
+        result_msg = f"Cleanup complete. Deleted {total_deleted} files, removed {result.dirs_removed} folders, freed {total_freed / (1024*1024):.2f} MB in {result.elapsed:.1f}s."
+        if result.errors:
+            result_msg += f" {result.errors} files in use were skipped."
         self.logger.log(result_msg)
         return total_deleted, total_freed
 
+    def stream_temp_files(self, progress_callback=None, control=None):
+        """CleanupStream of the "temp" rules cleanup (events tagged with the rule name)"""
+        index = self._take_index("temp")
+        if index is not None:
+            return self.engine.stream_index(index, progress_callback=progress_callback, control=control)
+        compiled = self.rules.compile("temp")
+        for rule in compiled.rules:
+            self.logger.log(f"Cleaning {rule.name}: {rule.resolved_root()}")
+        return self.engine.stream_rules(compiled, progress_callback=progress_callback, control=control)
+
+    # --- Dry Run ---
+    def analyze_temp_files(self, progress_callback=None, control=None):
+        """Read-only scan of the "temp" rules. Returns a ScanIndex (also kept for the next clean)."""
+        index = self.engine.scan_rules(self.rules.compile("temp"), progress_callback=progress_callback, control=control)
+        self._indexes["temp"] = index
+        self.logger.log(f"Temp analysis: {index.file_count} files, {index.total_bytes / (1024*1024):.2f} MB reclaimable.")
+        return index
+
+    def analyze_browser_caches(self, progress_callback=None, control=None):
+        """Read-only scan of the browser caches. Returns a ScanIndex (also kept for the next clean)."""
+        compiled = self.rules.compile(rules=self.get_browser_rules())
+        index = self.engine.scan_rules(compiled, progress_callback=progress_callback, control=control)
+        self._indexes["browser"] = index
+        self.logger.log(f"Browser cache analysis: {index.file_count} files, {index.total_bytes / (1024*1024):.2f} MB reclaimable.")
+        return index
+
+    def _take_index(self, key):
+        """Pops the last analysis for key if it is still fresh enough to delete from"""
+        index = self._indexes.pop(key, None)
+        if index is not None and index.age() <= self.INDEX_MAX_AGE:
+            return index
+        return None
+
     def empty_recycle_bin(self):
         try:
             # Use native Windows API via ctypes to avoid PowerShell issues
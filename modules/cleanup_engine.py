@@ -0,0 +1,349 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules.logger import Logger
+from modules.cleanup_rules import Rule, CompiledRules
+from modules.jobs import JobControl
+
+# CleanupEvent kinds
+DELETED = "deleted"
+SKIPPED_LOCKED = "skipped-locked"
+DIR_REMOVED = "dir-removed"
+
+class CleanupEvent:
+    """One outcome of a cleanup run: a deleted file, a file left alone (in use / denied) or a removed folder"""
+    __slots__ = ("kind", "path", "size", "tag", "error")
+
+    def __init__(self, kind, path, size=0, tag=None, error=None):
+        self.kind = kind
+        self.path = path
+        self.size = size
+        self.tag = tag # Rule name (browser name for browser caches)
+        self.error = error # Reason a file was skipped
+
+    def __repr__(self):
+        return f"CleanupEvent({self.kind!r}, {self.path!r}, {self.size})"
+
+class WorkerStats:
+    """Files/bytes removed by a single deleter thread"""
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+
+class CleanupStream:
+    """
+    Lazy stream of CleanupEvent for one engine run. Iterating it starts the run; the deletion
+    happens while the caller consumes, through bounded queues, so memory stays constant
+    however many files are involved. Stopping early (break / close) cancels the rest of the run.
+    After a full iteration, workers and elapsed describe the run.
+    """
+    def __init__(self, engine, feed, control=None):
+        self.engine = engine
+        self.feed = feed
+        self.control = control
+        self.workers = []
+        self.elapsed = 0.0
+        self._consumed = False
+
+    def __iter__(self):
+        if self._consumed:
+            raise RuntimeError("A CleanupStream can only be consumed once")
+        self._consumed = True
+        return self.engine._stream(self)
+
+class CleanupResult:
+    """Aggregated outcome of a CleanupEngine run: a reducer over its CleanupStream"""
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0 # Files skipped because they are locked or access was denied
+        self.dirs_removed = 0
+        self.elapsed = 0.0
+        self.by_tag = {} # tag -> [files, bytes] deleted
+        self.workers = []
+
+    @classmethod
+    def collect(cls, stream):
+        result = cls()
+        for event in stream:
+            result.add(event)
+        result.workers = stream.workers
+        result.elapsed = stream.elapsed
+        return result
+
+    def add(self, event):
+        kind = event.kind
+        if kind == DELETED:
+            self.files += 1
+            self.bytes += event.size
+            entry = self.by_tag.get(event.tag)
+            if entry is None:
+                entry = self.by_tag[event.tag] = [0, 0]
+            entry[0] += 1
+            entry[1] += event.size
+        elif kind == SKIPPED_LOCKED:
+            self.errors += 1
+        elif kind == DIR_REMOVED:
+            self.dirs_removed += 1
+
+class ScanIndex:
+    """
+    Read-only result of a dry-run scan: every candidate file with its size and mtime,
+    plus running totals grouped by rule (root), extension and age bucket.
+    A later clean can be fed straight from the index without walking the tree again.
+    """
+    # (label, max age in days) - checked in order, the last bucket catches everything older
+    AGE_BUCKETS = [("< 1 day", 1), ("1-7 days", 7), ("7-30 days", 30), ("> 30 days", None)]
+
+    def __init__(self, labels):
+        self.created = time.time()
+        self.files = [] # (path, size, mtime, tag)
+        self.dirs = [] # Removable folders, pre-order (parents before children)
+        self.by_root = {label: [0, 0] for label in labels} # rule name -> [count, bytes]
+        self.by_ext = {}
+        self.by_age = {label: [0, 0] for label, _ in self.AGE_BUCKETS}
+
+    def add(self, tag, path, size, mtime):
+        self.files.append((path, size, mtime, tag))
+        self._bump(self.by_root, tag, size)
+        ext = os.path.splitext(path)[1].lower() or "(none)"
+        self._bump(self.by_ext, ext, size)
+        self._bump(self.by_age, self.age_bucket(mtime), size)
+
+    def age_bucket(self, mtime):
+        age_days = (self.created - mtime) / 86400
+        for label, max_days in self.AGE_BUCKETS:
+            if max_days is None or age_days < max_days:
+                return label
+
+    def _bump(self, table, key, size):
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = [0, 0]
+        entry[0] += 1
+        entry[1] += size
+
+    @property
+    def file_count(self):
+        return len(self.files)
+
+    @property
+    def total_bytes(self):
+        return sum(b for _, b in self.by_root.values())
+
+    def age(self):
+        """Seconds since the scan was taken"""
+        return time.time() - self.created
+
+    def top_extensions(self, n=5):
+        """Returns [(ext, count, bytes)] sorted by bytes, largest first"""
+        items = sorted(self.by_ext.items(), key=lambda kv: kv[1][1], reverse=True)[:n]
+        return [(ext, c, b) for ext, (c, b) in items]
+
+class CleanupEngine:
+    """
+    Scan-and-delete pipeline.
+    The compiled cleanup rules walk their roots with os.scandir (reusing the DirEntry stat data,
+    which on Windows comes for free with the directory listing) and feed batches of files to a
+    bounded pool of deleter threads. Directories are removed bottom-up only after every
+    file has been processed, so the walk never races its own deletions.
+    """
+    BATCH_SIZE = 256
+    MAX_SCANNERS = 4 # Roots walked in parallel when cleaning several targets
+
+    def __init__(self, max_workers=None, batch_size=None):
+        self.logger = Logger()
+        # Deletion is I/O bound (metadata updates), a few threads are enough to saturate the disk
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        self.batch_size = batch_size or self.BATCH_SIZE
+
+    def clean(self, roots, remove_dirs=True, progress_callback=None, tags=None, control=None):
+        """
+        Deletes everything below each root (the roots themselves are kept).
+        :param remove_dirs: Also remove the (now empty) subdirectories, deepest first.
+        :param tags: Optional {root: label}; results are broken down per label in CleanupResult.by_tag.
+        :param control: Optional JobControl for live progress, pause and cancel.
+        Returns a CleanupResult.
+        """
+        return CleanupResult.collect(self.stream(roots, remove_dirs, progress_callback, tags, control))
+
+    def stream(self, roots, remove_dirs=True, progress_callback=None, tags=None, control=None):
+        """Same as clean(), as a CleanupStream of per-file events"""
+        return self.stream_rules(self._rules_for(roots, remove_dirs, tags), progress_callback, control)
+
+    def scan(self, roots, remove_dirs=True, progress_callback=None, tags=None, control=None):
+        """Dry run: builds a ScanIndex of everything clean() would delete, touching nothing"""
+        return self.scan_rules(self._rules_for(roots, remove_dirs, tags), progress_callback, control)
+
+    def clean_rules(self, compiled, progress_callback=None, control=None):
+        """
+        Deletes every file claimed by the compiled rules, in a single traversal.
+        Results are broken down per rule name in CleanupResult.by_tag.
+        Raises JobCancelled if control is cancelled.
+        """
+        return CleanupResult.collect(self.stream_rules(compiled, progress_callback, control))
+
+    def stream_rules(self, compiled, progress_callback=None, control=None):
+        """
+        CleanupStream version of clean_rules().
+        Several walk roots are scanned concurrently and share the same deleter pool.
+        """
+        def scan_root(root, work, dirs):
+            if progress_callback:
+                progress_callback(f"Scanning {root}...")
+            batch = []
+            def emit(path, size, mtime, tag):
+                batch.append((path, size, tag))
+                if len(batch) >= self.batch_size:
+                    work.put(batch[:])
+                    batch.clear()
+            compiled.walk(root, emit, dirs, control)
+            if batch:
+                work.put(batch)
+
+        def feed(work, dirs):
+            roots = compiled.walk_roots
+            if len(roots) <= 1:
+                for root in roots:
+                    scan_root(root, work, dirs)
+                return
+            # Each root's dirs stay in pre-order even when interleaved, so bottom-up removal still holds
+            with ThreadPoolExecutor(max_workers=min(self.MAX_SCANNERS, len(roots))) as pool:
+                for f in [pool.submit(scan_root, root, work, dirs) for root in roots]:
+                    f.result()
+        return CleanupStream(self, feed, control)
+
+    def scan_rules(self, compiled, progress_callback=None, control=None):
+        """Dry run of clean_rules(): builds a ScanIndex, touching nothing"""
+        index = ScanIndex([rule.name for rule in compiled.rules])
+        for root in compiled.walk_roots:
+            if progress_callback:
+                progress_callback(f"Analyzing {root}...")
+            compiled.walk(root, lambda path, size, mtime, tag: index.add(tag, path, size, mtime), index.dirs, control)
+        return index
+
+    def clean_index(self, index, progress_callback=None, skip_tags=(), control=None):
+        """
+        Deletes the files recorded by a previous scan without walking the tree again.
+        :param skip_tags: Labels whose files must be left alone (e.g. a browser that is running now).
+        """
+        return CleanupResult.collect(self.stream_index(index, progress_callback, skip_tags, control))
+
+    def stream_index(self, index, progress_callback=None, skip_tags=(), control=None):
+        """CleanupStream version of clean_index()"""
+        def feed(work, dirs):
+            files = index.files
+            if skip_tags:
+                files = [f for f in files if f[3] not in skip_tags]
+            if progress_callback:
+                progress_callback(f"Deleting {len(files)} indexed files...")
+            dirs.extend(index.dirs)
+            for i in range(0, len(files), self.batch_size):
+                if control is not None:
+                    control.checkpoint()
+                work.put([(path, size, tag) for path, size, _, tag in files[i:i + self.batch_size]])
+        return CleanupStream(self, feed, control)
+
+    def _rules_for(self, roots, remove_dirs, tags):
+        """Plain "wipe this folder" rules for callers that pass bare roots"""
+        tags = tags or {}
+        return CompiledRules([Rule(tags.get(root, root), root, remove_dirs=remove_dirs) for root in roots])
+
+    def _stream(self, stream):
+        start = time.perf_counter()
+        # A private control lets an abandoned stream stop its workers and walkers
+        control = stream.control or JobControl()
+        # Bounded queues: the producer blocks instead of buffering the whole tree in memory,
+        # and the workers block when the consumer falls behind
+        work = queue.Queue(maxsize=self.max_workers * 4)
+        events = queue.Queue(maxsize=self.max_workers * 4)
+        workers = [WorkerStats(i) for i in range(self.max_workers)]
+        stream.workers = workers
+        control.track(workers)
+        threads = [threading.Thread(target=self._delete_worker, args=(work, events, w, control), daemon=True) for w in workers]
+        for t in threads:
+            t.start()
+
+        dirs = []
+        failure = []
+        def produce():
+            try:
+                stream.feed(work, dirs)
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                for _ in threads:
+                    work.put(None)
+                for t in threads:
+                    t.join()
+                events.put(None)
+        threading.Thread(target=produce, daemon=True).start()
+
+        finished = False
+        try:
+            while True:
+                batch = events.get()
+                if batch is None:
+                    break
+                yield from batch
+            finished = True
+        finally:
+            if not finished:
+                # Consumer went away: stop deleting and let every thread wind down
+                control.cancel()
+                while events.get() is not None:
+                    pass
+        if failure:
+            raise failure[0]
+
+        removed = 0
+        if not control.cancelled:
+            # Pre-order discovery reversed = children always before their parents
+            for path in reversed(dirs):
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    continue # Still holds locked files
+                removed += 1
+                yield CleanupEvent(DIR_REMOVED, path)
+        self.logger.event("Removed directories", removed)
+        stream.elapsed = time.perf_counter() - start
+
+        for w in workers:
+            self.logger.log(f"Cleanup worker {w.worker_id}: {w.files} files, {w.bytes / (1024*1024):.2f} MB, {w.errors} skipped")
+
+    def _delete_worker(self, work, events, stats, control):
+        while True:
+            batch = work.get()
+            if batch is None:
+                return
+            # After a cancel keep draining (so the producer never blocks) but delete nothing
+            if not control.wait_if_paused():
+                continue
+            out = []
+            files, freed = 0, 0
+            for path, size, tag in batch:
+                if control.should_stop():
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue # Already gone, nothing to reclaim
+                except OSError as e:
+                    stats.errors += 1 # Valid to skip locked files
+                    out.append(CleanupEvent(SKIPPED_LOCKED, path, size, tag, e.strerror or str(e)))
+                    continue
+                files += 1
+                freed += size
+                # Live per-file counters: JobControl reads them for progress
+                stats.files += 1
+                stats.bytes += size
+                out.append(CleanupEvent(DELETED, path, size, tag))
+            # One aggregated logger event per batch instead of a log line per file
+            self.logger.event("Deleted files", files, freed)
+            if out:
+                events.put(out)
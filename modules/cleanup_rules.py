@@ -0,0 +1,209 @@
+import fnmatch
+import json
+import os
+import re
+import time
+from modules.logger import Logger
+from modules.utils import is_junction, resource_path
+
+BUILTIN_RULES = "assets/cleanup_rules.json"
+
+class Rule:
+    """
+    One cleanup target.
+    :param root: Folder the rule applies to (environment variables are expanded). The root itself is never deleted.
+    :param patterns: Globs matched against file names; a file must match one of them.
+    :param exclude: Globs for files/folders to leave alone. Globs containing a path separator
+                    are matched against the path relative to root.
+    :param min_age_days: Only files not modified for at least this long.
+    :param min_size: Only files of at least this many bytes.
+    :param remove_dirs: Remove subfolders left empty after the cleanup.
+    """
+    def __init__(self, name, root, category="temp", patterns=None, exclude=None,
+                 min_age_days=0, min_size=0, remove_dirs=False, enabled=True):
+        self.name = name
+        self.root = root
+        self.category = category
+        self.patterns = patterns or ["*"]
+        self.exclude = exclude or []
+        self.min_age_days = min_age_days
+        self.min_size = min_size
+        self.remove_dirs = remove_dirs
+        self.enabled = enabled
+        self._compile()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data["name"],
+            root=data["root"],
+            category=data.get("category", "temp"),
+            patterns=data.get("patterns"),
+            exclude=data.get("exclude"),
+            min_age_days=float(data.get("min_age_days", 0)),
+            min_size=int(data.get("min_size", 0)),
+            remove_dirs=bool(data.get("remove_dirs", False)),
+            enabled=bool(data.get("enabled", True)),
+        )
+
+    def _compile(self):
+        # All globs of a rule collapse into one case-insensitive regex (Windows file names)
+        self._match = self._glob_regex(self.patterns)
+        name_ex = [p for p in self.exclude if "/" not in p and "\\" not in p]
+        path_ex = [p.replace("\\", "/") for p in self.exclude if p not in name_ex]
+        self._exclude_name = self._glob_regex(name_ex) if name_ex else None
+        self._exclude_path = self._glob_regex(path_ex) if path_ex else None
+
+    def _glob_regex(self, globs):
+        return re.compile("|".join(fnmatch.translate(g) for g in globs), re.IGNORECASE)
+
+    def resolved_root(self):
+        """Expanded, normalized root, or None if it still has unresolved variables"""
+        root = os.path.expandvars(self.root)
+        if "%" in root:
+            return None
+        return os.path.normpath(root)
+
+    def excludes(self, name, path, root):
+        if self._exclude_name is not None and self._exclude_name.match(name):
+            return True
+        if self._exclude_path is not None:
+            # Only pay for relpath when the rule actually has path-based excludes
+            rel_path = os.path.relpath(path, root).replace("\\", "/")
+            if self._exclude_path.match(rel_path):
+                return True
+        return False
+
+    def matches_file(self, name, path, root, size, mtime, now):
+        if not self._match.match(name):
+            return False
+        if size < self.min_size:
+            return False
+        if self.min_age_days and (now - mtime) < self.min_age_days * 86400:
+            return False
+        return not self.excludes(name, path, root)
+
+class RuleSet:
+    """Built-in rules (assets/cleanup_rules.json) overlaid with the user's cleanup_rules.json"""
+    def __init__(self, rules=None):
+        self.logger = Logger()
+        self.rules = rules or []
+
+    @classmethod
+    def load(cls):
+        ruleset = cls()
+        by_name = {}
+        for path in (resource_path(BUILTIN_RULES), ruleset.get_user_rules_path()):
+            for rule in ruleset._read(path):
+                by_name[rule.name] = rule # User rules override (or disable) built-ins of the same name
+        ruleset.rules = list(by_name.values())
+        return ruleset
+
+    def get_user_rules_path(self):
+        return os.path.join(os.path.dirname(self.logger.get_log_path()), 'cleanup_rules.json')
+
+    def _read(self, path):
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return [Rule.from_dict(r) for r in data.get("rules", [])]
+        except Exception as e:
+            self.logger.log(f"Failed to load cleanup rules from {path}: {e}", "ERROR")
+            return []
+
+    def select(self, category):
+        return [r for r in self.rules if r.enabled and r.category == category]
+
+    def compile(self, category=None, rules=None):
+        """Compiles the enabled rules of a category (or an explicit list) into one CompiledRules"""
+        if rules is None:
+            rules = self.select(category)
+        return CompiledRules(rules)
+
+class CompiledRules:
+    """
+    A set of rules turned into a single traversal plan.
+    Roots nested inside another rule's root are not walked separately: the walk of the
+    outer root picks them up and activates their rules from that folder down, so every
+    folder is listed once and each entry is evaluated against all rules active there.
+    """
+    def __init__(self, rules):
+        self.rules = []
+        self._rules_at = {} # normcased root -> [rules starting there]
+        for rule in rules:
+            root = rule.resolved_root()
+            if root is None or not os.path.isdir(root):
+                continue
+            self.rules.append(rule)
+            self._rules_at.setdefault(os.path.normcase(root), []).append((rule, root))
+
+        # Walk only the outermost roots (sorted, so a parent always comes before its children)
+        keys = sorted(self._rules_at)
+        self.walk_roots = []
+        outer_keys = []
+        for key in keys:
+            if not any(key.startswith(outer.rstrip(os.sep) + os.sep) for outer in outer_keys):
+                outer_keys.append(key)
+                self.walk_roots.append(self._rules_at[key][0][1])
+        # Folders that lead to a nested rule root must be entered even when no rule is active yet
+        self._waypoints = set()
+        for key in keys:
+            parent = os.path.dirname(key)
+            while parent and parent not in self._waypoints and os.path.dirname(parent) != parent:
+                self._waypoints.add(parent)
+                parent = os.path.dirname(parent)
+
+    @property
+    def roots(self):
+        return [root for entries in self._rules_at.values() for _, root in entries]
+
+    def walk(self, walk_root, emit, dirs, control=None):
+        """
+        Walks one of walk_roots depth-first.
+        Calls emit(path, size, mtime, rule_name) for each file claimed by a rule (first active rule wins)
+        and appends removable subfolders to dirs in pre-order (parents before children).
+        :param control: Optional JobControl, checked before each folder is listed.
+        """
+        now = time.time()
+        # active: [(rule, rule_root)] in priority order
+        stack = [(walk_root, self._rules_at.get(os.path.normcase(walk_root), []))]
+        while stack:
+            if control is not None:
+                control.checkpoint()
+            path, active = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            self._visit(entry, active, now, emit, dirs, stack)
+                        except OSError:
+                            pass # Entry vanished or is inaccessible
+            except OSError:
+                pass # Directory vanished or access denied
+
+    def _visit(self, entry, active, now, emit, dirs, stack):
+        if entry.is_dir(follow_symlinks=False):
+            if is_junction(entry):
+                return # Leads outside the rule roots: never entered, never removed
+            key = os.path.normcase(entry.path)
+            sub = [(r, root) for r, root in active if not r.excludes(entry.name, entry.path, root)]
+            starting = self._rules_at.get(key)
+            if starting:
+                # A nested rule root: its own rules take priority, and it is never removed
+                sub = starting + sub
+            elif any(r.remove_dirs for r, _ in sub):
+                dirs.append(entry.path)
+            if sub or key in self._waypoints:
+                stack.append((entry.path, sub))
+            return
+        if entry.is_symlink() and entry.is_dir():
+            return # Never touch links pointing at other directories
+        if not active:
+            return
+        st = entry.stat(follow_symlinks=False)
+        for rule, root in active:
+            if rule.matches_file(entry.name, entry.path, root, st.st_size, st.st_mtime, now):
+                emit(entry.path, st.st_size, st.st_mtime, rule.name)
+                return
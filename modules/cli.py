@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1 # The command ran but something went wrong
+EXIT_USAGE = 2 # Bad arguments (argparse uses 2 as well)
+EXIT_NOT_ADMIN = 3 # The command needs an elevated prompt
+EXIT_CANCELLED = 130 # Ctrl+C
+
+class Output:
+    """
+    Writes results to stdout: one JSON document (--json), one JSON object per line (--ndjson)
+    or plain text. Text messages go to stderr in the JSON modes so stdout stays parseable.
+    """
+    def __init__(self, mode):
+        self.mode = mode # "json", "ndjson" or "text"
+
+    def record(self, obj, text=None):
+        """A streamed record: printed right away in NDJSON and text mode, dropped in JSON mode"""
+        if self.mode == "ndjson":
+            self._emit(obj)
+        elif self.mode == "text" and text is not None:
+            print(text, flush=True)
+
+    def result(self, obj, text=None):
+        """The final result of the command"""
+        if self.mode == "text":
+            if text is not None:
+                print(text, flush=True)
+        else:
+            self._emit(obj, indent=2 if self.mode == "json" else None)
+
+    def message(self, text):
+        print(text, file=sys.stderr if self.mode != "text" else sys.stdout, flush=True)
+
+    def _emit(self, obj, indent=None):
+        sys.stdout.write(json.dumps(obj, indent=indent) + "\n")
+        sys.stdout.flush()
+
+def _mb(size):
+    return f"{size / (1024*1024):.2f} MB"
+
+# --- monitor ---
+def cmd_monitor(args, out):
+    count = args.count if args.count is not None else (0 if out.mode == "ndjson" else 1)
+    if count == 0 and out.mode == "json":
+        # One JSON document is only printed at the end, which an endless run never reaches
+        out.message("--json needs a sample count; use --ndjson to stream samples without end.")
+        return EXIT_USAGE
+    from modules.system_monitor import SystemMonitor
+    monitor = SystemMonitor()
+
+    def sample():
+        total_ram, available_ram, ram_percent = monitor.get_ram_usage()
+        total_disk, free_disk, disk_percent = monitor.get_disk_usage()
+        data = {
+            "timestamp": round(time.time(), 3),
+            "cpu_percent": round(monitor.get_cpu_usage(fresh=True), 1), # --interval may be shorter than the sampler's cache
+            "ram": {"total_gb": total_ram, "available_gb": available_ram, "percent": ram_percent},
+            "disk": {"volume": "C:", "total_gb": total_disk, "free_gb": free_disk, "percent": disk_percent},
+            "volumes": [{"volume": u.name, "kind": u.kind, "total": u.total, "free": u.free, "percent": u.percent, "status": u.status}
+                        for u in monitor.get_volume_usage()],
+            "boot_time": monitor.get_boot_time(),
+        }
+        if os.name == 'nt':
+            percent, plugged = monitor.get_battery_status()
+            data["battery"] = {"percent": percent, "status": plugged}
+        if args.top:
+            top_cpu, top_mem = monitor.get_top_processes(args.top)
+            data["top_cpu"] = [_process(p) for p in top_cpu]
+            data["top_memory"] = [_process(p) for p in top_mem]
+        return data
+
+    def describe(data):
+        lines = [f"CPU {data['cpu_percent']:.1f}%  RAM {data['ram']['percent']}%  Disk C: {data['disk']['percent']}% used"]
+        for v in data["volumes"]:
+            lines.append(f"  {v['volume']:<20} {v['percent']:5.1f}% used  {v['free'] / (1024**3):.1f} GB free  [{v['kind']}, {v['status']}]")
+        for p in data.get("top_cpu", []):
+            lines.append(f"  {p['pid']:>7}  {p['name']:<30} {p['cpu_percent']:5.1f}%  {p['working_set'] // (1024*1024)} MB")
+        return "\n".join(lines)
+
+    if args.top:
+        monitor.get_top_processes(args.top) # Baseline for the CPU% deltas
+    samples = []
+    i = 0
+    while count == 0 or i < count:
+        time.sleep(args.interval) # CPU usage is averaged over the wait
+        data = sample()
+        i += 1
+        if out.mode == "json":
+            samples.append(data)
+        else:
+            out.record(data, describe(data))
+    if out.mode == "json":
+        out.result(samples[0] if len(samples) == 1 else samples)
+    return EXIT_OK
+
+def _process(p):
+    return {"pid": p.pid, "name": p.name, "cpu_percent": round(p.cpu_percent, 1), "working_set": p.working_set}
+
+# --- clean ---
+def cmd_clean(args, out):
+    from modules.cleanup import CleanupManager
+    mgr = CleanupManager()
+
+    if args.dry_run:
+        analyze = mgr.analyze_temp_files if args.target == "temp" else mgr.analyze_browser_caches
+        index = analyze()
+        data = {
+            "target": args.target,
+            "dry_run": True,
+            "files": index.file_count,
+            "bytes": index.total_bytes,
+            "by_rule": {k: {"files": c, "bytes": s} for k, (c, s) in index.by_root.items()},
+            "by_extension": {k: {"files": c, "bytes": s} for k, (c, s) in index.by_ext.items()},
+            "by_age": {k: {"files": c, "bytes": s} for k, (c, s) in index.by_age.items()},
+        }
+        out.result(data, f"{args.target}: {index.file_count} files, {_mb(index.total_bytes)} reclaimable")
+        return EXIT_OK
+
+    from modules.cleanup_engine import CleanupResult
+    stream = mgr.stream_temp_files() if args.target == "temp" else mgr.stream_browser_caches()
+    result = CleanupResult()
+    for event in stream:
+        result.add(event)
+        if args.events:
+            out.record({"event": event.kind, "path": event.path, "size": event.size, "tag": event.tag, "error": event.error})
+    data = {
+        "target": args.target,
+        "dry_run": False,
+        "files": result.files,
+        "bytes": result.bytes,
+        "skipped": result.errors,
+        "dirs_removed": result.dirs_removed,
+        "elapsed": round(stream.elapsed, 3),
+        "by_rule": {k: {"files": c, "bytes": s} for k, (c, s) in result.by_tag.items()},
+    }
+    if args.target == "temp" and args.empty_recycle_bin:
+        success, msg = mgr.empty_recycle_bin()
+        data["recycle_bin"] = msg
+    out.result(data, f"{args.target}: deleted {result.files} files, freed {_mb(result.bytes)}, skipped {result.errors} in use")
+    return EXIT_OK
+
+# --- godmode ---
+def cmd_godmode(args, out):
+    from modules.godmode import PHASES, PHASE_KEYS, ResurrectionProtocol
+    if args.list:
+        out.result([{"key": key, "title": title} for key, title, _ in PHASES],
+                   "\n".join(f"{key:<10} {title}" for key, title, _ in PHASES))
+        return EXIT_OK
+
+    phases = None
+    if args.phases:
+        phases = [p.strip() for p in args.phases.split(",") if p.strip()]
+        unknown = [p for p in phases if p not in PHASE_KEYS]
+        if unknown:
+            out.message(f"Unknown phase(s): {', '.join(unknown)}. Available: {', '.join(PHASE_KEYS)}")
+            return EXIT_USAGE
+
+    from modules.utils import is_admin
+    if not is_admin():
+        out.message("God mode needs an elevated (administrator) prompt.")
+        return EXIT_NOT_ADMIN
+
+    def log(msg, level="info"):
+        out.record({"event": "log", "level": level, "message": msg.strip()}, msg)
+
+    def on_phase(index, total, key, title):
+        out.record({"event": "phase", "index": index, "total": total, "key": key, "title": title})
+
+    def on_progress(index, total, key, fraction, stage):
+        out.record({"event": "progress", "index": index, "total": total, "key": key,
+                    "percent": round(fraction * 100, 1), "stage": stage})
+
+    protocol = ResurrectionProtocol(log)
+    try:
+        results = protocol.run(phases, on_phase=on_phase, on_progress=on_progress)
+    except KeyboardInterrupt:
+        protocol.cancel()
+        raise
+    failed = [key for key, r in results.items() if r.get("ok") is False]
+    out.result({"phases": results, "failed": failed},
+               "Protocol complete." + (f" Failed: {', '.join(failed)}" if failed else ""))
+    return EXIT_FAILED if failed else EXIT_OK
+
+# --- Entry point ---
+def build_parser():
+    parser = argparse.ArgumentParser(prog="panacea", description="Panacea system optimizer (headless mode)")
+    fmt = argparse.ArgumentParser(add_help=False)
+    group = fmt.add_mutually_exclusive_group()
+    group.add_argument("--json", dest="mode", action="store_const", const="json", help="print one JSON document")
+    group.add_argument("--ndjson", dest="mode", action="store_const", const="ndjson", help="print one JSON object per line as results arrive")
+    fmt.add_argument("-v", "--verbose", action="store_true", help="also print the application log to stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("monitor", parents=[fmt], help="CPU, RAM, disk and top processes")
+    p.add_argument("--interval", type=float, default=0.5, help="seconds between samples (default 0.5)")
+    p.add_argument("--count", type=int, help="number of samples (default 1, endless with --ndjson; 0 = endless, not with --json)")
+    p.add_argument("--top", type=int, default=0, metavar="N", help="include the top N processes by CPU and memory")
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("clean", parents=[fmt], help="delete temp files or browser caches")
+    p.add_argument("target", choices=["temp", "browser"])
+    p.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    p.add_argument("--events", action="store_true", help="with --ndjson, also emit one line per deleted/skipped file")
+    p.add_argument("--empty-recycle-bin", action="store_true", help="also empty the recycle bin after a temp cleanup (cannot be undone)")
+    p.set_defaults(func=cmd_clean)
+
+    p = sub.add_parser("godmode", parents=[fmt], help="run the resurrection protocol (needs admin)")
+    p.add_argument("--phases", metavar="KEYS", help="comma-separated phase keys to run (default: all)")
+    p.add_argument("--list", action="store_true", help="list the phases and exit")
+    p.set_defaults(func=cmd_godmode)
+    return parser
+
+def run(argv):
+    """Runs one headless command and returns its exit code"""
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK # --help exits with 0
+
+    from modules.logger import Logger
+    logger = Logger()
+    logger.console = args.verbose
+    logger.log(f"CLI: {' '.join(argv)}")
+    out = Output(args.mode or "text")
+    try:
+        return args.func(args, out)
+    except KeyboardInterrupt:
+        out.message("Cancelled.")
+        return EXIT_CANCELLED
+    except Exception as e:
+        logger.log(f"CLI command failed: {e}", "ERROR")
+        out.message(f"Error: {e}")
+        return EXIT_FAILED
+    finally:
+        logger.flush()
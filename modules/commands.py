@@ -1,10 +1,321 @@
+import asyncio
+import codecs
+import os
+import signal
 import subprocess
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 from modules.logger import Logger
 
+CREATE_NO_WINDOW = 0x08000000
+
+# CommandResult.status values
+OK = "ok"
+FAILED = "failed" # Non-zero exit code
+TIMEOUT = "timeout" # Wall-clock limit reached
+IDLE_TIMEOUT = "idle-timeout" # No output for too long
+CANCELLED = "cancelled"
+ERROR = "error" # Could not be started
+
+class CommandResult:
+    """Outcome of one streamed command"""
+    def __init__(self, command, description, status, returncode=None, elapsed=0.0, error=None):
+        self.command = command
+        self.description = description
+        self.status = status
+        self.returncode = returncode
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def __repr__(self):
+        return f"CommandResult({self.description!r}, {self.status}, rc={self.returncode}, {self.elapsed:.1f}s)"
+
+class CommandHandle:
+    """A command running on the CommandEngine: result() waits for it, cancel() kills its process tree"""
+    def __init__(self, engine, command, description):
+        self.engine = engine
+        self.command = command
+        self.description = description
+        self.pid = None
+        self.future = None # concurrent.futures.Future of the CommandResult
+        self._task = None # asyncio task, only touched on the engine loop
+        self._cancel_requested = False
+
+    def cancel(self):
+        self.engine.loop.call_soon_threadsafe(self._cancel_on_loop)
+
+    def _cancel_on_loop(self):
+        self._cancel_requested = True
+        if self._task is not None:
+            self._task.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """The CommandResult; raises concurrent.futures.TimeoutError if not finished within timeout"""
+        return self.future.result(timeout)
+
+class CommandEngine:
+    """
+    Runs streamed commands as asyncio subprocesses on one background event loop thread, so any
+    number of them can run at once without a blocked thread each.
+    Every command has an optional wall-clock timeout and an idle timeout (no output at all for
+    that long); on either, or on cancel(), the whole process tree is killed (taskkill /T on
+    Windows, the process group elsewhere). Output is read in chunks as it arrives and handed to
+    on_output(bytes) on the loop thread, so callbacks must be quick.
+    One engine is shared by the whole process (see shared()).
+    """
+    CHUNK = 4096
+    KILL_WAIT = 5 # Seconds to wait for a killed process to be reaped
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self):
+        self.logger = Logger()
+        self.loop = asyncio.new_event_loop() # Proactor on Windows, which subprocesses need
+        self._thread = threading.Thread(target=self.loop.run_forever, name="CommandEngine", daemon=True)
+        self._thread.start()
+
+    def start(self, command, on_output, description=None, timeout=None, idle_timeout=None, on_close=None):
+        """
+        Starts command (a shell command line) and returns its CommandHandle right away.
+        on_close() is called on the loop thread once no more output will come, before the result is set.
+        """
+        handle = CommandHandle(self, command, description or command)
+        coro = self._run(handle, on_output, on_close, timeout, idle_timeout)
+        handle.future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return handle
+
+    # --- Loop side ---
+    async def _spawn(self, command):
+        if os.name == 'nt':
+            # chcp 65001 switches the console to UTF-8 first; >NUL hides its "Active code page" line
+            return await asyncio.create_subprocess_shell(
+                f'chcp 65001 >NUL & {command}', stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, creationflags=CREATE_NO_WINDOW)
+        # Own session, so the whole tree can be killed through its process group
+        return await asyncio.create_subprocess_shell(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            start_new_session=True)
+
+    async def _run(self, handle, on_output, on_close, timeout, idle_timeout):
+        try:
+            return await self._run_process(handle, on_output, timeout, idle_timeout)
+        finally:
+            if on_close:
+                try:
+                    on_close()
+                except Exception:
+                    pass
+
+    async def _run_process(self, handle, on_output, timeout, idle_timeout):
+        handle._task = asyncio.current_task()
+        start = time.monotonic()
+
+        def result(status, returncode=None, error=None):
+            return CommandResult(handle.command, handle.description, status, returncode, time.monotonic() - start, error)
+
+        if handle._cancel_requested:
+            return result(CANCELLED)
+        try:
+            process = await self._spawn(handle.command)
+        except asyncio.CancelledError:
+            return result(CANCELLED)
+        except Exception as e:
+            return result(ERROR, error=str(e))
+        handle.pid = process.pid
+
+        deadline = start + timeout if timeout else None
+        status = None
+        try:
+            while True:
+                wait = idle_timeout or None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        status = TIMEOUT
+                        break
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    chunk = await asyncio.wait_for(process.stdout.read(self.CHUNK), wait)
+                except asyncio.TimeoutError:
+                    status = TIMEOUT if deadline is not None and time.monotonic() >= deadline else IDLE_TIMEOUT
+                    break
+                if not chunk:
+                    break # EOF
+                try:
+                    on_output(chunk)
+                except Exception:
+                    pass
+            if status is None:
+                # Output closed; the process may still linger, so the wall clock still applies
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    returncode = await asyncio.wait_for(process.wait(), wait)
+                    return result(OK if returncode == 0 else FAILED, returncode)
+                except asyncio.TimeoutError:
+                    status = TIMEOUT
+        except asyncio.CancelledError:
+            status = CANCELLED
+        await self._kill(process)
+        return result(status, process.returncode)
+
+    async def _kill(self, process):
+        """Kills process and everything it started"""
+        if process.returncode is None:
+            try:
+                if os.name == 'nt':
+                    killer = await asyncio.create_subprocess_exec(
+                        "taskkill", "/F", "/T", "/PID", str(process.pid),
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=CREATE_NO_WINDOW)
+                    await killer.wait()
+                else:
+                    os.killpg(process.pid, signal.SIGKILL)
+            except (OSError, ProcessLookupError):
+                pass
+            try:
+                process.kill()
+            except (OSError, ProcessLookupError):
+                pass
+        try:
+            await asyncio.wait_for(process.wait(), self.KILL_WAIT)
+        except asyncio.TimeoutError:
+            self.logger.log(f"Process {process.pid} did not exit after being killed.", "WARNING")
+
+def detect_encoding(sample):
+    """
+    Picks the codec of a command's output from its first non-ASCII bytes.
+    Priority: UTF-8 (modern/forced tools) -> CP1252 (ANSI, e.g. CHKDSK/defrag) -> CP850 (OEM console).
+    UTF-16 (wmic and friends) is recognised by its BOM or its NUL bytes.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith(codecs.BOM_UTF16_LE):
+        return 'utf-16'
+    if len(sample) >= 2 and sample[1::2].count(0) > len(sample) // 4: # Even a lone "\r\x00" redraw chunk
+        return 'utf-16-le'
+    for enc in ('utf-8', 'cp1252'):
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False) # A cut multi-byte tail is fine
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return 'cp850' # Decodes every byte
+
+class OutputDecoder:
+    """
+    Turns a command's raw output chunks into text lines as they arrive.
+    The encoding is detected once per stream (at the first non-ASCII bytes) and then decoded with
+    an incremental decoder, so multi-byte characters split across chunks survive.
+    Lines end at \n, \r\n or a lone \r. Text ended by a lone \r is a progress redraw
+    (sfc, DISM, chkdsk): of the redraws in one chunk only the last is delivered, and only if it
+    differs from the previous one. Redraws go to on_progress when given, else to on_line.
+    observer(line), when given, sees every line and redraw before filter_func (e.g. a ToolParser).
+    """
+    def __init__(self, on_line, filter_func=None, on_progress=None, encoding=None, observer=None):
+        self.on_line = on_line
+        self.filter_func = filter_func
+        self.on_progress = on_progress
+        self.observer = observer
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace') if encoding else None
+        self._tail = "" # Text after the last line break
+        self._last_progress = None
+
+    def feed(self, chunk):
+        self._split(self._decode(chunk, False), False)
+
+    def close(self):
+        self._split(self._decode(b"", True), True)
+
+    def _decode(self, chunk, final):
+        if self._decoder is None:
+            # Until the first non-ASCII byte every candidate decodes the same
+            if chunk.isascii() and b"\x00" not in chunk:
+                return chunk.decode('ascii')
+            self.encoding = detect_encoding(chunk)
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        return self._decoder.decode(chunk, final)
+
+    def _split(self, text, final):
+        text = self._tail + text.replace('\x00', '')
+        if not final and text.endswith('\r'):
+            text, self._tail = text[:-1], '\r' # Could be the first half of \r\n
+        else:
+            self._tail = ""
+        progress = None
+        start = 0
+        length = len(text)
+        while start < length:
+            line_start = start
+            cr = text.find('\r', start)
+            lf = text.find('\n', start)
+            if cr < 0 and lf < 0:
+                break
+            if lf >= 0 and (cr < 0 or lf < cr):
+                end, start = lf, lf + 1
+            elif cr + 1 < length and text[cr + 1] == '\n':
+                end, start = cr, cr + 2
+            else:
+                segment = text[start:cr].strip()
+                if segment: progress = segment
+                start = cr + 1
+                continue
+            if progress is not None:
+                self._progress(progress) # Keep the order: the last redraw before this line
+                progress = None
+            self._line(text[line_start:end])
+        rest = text[start:]
+        if final:
+            if rest.strip(): self._line(rest)
+        else:
+            self._tail = rest + self._tail
+        if progress is not None:
+            self._progress(progress)
+
+    def _line(self, text):
+        line = text.strip()
+        if not line:
+            return
+        if self.observer:
+            self.observer(line)
+        if self.filter_func and not self.filter_func(line):
+            return
+        self.on_line(line)
+
+    def _progress(self, text):
+        if text == self._last_progress:
+            return
+        self._last_progress = text
+        if self.on_progress:
+            if self.observer:
+                self.observer(text)
+            self.on_progress(text)
+        else:
+            self._line(text)
+
 class CommandRunner:
     def __init__(self):
         self.logger = Logger()
 
+    @property
+    def engine(self):
+        return CommandEngine.shared()
+
     def run_command(self, command_str, description):
         """Runs a command in a new CMD window."""
         try:
@@ -15,76 +326,64 @@ class CommandRunner:
         except Exception as e:
             self.logger.log(f"Failed to execute {description}: {e}", "ERROR")
 
-    def run_command_stream(self, command_str, description, progress_callback, filter_func=None):
+    def start_stream(self, command_str, description, progress_callback, filter_func=None, timeout=None, idle_timeout=None,
+                     on_progress=None, observer=None):
+        """
+        Starts a streamed command without waiting for it. Returns a CommandHandle.
+        progress_callback(line) (and on_progress, observer) are called from the engine thread.
+        """
+        self.logger.log(f"Stream command started: {description}")
+        decoder = OutputDecoder(progress_callback, filter_func, on_progress, observer=observer)
+        return self.engine.start(command_str, decoder.feed, description, timeout, idle_timeout, on_close=decoder.close)
+
+    def run_command_stream(self, command_str, description, progress_callback, filter_func=None,
+                           timeout=None, idle_timeout=None, control=None, on_progress=None, observer=None):
         """
         Runs a command and streams stdout to the callback.
         :param filter_func: Optional function that takes a line and returns True (keep) or False (discard).
+        :param timeout: Optional wall-clock limit in seconds; idle_timeout: limit without any output.
+        :param control: Optional JobControl; cancelling it kills the command.
+        :param on_progress: Optional on_progress(text) for \r progress redraws (default: progress_callback, filtered).
+        :param observer: Optional observer(line) called with every line and redraw before filtering.
+        Returns True if the command exited with code 0.
         """
-        self.logger.log(f"Stream command started: {description}")
-        try:
-            # Creation flags to hide window
-            creation_flags = 0x08000000
-            
-            # Force UTF-8 encoding for the subprocess
-            # We wrap the command in cmd.exe to set codepage first
-            # 'chcp 65001' sets UTF-8. '>NUL' hides the chcp status output ("Active code page: 65001")
-            wrapped_cmd = f'cmd /c "chcp 65001 >NUL & {command_str}"'
-            
-            process = subprocess.Popen(
-                wrapped_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                shell=False, # We are running cmd explicitly
-                creationflags=creation_flags
-            )
-            
+        handle = self.start_stream(command_str, description, progress_callback, filter_func, timeout, idle_timeout,
+                                   on_progress, observer)
+        return self._finish(handle, progress_callback, control).ok
+
+    def run_many(self, commands, progress_callback, filter_func=None, timeout=None, idle_timeout=None, control=None):
+        """
+        Runs [(command_str, description)] concurrently, streaming all of them to progress_callback.
+        Returns [bool] in the same order.
+        """
+        handles = [self.start_stream(cmd, desc, progress_callback, filter_func, timeout, idle_timeout) for cmd, desc in commands]
+        return [self._finish(handle, progress_callback, control).ok for handle in handles]
+
+    def _finish(self, handle, progress_callback, control):
+        if control is None:
+            result = handle.result()
+        else:
             while True:
-                line_bytes = process.stdout.readline()
-                if not line_bytes and process.poll() is not None:
+                try:
+                    result = handle.result(control.POLL)
                     break
-                if line_bytes:
-                    try:
-                        # Priority: UTF-8 -> CP1252 (ANSI) -> CP850 (OEM) -> MBCS
-                        # UTF-8: Modern/Forced tools
-                        # CP1252: Stubborn local tools (e.g. CHKDSK often outputs ANSI)
-                        # CP850: Legacy
-                        line = None
-                        for enc in ['utf-8', 'cp1252', 'cp850', 'mbcs']:
-                            try:
-                                line = line_bytes.decode(enc).strip()
-                                break
-                            except UnicodeDecodeError:
-                                continue
-                        
-                        if line is None:
-                            line = line_bytes.decode('utf-8', errors='replace').strip()
-
-                        # Fix common mojibake manually if needed, but correct encoding should work.
-                        # Windows CMD 'Ó' is often 'à' in CP850 displayed as CP437 or similar.
-                        # Actually 'Ó' (curly quote?) for 'ò' or 'à' suggests specific mismatches.
-                        # Let's rely on Python's cp850 which is standard for IT CMD.
-
-                        line = line.replace('\x00', '')
-                        
-                        if line:
-                            # Apply Filter
-                            if filter_func and not filter_func(line):
-                                continue
-                            
-                            progress_callback(line)
-
-                    except Exception:
-                        pass # Skip unparseable lines
-            
-            return_code = process.wait()
-            if return_code == 0:
-                self.logger.log(f"Stream command finished: {description}")
-                return True
-            else:
-                self.logger.log(f"Stream command finished with error code {return_code}: {description}", "WARNING")
-                return False
-                
-        except Exception as e:
-            self.logger.log(f"Failed to stream {description}: {e}", "ERROR")
-            progress_callback(f"Error executing {description}: {e}")
-            return False
+                except FutureTimeout:
+                    if control.cancelled:
+                        handle.cancel()
+
+        description = handle.description
+        if result.status == OK:
+            self.logger.log(f"Stream command finished: {description}")
+        elif result.status == FAILED:
+            self.logger.log(f"Stream command finished with error code {result.returncode}: {description}", "WARNING")
+        elif result.status == ERROR:
+            self.logger.log(f"Failed to stream {description}: {result.error}", "ERROR")
+            progress_callback(f"Error executing {description}: {result.error}")
+        else:
+            reason = {TIMEOUT: f"timed out after {result.elapsed:.0f}s",
+                      IDLE_TIMEOUT: "stopped responding (no output)",
+                      CANCELLED: "was cancelled"}[result.status]
+            msg = f"{description} {reason}; the process was stopped."
+            self.logger.log(msg, "WARNING")
+            progress_callback(msg)
+        return result
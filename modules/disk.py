@@ -2,8 +2,14 @@ import os
 import subprocess
 import string
 from modules.logger import Logger
+from modules.commands import CommandRunner
+from modules.output_filters import get_filter
 
 class DiskOptimizer:
+    # Trim takes seconds, a full HDD defrag can take hours but keeps reporting progress
+    DEFRAG_TIMEOUT = 6 * 3600
+    DEFRAG_IDLE_TIMEOUT = 30 * 60
+
     def __init__(self):
         self.logger = Logger()
 
@@ -52,9 +58,11 @@ class DiskOptimizer:
         except Exception as e:
             self.logger.log(f"Failed to launch dfrgui: {e}", "ERROR")
 
-    def analyze_optimize_drive(self, drive_letter, progress_callback=None):
+    def analyze_optimize_drive(self, drive_letter, progress_callback=None, control=None, observer=None):
         """
         Runs defrag /O on the specified drive and streams output to callback.
+        :param control: Optional JobControl; cancelling it stops defrag.
+        :param observer: Optional observer(line) that sees the unfiltered output (e.g. a DefragParser).
         """
         cmd = f"defrag {drive_letter} /O"
         
@@ -63,70 +71,16 @@ class DiskOptimizer:
         else:
             self.logger.log(f"Starting optimization for {drive_letter}")
 
-        try:
-            # CREATE_NO_WINDOW = 0x08000000 to hide console window
-            creation_flags = 0x08000000
-            
-            # Force UTF-8 encoding for the subprocess
-            wrapped_cmd = f'cmd /c "chcp 65001 >NUL & {cmd}"'
-            
-            process = subprocess.Popen(
-                wrapped_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                shell=False,
-                creationflags=creation_flags
-                # text=True removed to handle bytes manually
-            )
-            
-            # Real-time output capturing
-            if progress_callback:
-                while True:
-                    line_bytes = process.stdout.readline()
-                    if not line_bytes and process.poll() is not None:
-                        break
-                    if line_bytes:
-                         # 1. Try UTF-8 first
-                         # 2. Try CP1252 (Common for CHKDSK/Defrag in IT locale)
-                         # 3. Try CP850
-                        line = None
-                        for enc in ['utf-8', 'cp1252', 'cp850']:
-                            try:
-                                line = line_bytes.decode(enc).strip()
-                                break
-                            except: continue
-                        if line is None: line = line_bytes.decode('utf-8', errors='replace').strip()
-
-                        if line:
-                            # Basic filtering for defrag clutter
-                            if "Volume information" in line or \
-                               "Volume size" in line or "Dimensioni volume" in line or \
-                               "Free space" in line or "Spazio disponibile" in line or \
-                               "Total space" in line or "Spazio totale" in line or \
-                               "Post Defragmentation" in line or "Report frammentazione" in line or \
-                               "Invoking" in line or "Chiamata di" in line or \
-                               "Volume information" in line or "Informazioni sul volume" in line or \
-                               "Re-optimize" in line or "Riottimizza" in line or \
-                               "Analysis:" in line or "Analisi:" in line or \
-                               "Note:" in line or "Nota:" in line or \
-                               line.startswith("        ") or line == "":
-                               continue
-                            
-                            progress_callback(line)
-            
-            # Wait for completion
-            return_code = process.wait()
-            
-            if return_code == 0:
-                msg = f"Optimization of {drive_letter} completed successfully."
-                if progress_callback: progress_callback(msg)
-                self.logger.log(msg)
-            else:
-                msg = f"Optimization finished with return code {return_code}."
-                if progress_callback: progress_callback(msg)
-                self.logger.log(msg, "WARNING")
-                
-        except Exception as e:
-            msg = f"Failed to start optimization: {e}"
+        # Same streaming engine as the other tools: one decoder per stream, \r progress, timeouts
+        ok = CommandRunner().run_command_stream(cmd, f"Optimize {drive_letter}", progress_callback or (lambda line: None),
+                                                filter_func=get_filter("defrag"), timeout=self.DEFRAG_TIMEOUT,
+                                                idle_timeout=self.DEFRAG_IDLE_TIMEOUT, control=control, observer=observer)
+        if ok:
+            msg = f"Optimization of {drive_letter} completed successfully."
             if progress_callback: progress_callback(msg)
-            self.logger.log(msg, "ERROR")
+            self.logger.log(msg)
+            return True
+        msg = f"Optimization of {drive_letter} did not complete successfully."
+        if progress_callback: progress_callback(msg)
+        self.logger.log(msg, "WARNING")
+        return False
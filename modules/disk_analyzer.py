@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import time
+from modules.logger import Logger
+from modules.utils import is_junction
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY, parent TEXT, mtime REAL,
+    own_bytes INTEGER, own_files INTEGER, total_bytes INTEGER, total_files INTEGER
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent, total_bytes);
+CREATE TABLE IF NOT EXISTS files (dir TEXT, name TEXT, size INTEGER);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+CREATE TABLE IF NOT EXISTS exts (dir TEXT, ext TEXT, files INTEGER, bytes INTEGER);
+CREATE INDEX IF NOT EXISTS exts_dir ON exts (dir);
+CREATE TABLE IF NOT EXISTS ext_totals (ext TEXT PRIMARY KEY, files INTEGER, bytes INTEGER);
+"""
+
+class DiskAnalyzer:
+    """
+    Folder-size analyzer backed by a persistent SQLite index (one file per volume).
+    Each directory row stores its mtime; on a rescan a directory whose mtime is unchanged is
+    not listed again (its files, extensions and subfolders come from the index), only stat'ed.
+    Note: NTFS bumps a folder's mtime when entries are added, removed or renamed, not when a
+    file grows in place, so in-place growth is picked up only when the folder itself changes.
+    Queries (largest folders/files, extensions) are plain indexed lookups on the saved scan.
+    """
+    LARGE_FILE = 1024 * 1024 # Only files >= 1 MB are kept individually (for largest_files)
+
+    def __init__(self, root, index_path=None):
+        self.logger = Logger()
+        self.root = os.path.normpath(root)
+        if os.path.splitdrive(self.root)[1] in ("", "."):
+            self.root = os.path.splitdrive(self.root)[0] + os.sep
+        self.index_path = index_path or self.get_index_path(self.root)
+
+    def get_index_path(self, root):
+        name = "".join(c if c.isalnum() else "_" for c in root).strip("_") or "root"
+        return os.path.join(os.path.dirname(self.logger.get_log_path()), f"disk_index_{name}.db")
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        db = sqlite3.connect(self.index_path)
+        db.executescript(SCHEMA)
+        row = db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if row is None or int(row[0]) != SCHEMA_VERSION:
+            # Unknown layout: start over
+            db.executescript("DELETE FROM dirs; DELETE FROM files; DELETE FROM exts; DELETE FROM ext_totals;")
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+        return db
+
+    def has_index(self):
+        if not os.path.exists(self.index_path):
+            return False
+        with self._open() as db:
+            return db.execute("SELECT 1 FROM dirs LIMIT 1").fetchone() is not None
+
+    def _open(self):
+        return _Closing(self._connect())
+
+    # --- Scan ---
+    def scan(self, progress_callback=None):
+        """Builds or refreshes the index. Returns (listed_dirs, reused_dirs, elapsed_s)."""
+        start = time.perf_counter()
+        with self._open() as db:
+            known = {}
+            children = {}
+            for path, parent, mtime in db.execute("SELECT path, parent, mtime FROM dirs"):
+                known[path] = mtime
+                children.setdefault(parent, []).append(path)
+
+            seen = set()
+            listed = reused = 0
+            stack = [(self.root, None, None)]
+            while stack:
+                path, parent, mtime = stack.pop()
+                if mtime is None:
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except OSError:
+                        continue
+                seen.add(path)
+                if known.get(path) == mtime:
+                    # Listing unchanged: reuse it, but subfolders may still have changed
+                    reused += 1
+                    for child in children.get(path, ()):
+                        stack.append((child, path, None))
+                    continue
+                listed += 1
+                subdirs = self._index_dir(db, path, parent, mtime)
+                stack.extend((sub, path, sub_mtime) for sub, sub_mtime in subdirs)
+                if progress_callback and listed % 5000 == 0:
+                    progress_callback(f"Indexed {listed} folders...")
+
+            # Folders that disappeared since the last scan
+            gone = [(p,) for p in known if p not in seen]
+            if gone:
+                db.executemany("DELETE FROM dirs WHERE path=?", gone)
+                db.executemany("DELETE FROM files WHERE dir=?", gone)
+                db.executemany("DELETE FROM exts WHERE dir=?", gone)
+
+            self._update_totals(db)
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('scanned', ?)", (str(time.time()),))
+            db.commit()
+
+        elapsed = time.perf_counter() - start
+        self.logger.log(f"Disk index {self.root}: listed {listed} folders, reused {reused}, {elapsed:.1f}s")
+        return listed, reused, elapsed
+
+    def _index_dir(self, db, path, parent, mtime):
+        own_bytes = own_files = 0
+        exts = {}
+        large = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Symlinks are not dirs here, but junctions are before Python 3.12:
+                            # skip them, or "Application Data"-style links count their target twice
+                            st = entry.stat(follow_symlinks=False)
+                            if not is_junction(entry, st):
+                                subdirs.append((entry.path, st.st_mtime))
+                        elif entry.is_file(follow_symlinks=False):
+                            size = entry.stat(follow_symlinks=False).st_size
+                            own_bytes += size
+                            own_files += 1
+                            ext = os.path.splitext(entry.name)[1].lower() or "(none)"
+                            e = exts.get(ext)
+                            if e is None:
+                                e = exts[ext] = [0, 0]
+                            e[0] += 1
+                            e[1] += size
+                            if size >= self.LARGE_FILE:
+                                large.append((path, entry.name, size))
+                    except OSError:
+                        pass
+        except OSError:
+            pass # Access denied: keep the folder with what we know (nothing)
+
+        db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, 0, 0)", (path, parent, mtime, own_bytes, own_files))
+        db.execute("DELETE FROM files WHERE dir=?", (path,))
+        db.execute("DELETE FROM exts WHERE dir=?", (path,))
+        if large:
+            db.executemany("INSERT INTO files VALUES (?, ?, ?)", large)
+        if exts:
+            db.executemany("INSERT INTO exts VALUES (?, ?, ?, ?)", [(path, ext, c, b) for ext, (c, b) in exts.items()])
+        return subdirs
+
+    def _update_totals(self, db):
+        rows = db.execute("SELECT path, parent, own_bytes, own_files FROM dirs").fetchall()
+        totals = {path: [b, f] for path, _, b, f in rows}
+        parents = {path: parent for path, parent, _, _ in rows}
+        # Deepest first, so each folder is complete before it is added to its parent
+        for path in sorted(totals, key=lambda p: p.rstrip(os.sep).count(os.sep), reverse=True):
+            parent = parents[path]
+            if parent in totals:
+                totals[parent][0] += totals[path][0]
+                totals[parent][1] += totals[path][1]
+        db.executemany("UPDATE dirs SET total_bytes=?, total_files=? WHERE path=?",
+                       [(b, f, path) for path, (b, f) in totals.items()])
+        db.execute("DELETE FROM ext_totals")
+        db.execute("INSERT INTO ext_totals SELECT ext, SUM(files), SUM(bytes) FROM exts GROUP BY ext")
+
+    # --- Queries ---
+    def largest_folders(self, n=10, parent=None):
+        """[(path, total_bytes, total_files)] of the biggest subfolders of parent (default: volume root)"""
+        with self._open() as db:
+            return db.execute("SELECT path, total_bytes, total_files FROM dirs WHERE parent=? ORDER BY total_bytes DESC LIMIT ?",
+                              (parent or self.root, n)).fetchall()
+
+    def largest_files(self, n=10):
+        """[(path, size)] of the biggest files on the volume"""
+        with self._open() as db:
+            rows = db.execute("SELECT dir, name, size FROM files ORDER BY size DESC LIMIT ?", (n,)).fetchall()
+        return [(os.path.join(d, name), size) for d, name, size in rows]
+
+    def extension_breakdown(self, n=10):
+        """[(ext, files, bytes)] sorted by bytes"""
+        with self._open() as db:
+            return db.execute("SELECT ext, files, bytes FROM ext_totals ORDER BY bytes DESC LIMIT ?", (n,)).fetchall()
+
+    def total(self):
+        """(total_bytes, total_files) under the root, from the index"""
+        with self._open() as db:
+            row = db.execute("SELECT total_bytes, total_files FROM dirs WHERE path=?", (self.root,)).fetchone()
+        return row or (0, 0)
+
+class _Closing:
+    """Context manager that closes (not just commits) a sqlite3 connection"""
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        self.db.close()
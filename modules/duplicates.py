@@ -0,0 +1,167 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from modules.logger import Logger
+from modules.utils import is_junction
+
+class DuplicateGroup:
+    """Files with identical content"""
+    def __init__(self, size, digest, paths):
+        self.size = size
+        self.digest = digest
+        self.paths = paths
+
+    @property
+    def wasted(self):
+        """Bytes reclaimable by keeping a single copy"""
+        return self.size * (len(self.paths) - 1)
+
+class DuplicateFinder:
+    """
+    Staged duplicate detection:
+    1. bucket files by size (a count-only pass first, so only colliding sizes keep their paths),
+    2. hash the first and last EDGE bytes of each candidate,
+    3. full hash (memory-mapped, in parallel) only for what still collides.
+    Colliding sizes are handled in chunks of about CHUNK_FILES paths (largest sizes first), each
+    chunk re-listing the tree for its own sizes, so memory stays bounded on huge trees; within a
+    chunk the hash jobs of all buckets share the pool. Groups are yielded per chunk, largest first.
+    Hard links (same device and file id) are one file, so they are merged, never reported as
+    copies of each other; junctions and symlinks are not followed.
+    """
+    EDGE = 64 * 1024
+    CHUNK = 4 * 1024 * 1024
+    CHUNK_FILES = 50000
+
+    def __init__(self, min_size=1024, max_workers=None):
+        self.logger = Logger()
+        self.min_size = min_size
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+
+    def find(self, roots, progress_callback=None):
+        """Generator of DuplicateGroup"""
+        # Pass 1: only counters, memory stays proportional to the number of distinct sizes
+        size_counts = {}
+        def count(entry, st):
+            size_counts[st.st_size] = size_counts.get(st.st_size, 0) + 1
+        scanned = self._walk(roots, count)
+        if progress_callback:
+            progress_callback(f"Scanned {scanned} files, {sum(c for c in size_counts.values() if c > 1)} share a size with another file.")
+
+        found_groups, found_wasted = 0, 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for sizes in self._chunks(size_counts):
+                for group in self._confirm_chunk(roots, sizes, pool):
+                    found_groups += 1
+                    found_wasted += group.wasted
+                    yield group
+        self.logger.log(f"Duplicate scan: {found_groups} groups, {found_wasted / (1024*1024):.2f} MB wasted.")
+
+    def _chunks(self, size_counts):
+        """Sets of colliding sizes, largest first, each holding about CHUNK_FILES files"""
+        chunk, files = set(), 0
+        for size in sorted((s for s, c in size_counts.items() if c > 1), reverse=True):
+            chunk.add(size)
+            files += size_counts[size]
+            if files >= self.CHUNK_FILES:
+                yield chunk
+                chunk, files = set(), 0
+        if chunk:
+            yield chunk
+
+    def _confirm_chunk(self, roots, sizes, pool):
+        # Pass 2 for these sizes only: one path per physical file
+        buckets = {}
+        def collect(entry, st):
+            if st.st_size in sizes:
+                buckets.setdefault(st.st_size, {}).setdefault(self._file_id(entry, st), entry.path)
+        self._walk(roots, collect)
+        candidates = [(path, size) for size, files in buckets.items() if len(files) > 1 for path in files.values()]
+        del buckets
+
+        # Stage 2: head + tail (the whole file when it is small enough), all buckets at once
+        partial = self._group(candidates, pool.map(lambda c: self._edge_hash(*c), candidates))
+        confirmed = []
+        full_candidates = []
+        for (size, digest), same in partial.items():
+            if len(same) < 2:
+                continue
+            if size <= 2 * self.EDGE:
+                confirmed.append(DuplicateGroup(size, digest, same))
+            else:
+                full_candidates.extend((path, size) for path in same)
+
+        # Stage 3: full content, again across all buckets
+        full = self._group(full_candidates, pool.map(lambda c: self._full_hash(c[0]), full_candidates))
+        confirmed.extend(DuplicateGroup(size, digest, dupes) for (size, digest), dupes in full.items() if len(dupes) > 1)
+        confirmed.sort(key=lambda g: g.size, reverse=True)
+        return confirmed
+
+    def _group(self, candidates, digests):
+        """{(size, digest): [paths]}"""
+        groups = {}
+        for (path, size), digest in zip(candidates, digests):
+            if digest is not None:
+                groups.setdefault((size, digest), []).append(path)
+        return groups
+
+    def _file_id(self, entry, st):
+        """(device, file id) of a file; DirEntry.stat leaves them 0 on Windows, so ask os.stat there"""
+        if not st.st_ino:
+            try:
+                st = os.stat(entry.path)
+            except OSError:
+                return entry.path # Unknown: treat as its own file
+            if not st.st_ino:
+                return entry.path
+        return (st.st_dev, st.st_ino)
+
+    def _walk(self, roots, visit):
+        """Calls visit(entry, stat) for every regular file of at least min_size; returns their count"""
+        count = 0
+        stack = list(roots)
+        while stack:
+            path = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not is_junction(entry):
+                                    stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                st = entry.stat(follow_symlinks=False)
+                                if st.st_size >= self.min_size:
+                                    visit(entry, st)
+                                    count += 1
+                        except OSError:
+                            pass
+            except OSError:
+                pass # Access denied
+        return count
+
+    def _edge_hash(self, path, size):
+        try:
+            h = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                h.update(f.read(self.EDGE))
+                if size > self.EDGE:
+                    f.seek(max(self.EDGE, size - self.EDGE))
+                    h.update(f.read(self.EDGE))
+            return h.digest()
+        except OSError:
+            return None # Locked or vanished
+
+    def _full_hash(self, path):
+        try:
+            h = hashlib.blake2b(digest_size=32)
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                view = memoryview(m)
+                try:
+                    for i in range(0, len(m), self.CHUNK):
+                        h.update(view[i:i + self.CHUNK])
+                finally:
+                    view.release()
+            return h.digest()
+        except (OSError, ValueError):
+            return None # Locked, vanished or emptied meanwhile
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from modules.logger import Logger
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# name -> (type, help); exported in this order
+METRICS = {
+    "panacea_cpu_usage_percent": ("gauge", "Total CPU usage"),
+    "panacea_memory_total_bytes": ("gauge", "Installed physical memory"),
+    "panacea_memory_available_bytes": ("gauge", "Available physical memory"),
+    "panacea_memory_used_percent": ("gauge", "Physical memory in use"),
+    "panacea_disk_total_bytes": ("gauge", "Size of the volume"),
+    "panacea_disk_free_bytes": ("gauge", "Free space on the volume"),
+    "panacea_disk_used_percent": ("gauge", "Used space on the volume"),
+    "panacea_battery_percent": ("gauge", "Battery charge"),
+    "panacea_battery_plugged": ("gauge", "1 when running on AC power"),
+    "panacea_updates_pending": ("gauge", "Windows updates waiting to be installed"),
+    "panacea_sample_cost_seconds": ("gauge", "Average time spent collecting a metric"),
+}
+
+class MetricsExporter:
+    """
+    Optional OpenMetrics endpoint (GET /metrics) for fleet scraping.
+    The app pushes values as it samples them; every update re-encodes the whole page once,
+    so a scrape only writes a ready-made bytes object and never runs a query or subprocess.
+    The HTTP listener runs on its own daemon thread. Disabled unless exporter.json says otherwise.
+    """
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 9464
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.logger = Logger()
+        self.host = host
+        self.port = port
+        self._values = {} # (name, labels) -> value
+        self._lock = threading.Lock()
+        self._payload = b"# EOF\n"
+        self._server = None
+
+    @classmethod
+    def get_config_path(cls):
+        return os.path.join(os.path.dirname(Logger().get_log_path()), 'exporter.json')
+
+    @classmethod
+    def from_config(cls):
+        """Exporter configured in exporter.json ({"enabled": true, "host": ..., "port": ...}), or None"""
+        path = cls.get_config_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except Exception as e:
+            Logger().log(f"Failed to read {path}: {e}", "ERROR")
+            return None
+        if not config.get("enabled", False):
+            return None
+        return cls(config.get("host", cls.DEFAULT_HOST), int(config.get("port", cls.DEFAULT_PORT)))
+
+    # --- Snapshot ---
+    def update(self, values, labels=()):
+        """Sets {metric name: value} (with optional labels, as (key, value) pairs) and re-encodes the page"""
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    self._values.pop((name, labels), None)
+                else:
+                    self._values[(name, labels)] = float(value)
+            self._payload = self._encode()
+
+    def _encode(self):
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            samples = [(labels, v) for (n, labels), v in self._values.items() if n == name]
+            if not samples:
+                continue
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {help_text}")
+            for labels, value in sorted(samples):
+                label_text = ",".join(f'{k}="{self._escape(v)}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value!r}" if label_text else f"{name} {value!r}")
+        lines.append("# EOF")
+        return ("\n".join(lines) + "\n").encode()
+
+    def _escape(self, value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def payload(self):
+        return self._payload
+
+    # --- HTTP ---
+    def start(self):
+        if self._server is not None:
+            return True
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter._payload # Reference swap only, no lock needed
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Scrapes are too frequent for the app log
+
+        try:
+            self._server = HTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            self.logger.log(f"Metrics exporter could not listen on {self.host}:{self.port}: {e}", "ERROR")
+            return False
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.logger.log(f"Metrics exporter listening on http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
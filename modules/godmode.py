@@ -0,0 +1,193 @@
+from modules.jobs import CleanupJob, JobCancelled, JobControl
+from modules.output_filters import get_filter
+from modules.tool_parsers import PARSERS, PROGRESS, STAGE, OK, REPAIRED, CORRUPT, FAILED
+
+# (key, status title, log header) in execution order
+PHASES = [
+    ("restore", "Safety Backup", "SAFETY BACKUP INITIATED..."),
+    ("browser", "Browser Cleanup", "BROWSER CLEANUP..."),
+    ("temp", "System Junk Cleanup", "SYSTEM JUNK CLEANUP..."),
+    ("network", "Network Reset", "NETWORK RESET..."),
+    ("defrag", "Disk Defrag/Trim", "DISK OPTIMIZATION (C:)..."),
+    ("chkdsk", "Disk Health Scan", "DISK HEALTH CHECK (CHKDSK)..."),
+    ("dism", "DISM Health Check", "DISM IMAGE HEALTH..."),
+    ("sfc", "Integrity Scan (SFC)", "SFC INTEGRITY SCAN..."),
+]
+
+PHASE_KEYS = [key for key, _, _ in PHASES]
+
+# Log level of a tool verdict; anything else (repairable, unknown) is a warning
+VERDICT_LEVELS = {OK: "info", REPAIRED: "info", CORRUPT: "err", FAILED: "err"}
+
+# (wall-clock, idle) limits in seconds for the external tools; a hung tool is killed instead of
+# stalling the protocol. SFC/CHKDSK redraw a progress line, so a long silence means a hang.
+COMMAND_LIMITS = {
+    "network": (60, 60),
+    "chkdsk": (2 * 3600, 30 * 60),
+    "dism": (3600, 30 * 60),
+    "sfc": (2 * 3600, 30 * 60),
+}
+
+class ResurrectionProtocol:
+    """
+    The god mode sequence, independent of any UI.
+    :param log: log(message, level) with level in "head", "info", "warn", "err".
+    :param run_job: Optional run_job(job, index, total) used for the cleanup phases
+                    (the GUI passes one that drives its progress bar); defaults to job.run().
+    Managers are created on first use, so a caller running a few phases imports only what they need.
+    """
+    def __init__(self, log, run_job=None, cleanup_mgr=None, restore_mgr=None, cmd_runner=None, disk_opt=None):
+        self.log = log
+        self.run_job = run_job or (lambda job, index, total: job.run())
+        self._cleanup_mgr = cleanup_mgr
+        self._restore_mgr = restore_mgr
+        self._cmd_runner = cmd_runner
+        self._disk_opt = disk_opt
+        self._control = JobControl() # Kills a running command when cancelled
+        self._job = None
+        self._on_progress = None
+
+    def cancel(self):
+        """Stops the running cleanup job or command at once and the protocol before its next phase"""
+        self._control.cancel()
+        if self._job is not None:
+            self._job.cancel()
+
+    @property
+    def cancelled(self):
+        return self._control.cancelled
+
+    def run(self, phases=None, on_phase=None, on_progress=None):
+        """
+        Runs the selected phase keys (default: all, always in PHASES order).
+        on_phase(index, total, key, title) is called before each one, and
+        on_progress(index, total, key, fraction, stage) as the tool phases report progress.
+        Returns {key: result dict}; raises JobCancelled if cancelled.
+        """
+        selected = [p for p in PHASES if phases is None or p[0] in phases]
+        self._on_progress = on_progress
+        results = {}
+        for i, (key, title, header) in enumerate(selected):
+            if self._control.cancelled:
+                raise JobCancelled()
+            if on_phase: on_phase(i, len(selected), key, title)
+            self.log(f"\n[PHASE {i + 1}] {header}", "head")
+            results[key] = getattr(self, f"_phase_{key}")(i, len(selected))
+        return results
+
+    # --- Managers ---
+    @property
+    def cleanup_mgr(self):
+        if self._cleanup_mgr is None:
+            from modules.cleanup import CleanupManager
+            self._cleanup_mgr = CleanupManager()
+        return self._cleanup_mgr
+
+    @property
+    def restore_mgr(self):
+        if self._restore_mgr is None:
+            from modules.restore import RestoreManager
+            self._restore_mgr = RestoreManager()
+        return self._restore_mgr
+
+    @property
+    def cmd_runner(self):
+        if self._cmd_runner is None:
+            from modules.commands import CommandRunner
+            self._cmd_runner = CommandRunner()
+        return self._cmd_runner
+
+    @property
+    def disk_opt(self):
+        if self._disk_opt is None:
+            from modules.disk import DiskOptimizer
+            self._disk_opt = DiskOptimizer()
+        return self._disk_opt
+
+    # --- Phases ---
+    def _info(self, msg):
+        self.log(msg, "info")
+
+    def _run_cleanup(self, job, index, total):
+        self._job = job
+        try:
+            result = self.run_job(job, index, total)
+        finally:
+            self._job = None
+        if result is None:
+            raise JobCancelled()
+        return result
+
+    def _phase_restore(self, index, total):
+        # Verify/Enable System Restore first
+        self._info("Verifying System Restore state...")
+        self.restore_mgr.ensure_restore_enabled("C:\\")
+        success, msg = self.restore_mgr.create_restore_point("Panacea GodMode Auto-Restore")
+        if success: self._info(f"Restore Point: {msg}")
+        else: self.log(f"Restore Point Warning: {msg}", "warn")
+        return {"ok": bool(success), "message": msg}
+
+    def _phase_browser(self, index, total):
+        mgr = self.cleanup_mgr
+        files, size = self._run_cleanup(CleanupJob("Browser Cleanup",
+            count_fn=lambda c: mgr.analyze_browser_caches(control=c),
+            clean_fn=lambda c: mgr.clean_browser_caches(progress_callback=self._info, control=c)), index, total)
+        self._info(f"Browser Cache: Cleared {files} files ({size / (1024*1024):.2f} MB)")
+        return {"files": files, "bytes": size}
+
+    def _phase_temp(self, index, total):
+        mgr = self.cleanup_mgr
+        files, size = self._run_cleanup(CleanupJob("System Junk Cleanup",
+            count_fn=lambda c: mgr.analyze_temp_files(control=c),
+            clean_fn=lambda c: mgr.clean_temp_files(progress_callback=self._info, control=c)), index, total)
+        self._info(f"Temp Files: Deleted {files}, Freed {size / (1024*1024):.2f} MB")
+        success, msg = mgr.empty_recycle_bin()
+        self._info(f"Recycle Bin: {msg}")
+        return {"files": files, "bytes": size, "recycle_bin": msg}
+
+    def _parser(self, key, index, total):
+        """(ToolParser for the phase's tool, observer feeding it and reporting its progress)"""
+        parser = PARSERS[key]()
+        def observe(line):
+            events = parser.feed(line)
+            if self._on_progress and any(event.kind in (PROGRESS, STAGE) for event in events):
+                self._on_progress(index, total, key, parser.fraction, parser.stage)
+        return parser, observe
+
+    def _tool_result(self, parser, title, ok):
+        """Phase result with the tool's verdict, which is logged as well"""
+        summary = parser.summary(ok)
+        verdict = summary["verdict"]
+        detail = f" ({summary['verdict_line']})" if summary["verdict_line"] else ""
+        self.log(f"{title} verdict: {verdict.upper()}{detail}", VERDICT_LEVELS.get(verdict, "warn"))
+        return {"ok": ok, "verdict": verdict, "summary": summary}
+
+    def _stream(self, key, command, description, index, total):
+        timeout, idle_timeout = COMMAND_LIMITS[key]
+        parser, observe = self._parser(key, index, total)
+        ok = self.cmd_runner.run_command_stream(command, description, self._info, filter_func=get_filter(key),
+                                                timeout=timeout, idle_timeout=idle_timeout, control=self._control,
+                                                observer=observe)
+        return self._tool_result(parser, description, ok)
+
+    def _phase_network(self, index, total):
+        # Independent of each other, so both run at once
+        timeout, idle_timeout = COMMAND_LIMITS["network"]
+        dns, winsock = self.cmd_runner.run_many([("ipconfig /flushdns", "DNS Flush"), ("netsh winsock reset", "Winsock Reset")],
+                                                self._info, timeout=timeout, idle_timeout=idle_timeout, control=self._control)
+        return {"ok": bool(dns and winsock)}
+
+    def _phase_defrag(self, index, total):
+        parser, observe = self._parser("defrag", index, total)
+        ok = bool(self.disk_opt.analyze_optimize_drive("C:", progress_callback=self._info, control=self._control, observer=observe))
+        return self._tool_result(parser, "Defrag", ok)
+
+    def _phase_chkdsk(self, index, total):
+        # /scan runs online (no reboot), /perf speeds it up
+        return self._stream("chkdsk", "chkdsk C: /scan /perf", "CHKDSK", index, total)
+
+    def _phase_dism(self, index, total):
+        return self._stream("dism", "DISM /Online /Cleanup-Image /CheckHealth", "DISM Check", index, total)
+
+    def _phase_sfc(self, index, total):
+        return self._stream("sfc", "sfc /scannow", "SFC Scan", index, total)
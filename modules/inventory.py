@@ -0,0 +1,91 @@
+import json
+import os
+import platform
+import threading
+from modules.logger import Logger
+
+SNAPSHOT_VERSION = 1
+
+class HardwareInventory:
+    """
+    Static system facts (OS, CPU, RAM modules, system disk model) collected once and kept in a
+    versioned snapshot file next to the log. A later launch shows the snapshot immediately and
+    collects again in the background only when the machine rebooted or its fingerprint
+    (core count, installed RAM, OS build) changed.
+    """
+    FIELDS = ("os_info", "cpu_info", "ram_info", "disk_model")
+    BOOT_TOLERANCE = 120 # Seconds; boot time derived from uptime drifts a little between reads
+
+    def __init__(self, monitor, path=None):
+        self.logger = Logger()
+        self.monitor = monitor
+        self.path = path or os.path.join(os.path.dirname(self.logger.get_log_path()), 'hardware_inventory.json')
+        self._refreshing = threading.Lock()
+
+    def get(self, on_update=None):
+        """
+        Returns the saved snapshot dict (None on first run) without any slow query.
+        If it is missing or outdated a background refresh is started and on_update(snapshot)
+        is called from that thread when it completes.
+        """
+        snapshot = self.load()
+        if snapshot is None or not self.is_current(snapshot):
+            self.refresh_async(on_update)
+        return snapshot
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+        return snapshot
+
+    def fingerprint(self):
+        """Cheap facts that change when hardware or the OS build changes"""
+        total_ram = self.monitor.get_ram_usage()[0]
+        return f"{os.cpu_count()}|{total_ram}|{platform.version()}"
+
+    def is_current(self, snapshot):
+        boot_time = self.monitor.get_boot_time()
+        if not boot_time or abs(snapshot.get("boot_time", 0) - boot_time) > self.BOOT_TOLERANCE:
+            return False
+        return snapshot.get("fingerprint") == self.fingerprint()
+
+    def collect(self):
+        """Runs the slow queries (registry, wmic, PowerShell) and saves the snapshot"""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "boot_time": self.monitor.get_boot_time(),
+            "fingerprint": self.fingerprint(),
+            "os_info": self.monitor.get_os_info(),
+            "cpu_info": self.monitor.get_cpu_info(),
+            "ram_info": self.monitor.get_ram_info(),
+            "disk_model": self.monitor.get_disk_model(),
+        }
+        self.save(snapshot)
+        return snapshot
+
+    def save(self, snapshot):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp, self.path) # Never leave a half-written snapshot behind
+        except OSError as e:
+            self.logger.log(f"Failed to save hardware inventory: {e}", "ERROR")
+
+    def refresh_async(self, on_update=None):
+        def task():
+            if not self._refreshing.acquire(blocking=False):
+                return # A refresh is already running
+            try:
+                snapshot = self.collect()
+                self.logger.log("Hardware inventory refreshed.")
+            finally:
+                self._refreshing.release()
+            if on_update: on_update(snapshot)
+        threading.Thread(target=task, daemon=True).start()
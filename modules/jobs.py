@@ -0,0 +1,177 @@
+import threading
+import time
+from modules.logger import Logger
+
+class JobCancelled(Exception):
+    pass
+
+FINISHED = ("done", "cancelled", "failed") # Terminal CleanupJob states
+
+class JobControl:
+    """
+    Cooperative cancel/pause flags shared by a job and the engine it drives.
+    Deleter threads call should_stop() before every file and wait_if_paused() between batches,
+    scanners call checkpoint() before each folder, so a cancel is honoured within one
+    file operation and a pause within one batch.
+    """
+    POLL = 0.05 # Seconds between cancel checks while paused
+
+    def __init__(self):
+        self._cancel = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self.workers = [] # WorkerStats of the engine run in progress (live counters)
+
+    def cancel(self):
+        self._cancel.set()
+        self._resume.set() # Wake paused workers so they can exit
+
+    def pause(self):
+        if not self._cancel.is_set():
+            self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def should_stop(self):
+        return self._cancel.is_set()
+
+    def checkpoint(self):
+        """Blocks while paused; raises JobCancelled once cancelled"""
+        if not self.wait_if_paused():
+            raise JobCancelled()
+
+    def wait_if_paused(self):
+        """Blocks while paused. Returns False once cancelled (for threads that must not raise)."""
+        while not self._resume.wait(self.POLL):
+            pass
+        return not self._cancel.is_set()
+
+    def track(self, workers):
+        self.workers = workers
+
+    def done(self):
+        """(files, bytes) processed so far by the tracked workers"""
+        workers = self.workers
+        return sum(w.files for w in workers), sum(w.bytes for w in workers)
+
+class JobProgress:
+    def __init__(self, state, files_done, files_total, bytes_done, bytes_total, rate, eta):
+        self.state = state
+        self.files_done = files_done
+        self.files_total = files_total
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+        self.rate = rate # bytes/s
+        self.eta = eta # seconds, None while unknown
+
+    @property
+    def fraction(self):
+        """Progress 0..1, by bytes (by files for a run of empty files)"""
+        if self.bytes_total:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        if self.files_total:
+            return min(1.0, self.files_done / self.files_total)
+        return 1.0 if self.state == "done" else 0.0
+
+    def describe(self):
+        if self.state == "counting":
+            return "Counting files..."
+        text = (f"{self.files_done}/{self.files_total} files, "
+                f"{self.bytes_done / (1024*1024):.1f}/{self.bytes_total / (1024*1024):.1f} MB")
+        if self.state == "running" and self.rate:
+            text += f" @ {self.rate / (1024*1024):.1f} MB/s"
+            if self.eta is not None:
+                text += f", ETA {int(self.eta)}s"
+        elif self.state in ("paused", "cancelled", "failed"):
+            text += f" ({self.state})"
+        return text
+
+class CleanupJob:
+    """
+    A cancellable cleanup: a cheap pre-count (dry-run scan) followed by the deletion.
+    :param count_fn: count_fn(control) -> ScanIndex of what will be deleted.
+    :param clean_fn: clean_fn(control) -> (files, bytes); must delete through the engine with that control.
+    Use run() from a worker thread or start() to get one; poll progress() from the UI.
+    A job whose functions raise ends in the "failed" state with the exception in .error.
+    """
+    def __init__(self, name, count_fn, clean_fn):
+        self.logger = Logger()
+        self.name = name
+        self.count_fn = count_fn
+        self.clean_fn = clean_fn
+        self.control = JobControl()
+        self.state = "pending"
+        self.result = None
+        self.error = None
+        self.files_total = 0
+        self.bytes_total = 0
+        self._started = None
+
+    def start(self, on_done=None):
+        """Runs the job on a daemon thread; on_done(result) is always called, with None if it was cancelled or failed"""
+        def target():
+            result = None
+            try:
+                result = self.run()
+            except Exception:
+                pass # Logged by run(); the state says "failed"
+            finally:
+                if on_done: on_done(result)
+        threading.Thread(target=target, daemon=True).start()
+
+    def run(self):
+        """Runs the job in the calling thread. Returns (files, bytes), or None if cancelled; re-raises a failure."""
+        try:
+            self.state = "counting"
+            index = self.count_fn(self.control)
+            self.control.checkpoint()
+            self.files_total, self.bytes_total = index.file_count, index.total_bytes
+            self.state = "running"
+            self._started = time.monotonic()
+            self.result = self.clean_fn(self.control)
+            self.state = "cancelled" if self.control.cancelled else "done"
+        except JobCancelled:
+            self.state = "cancelled"
+        except Exception as e:
+            self.state = "failed"
+            self.error = e
+            self.logger.log(f"{self.name} failed: {e}", "ERROR")
+            raise
+        if self.state == "cancelled":
+            files, freed = self.control.done()
+            self.logger.log(f"{self.name} cancelled after {files} files ({freed / (1024*1024):.2f} MB).", "WARNING")
+            return None
+        return self.result
+
+    def cancel(self):
+        self.control.cancel()
+
+    def pause(self):
+        self.control.pause()
+        if self.state == "running":
+            self.state = "paused"
+
+    def resume(self):
+        self.control.resume()
+        if self.state == "paused":
+            self.state = "running"
+
+    def progress(self):
+        files, freed = self.control.done()
+        rate, eta = 0.0, None
+        if self._started is not None:
+            elapsed = time.monotonic() - self._started
+            if elapsed > 0:
+                rate = freed / elapsed
+            if rate > 0 and self.state == "running":
+                eta = max(0.0, (self.bytes_total - freed) / rate)
+        return JobProgress(self.state, files, self.files_total, freed, self.bytes_total, rate, eta)
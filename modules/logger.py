@@ -1,51 +1,139 @@
-import logging
+import atexit
 import os
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
 
 class Logger:
+    """
+    Process-wide, non-blocking logger.
+    log() only enqueues; a background writer thread drains the queue in batches,
+    writes them to log.txt (rotated by size) and to the console.
+    High-frequency events (e.g. one per deleted file) go through event(), which just bumps
+    a counter - the writer turns those into periodic summary lines.
+    """
     _instance = None
+    _lock = threading.Lock()
+
+    MAX_BYTES = 5 * 1024 * 1024 # Rotate log.txt at 5 MB
+    BACKUP_COUNT = 3 # log.txt.1 .. log.txt.3
+    FLUSH_INTERVAL = 0.25 # Max seconds a message waits in the queue
+    SUMMARY_INTERVAL = 2.0 # Seconds between event summary lines
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Logger, cls).__new__(cls)
-            cls._instance._initialize()
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(Logger, cls).__new__(cls)
+                cls._instance._initialize()
         return cls._instance
 
     def _initialize(self):
-        log_dir = os.path.join(os.environ['USERPROFILE'], 'Documents', 'SystemOptimizer')
+        log_dir = os.path.dirname(self.get_log_path())
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        
-        log_file = os.path.join(log_dir, 'log.txt')
-        
-        self.logger = logging.getLogger('PanaceaLogger')
-        self.logger.setLevel(logging.INFO)
-        
-        # File handler
-        fh = logging.FileHandler(log_file)
-        fh.setLevel(logging.INFO)
-        
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        
-        # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(formatter)
-        ch.setFormatter(formatter)
-        
-        self.logger.addHandler(fh)
-        self.logger.addHandler(ch)
+
+        self.log_file = self.get_log_path()
+        self._queue = queue.SimpleQueue()
+        self._events = {} # category -> [count, bytes] since the last summary
+        self._events_lock = threading.Lock()
+        self._last_summary = time.monotonic()
+        self.console = True # The CLI turns this off so stdout/stderr carry only its own output
+
+        self._writer = threading.Thread(target=self._writer_loop, name="PanaceaLogWriter", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
 
     def log(self, message, level="INFO"):
-        if level.upper() == "INFO":
-            self.logger.info(message)
-        elif level.upper() == "ERROR":
-            self.logger.error(message)
-        elif level.upper() == "WARNING":
-            self.logger.warning(message)
-        else:
-            self.logger.info(message)
+        level = level.upper()
+        if level not in ("INFO", "ERROR", "WARNING"):
+            level = "INFO"
+        self._queue.put((time.time(), level, message))
+
+    def event(self, category, count=1, size=0):
+        """Counts a high-frequency event; reported as one summary line per SUMMARY_INTERVAL"""
+        with self._events_lock:
+            entry = self._events.get(category)
+            if entry is None:
+                entry = self._events[category] = [0, 0]
+            entry[0] += count
+            entry[1] += size
+
+    def flush(self, timeout=2.0):
+        """Blocks until everything logged so far (and pending event summaries) is written"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
 
     def get_log_path(self):
-        return os.path.join(os.environ['USERPROFILE'], 'Documents', 'SystemOptimizer', 'log.txt')
+        home = os.environ.get('USERPROFILE') or os.path.expanduser('~')
+        return os.path.join(home, 'Documents', 'SystemOptimizer', 'log.txt')
+
+    # --- Writer Thread ---
+    def _writer_loop(self):
+        while True:
+            batch, waiters = [], []
+            try:
+                item = self._queue.get(timeout=self.FLUSH_INTERVAL)
+                # Drain whatever else is already queued into the same write
+                while True:
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(self._format(*item))
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            if waiters or time.monotonic() - self._last_summary >= self.SUMMARY_INTERVAL:
+                batch.extend(self._summarize())
+            if batch:
+                self._write("".join(batch))
+            for w in waiters:
+                w.set()
+
+    def _summarize(self):
+        now = time.monotonic()
+        elapsed = now - self._last_summary
+        self._last_summary = now
+        with self._events_lock:
+            events, self._events = self._events, {}
+        lines = []
+        for category, (count, size) in events.items():
+            msg = f"{category}: {count} in the last {elapsed:.1f}s"
+            if size:
+                msg += f" ({size / (1024*1024):.2f} MB)"
+            lines.append(self._format(time.time(), "INFO", msg))
+        return lines
+
+    def _format(self, ts, level, message):
+        stamp = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        return f"{stamp},{int(ts * 1000) % 1000:03d} - {level} - {message}\n"
+
+    def _write(self, text):
+        try:
+            self._rotate_if_needed()
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+        except OSError:
+            pass # Never let logging take the app down
+        # Console (absent in the windowed PyInstaller build)
+        if self.console and sys.stderr is not None:
+            try:
+                sys.stderr.write(text)
+                sys.stderr.flush()
+            except Exception:
+                pass
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.log_file) < self.MAX_BYTES:
+                return
+        except OSError:
+            return # No log yet
+        for i in range(self.BACKUP_COUNT - 1, 0, -1):
+            src = f"{self.log_file}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.log_file}.{i + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
@@ -0,0 +1,201 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from modules.logger import Logger
+
+MAGIC = b"PMS1"
+STORE_VERSION = 1
+HEADER = struct.Struct("<4sI252s") # magic, version, layout signature (padded)
+
+# (name, seconds per slot, slots kept)
+LEVELS = [
+    ("raw", 1, 24 * 3600),     # 1 s for a day
+    ("1m", 60, 30 * 24 * 60),  # 1 min averages for 30 days
+    ("1h", 3600, 365 * 24),    # 1 h averages for a year
+]
+
+DEFAULT_METRICS = ("cpu", "ram", "disk")
+
+NAN = float("nan")
+
+class MetricStore:
+    """
+    Fixed-size history of dashboard metrics in a memory-mapped file (a few MB, survives restarts).
+    Every metric has one float32 ring per resolution in LEVELS. A sample updates the running
+    average of the current slot of each ring, so the 1 min / 1 h levels are always up to date
+    without a separate downsampling pass. Slots that received no sample hold NaN.
+    Per ring the header keeps (current slot, running sum, running count) as float64.
+    A single process is expected to write the file.
+    """
+    def __init__(self, path=None, metrics=DEFAULT_METRICS, levels=LEVELS):
+        self.logger = Logger()
+        self.path = path or os.path.join(os.path.dirname(self.logger.get_log_path()), 'metrics.dat')
+        self.metrics = list(metrics)
+        self.levels = list(levels)
+        self._lock = threading.Lock()
+        self._nans = array('f', [NAN]) * max(cap for _, _, cap in self.levels)
+        self._open()
+
+    # --- File layout ---
+    def _signature(self):
+        return ";".join(self.metrics).encode() + b"|" + ";".join(f"{n},{s},{c}" for n, s, c in self.levels).encode()
+
+    def _open(self):
+        rings = len(self.metrics) * len(self.levels)
+        state_bytes = rings * 3 * 8
+        data_bytes = len(self.metrics) * sum(cap for _, _, cap in self.levels) * 4
+        size = HEADER.size + state_bytes + data_bytes
+        header = HEADER.pack(MAGIC, STORE_VERSION, self._signature())
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fresh = True
+        if os.path.exists(self.path) and os.path.getsize(self.path) == size:
+            with open(self.path, 'rb') as f:
+                fresh = f.read(HEADER.size) != header
+        if fresh:
+            # New file, or a different layout: start an empty history
+            with open(self.path, 'wb') as f:
+                f.truncate(size)
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        view = memoryview(self._mm)
+        self._state = view[HEADER.size:HEADER.size + state_bytes].cast('d')
+        data = view[HEADER.size + state_bytes:].cast('f')
+
+        # (metric, level index) -> (state offset, ring view, capacity)
+        self._rings = {}
+        offset, i = 0, 0
+        for metric in self.metrics:
+            for li, (_, _, cap) in enumerate(self.levels):
+                self._rings[(metric, li)] = (i * 3, data[offset:offset + cap], cap)
+                offset += cap
+                i += 1
+
+        if fresh:
+            self._mm[:HEADER.size] = header
+            for base, ring, cap in self._rings.values():
+                self._state[base] = -1 # No slot written yet
+                ring[:] = self._nans[:cap]
+            self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            if self._mm is None:
+                return
+            self._mm.flush()
+            # Views must be released before the map can be closed
+            for _, ring, _ in self._rings.values():
+                ring.release()
+            self._rings = {}
+            self._state.release()
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    # --- Writing ---
+    def add(self, metric, value, ts=None):
+        self.add_sample({metric: value}, ts)
+
+    def add_sample(self, values, ts=None):
+        """Records {metric: value} taken at ts (default: now). Unknown metrics are ignored."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            if self._mm is None:
+                return
+            for metric, value in values.items():
+                if metric not in self.metrics or value is None:
+                    continue
+                for li, (_, step, _) in enumerate(self.levels):
+                    self._put(self._rings[(metric, li)], int(ts // step), float(value))
+
+    def _put(self, ring_info, slot, value):
+        base, ring, cap = ring_info
+        state = self._state
+        current = int(state[base])
+        if slot < current:
+            return # Clock went backwards: never overwrite newer data
+        if slot != current:
+            if current >= 0 and slot > current + 1:
+                self._fill_gap(ring, cap, current + 1, slot)
+            state[base] = slot
+            state[base + 1] = 0.0
+            state[base + 2] = 0.0
+        state[base + 1] += value
+        state[base + 2] += 1
+        ring[slot % cap] = state[base + 1] / state[base + 2]
+
+    def _fill_gap(self, ring, cap, start, end):
+        """NaN-fills slots [start, end) (at most one lap of the ring)"""
+        count = min(end - start, cap)
+        pos = start % cap
+        first = min(count, cap - pos)
+        ring[pos:pos + first] = self._nans[:first]
+        if count > first:
+            ring[:count - first] = self._nans[:count - first]
+
+    # --- Queries ---
+    def level_for(self, seconds):
+        """Finest level that still covers a range of this length"""
+        for li, (_, step, cap) in enumerate(self.levels):
+            if step * cap >= seconds:
+                return li
+        return len(self.levels) - 1
+
+    def query(self, metric, start, end=None, level=None):
+        """
+        Returns [(timestamp, value)] of metric between start and end (unix seconds), oldest first.
+        :param level: Index or name in LEVELS; by default the finest level covering the range.
+        Slots without samples are skipped.
+        """
+        end = time.time() if end is None else end
+        li = self._level_index(level, end - start)
+        step = self.levels[li][1]
+        with self._lock:
+            if self._mm is None:
+                return []
+            base, ring, cap = self._rings[(metric, li)]
+            current = int(self._state[base])
+            if current < 0:
+                return []
+            first = max(int(start // step), current - cap + 1)
+            last = min(int(end // step), current)
+            if last < first:
+                return []
+            values = self._read(ring, cap, first, last)
+        return [((first + i) * step, v) for i, v in enumerate(values) if not math.isnan(v)]
+
+    def latest(self, metric, count, level=0):
+        """The last count recorded values (gaps skipped), oldest first"""
+        li = self._level_index(level, 0)
+        with self._lock:
+            if self._mm is None:
+                return []
+            base, ring, cap = self._rings[(metric, li)]
+            current = int(self._state[base])
+            if current < 0:
+                return []
+            # Read backwards in growing windows until enough real samples are found
+            window = count
+            while True:
+                first = max(current - window + 1, current - cap + 1, 0)
+                values = [v for v in self._read(ring, cap, first, current) if not math.isnan(v)]
+                if len(values) >= count or first <= max(current - cap + 1, 0):
+                    return values[-count:]
+                window *= 4
+
+    def _read(self, ring, cap, first, last):
+        a, b = first % cap, last % cap
+        if a <= b and last - first < cap:
+            return ring[a:b + 1].tolist()
+        return ring[a:].tolist() + ring[:b + 1].tolist()
+
+    def _level_index(self, level, seconds):
+        if level is None:
+            return self.level_for(seconds)
+        if isinstance(level, str):
+            return [name for name, _, _ in self.levels].index(level)
+        return level
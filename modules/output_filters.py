@@ -0,0 +1,131 @@
+import json
+import locale
+import os
+import re
+import threading
+from modules.logger import Logger
+from modules.utils import resource_path
+
+BUILTIN_PACKS = "assets/filters" # <locale>.json: {"version": 1, "tools": {tool: [phrases]}, "verdicts": {tool: {verdict: [phrases]}}}
+TOOLS = ("sfc", "dism", "chkdsk", "defrag")
+BASE_LOCALE = "en" # Always loaded: the tools mix English fragments into every language
+
+def system_locale():
+    """Two-letter language of the Windows UI (of the process locale elsewhere), e.g. "it" """
+    name = ""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            name = locale.windows_locale.get(ctypes.windll.kernel32.GetUserDefaultUILanguage(), "")
+        else:
+            name = locale.getlocale()[0] or os.environ.get("LANG", "")
+    except Exception:
+        pass
+    return name.split("_")[0].split(".")[0].lower() or BASE_LOCALE
+
+def compile_phrases(phrases):
+    """
+    One regex matching any of the phrases anywhere in a line. The phrases are merged into a
+    character trie first, so shared prefixes are tested once per position instead of once
+    per phrase (the regex is the automaton; re runs it in C).
+    """
+    trie = {}
+    for phrase in phrases:
+        if not phrase:
+            continue
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = True # End of a phrase
+    if not trie:
+        return None
+    return re.compile(_trie_pattern(trie))
+
+def _trie_pattern(node):
+    if "" in node:
+        return "" # A shorter phrase already matches: longer continuations add nothing
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items())]
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+def make_filter(phrases):
+    """
+    Line filter for streamed tool output: keep(line) is False for blank lines and lines that
+    contain any of the phrases. A plain closure, since it runs once per output line.
+    """
+    pattern = compile_phrases(phrases)
+    if pattern is None:
+        return lambda line: bool(line) and not line.isspace()
+    search = pattern.search
+    def keep(line):
+        return search(line) is None and bool(line) and not line.isspace()
+    return keep
+
+class FilterPacks:
+    """
+    Noise phrases per tool, from the built-in locale packs (assets/filters/<locale>.json)
+    plus the user's own (filters/<locale>.json next to the log), for the base locale and the
+    system language. Adding a phrase or a language only means adding JSON.
+    The packs also carry the result phrases the tool parsers turn into verdicts.
+    """
+    def __init__(self, locales=None):
+        self.logger = Logger()
+        if locales is None:
+            locales = [BASE_LOCALE, system_locale()]
+        self.locales = list(dict.fromkeys(locales)) # Ordered, without duplicates
+        self.phrases = {tool: [] for tool in TOOLS}
+        self.verdicts = {tool: {} for tool in TOOLS} # tool -> {verdict: [phrases]}
+        self._filters = {}
+        self._verdict_patterns = {}
+        self._lock = threading.Lock()
+        for loc in self.locales:
+            for path in (resource_path(os.path.join(BUILTIN_PACKS, f"{loc}.json")), os.path.join(self.get_user_packs_dir(), f"{loc}.json")):
+                self._read(path)
+
+    def get_user_packs_dir(self):
+        return os.path.join(os.path.dirname(self.logger.get_log_path()), 'filters')
+
+    def _read(self, path):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for tool, phrases in data.get("tools", {}).items():
+                self.phrases.setdefault(tool, []).extend(phrases)
+            for tool, verdicts in data.get("verdicts", {}).items():
+                for verdict, phrases in verdicts.items():
+                    self.verdicts.setdefault(tool, {}).setdefault(verdict, []).extend(phrases)
+        except Exception as e:
+            self.logger.log(f"Failed to load output filters from {path}: {e}", "ERROR")
+
+    def get(self, tool):
+        """Compiled keep(line) filter for tool (built once)"""
+        with self._lock:
+            f = self._filters.get(tool)
+            if f is None:
+                f = self._filters[tool] = make_filter(sorted(set(self.phrases.get(tool, []))))
+            return f
+
+    def verdict_patterns(self, tool):
+        """[(verdict, compiled phrases)] for tool's result lines (built once)"""
+        with self._lock:
+            patterns = self._verdict_patterns.get(tool)
+            if patterns is None:
+                patterns = [(verdict, compile_phrases(phrases)) for verdict, phrases in self.verdicts.get(tool, {}).items()]
+                patterns = self._verdict_patterns[tool] = [(v, p) for v, p in patterns if p is not None]
+            return patterns
+
+_default = None
+_default_lock = threading.Lock()
+
+def get_packs():
+    """Packs of the current system language (loaded on first use)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = FilterPacks()
+        return _default
+
+def get_filter(tool):
+    """Noise filter for tool from the packs of the current system language"""
+    return get_packs().get(tool)
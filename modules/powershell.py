@@ -0,0 +1,245 @@
+import atexit
+import base64
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from modules.commands import CREATE_NO_WINDOW, OK, FAILED, TIMEOUT, ERROR
+from modules.logger import Logger
+
+FRAME = "@@PSPOOL " # Prefix of protocol lines; anything else on stdout (warnings, Write-Host) is ignored
+
+# Runs in every worker: one request per stdin line {"id", "script"}, one FRAME line per response
+# {"id", "ok", "output" | "error"} with the script's output converted to JSON.
+HOST_SCRIPT = r"""
+$ErrorActionPreference = 'Stop'
+$ProgressPreference = 'SilentlyContinue'
+$utf8 = New-Object System.Text.UTF8Encoding $false
+$reader = New-Object System.IO.StreamReader([Console]::OpenStandardInput(), $utf8)
+$writer = New-Object System.IO.StreamWriter([Console]::OpenStandardOutput(), $utf8)
+$writer.AutoFlush = $true
+while ($null -ne ($line = $reader.ReadLine())) {
+    if (-not $line.Trim()) { continue }
+    $request = $line | ConvertFrom-Json
+    $response = @{ id = $request.id }
+    try {
+        $output = @(& ([ScriptBlock]::Create($request.script)))
+        $response.ok = $true
+        if ($output.Count -eq 0) { $response.output = $null }
+        elseif ($output.Count -eq 1) { $response.output = $output[0] }
+        else { $response.output = $output }
+        $json = ConvertTo-Json -InputObject $response -Depth 4 -Compress
+    } catch {
+        $json = ConvertTo-Json -InputObject @{ id = $request.id; ok = $false; error = $_.Exception.Message } -Compress
+    }
+    $writer.WriteLine('@@PSPOOL ' + $json)
+}
+"""
+
+def default_command():
+    """Command line of a worker: Windows PowerShell, or PowerShell 7 (pwsh) elsewhere"""
+    exe = "powershell.exe" if os.name == 'nt' else "pwsh"
+    encoded = base64.b64encode(HOST_SCRIPT.encode('utf-16-le')).decode('ascii')
+    return [exe, "-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-EncodedCommand", encoded]
+
+class PowerShellResult:
+    """Outcome of one script: status OK with the parsed JSON output, else an error message"""
+    def __init__(self, status, output=None, error=None, elapsed=0.0):
+        self.status = status # OK, FAILED (the script threw), TIMEOUT or ERROR (no usable worker)
+        self.output = output
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def __repr__(self):
+        return f"PowerShellResult({self.status}, {self.elapsed:.2f}s, error={self.error!r})"
+
+class PowerShellWorker:
+    """One persistent PowerShell process running HOST_SCRIPT; handles one request at a time"""
+    def __init__(self, command):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        creationflags=CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        self.responses = queue.Queue()
+        self._next_id = 0
+        threading.Thread(target=self._read, name=f"PowerShellWorker-{self.process.pid}", daemon=True).start()
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def _read(self):
+        """Reader thread: queues every response frame, then None at EOF"""
+        try:
+            for raw in self.process.stdout:
+                line = raw.decode('utf-8', errors='replace').strip()
+                if line.startswith(FRAME):
+                    try:
+                        self.responses.put(json.loads(line[len(FRAME):]))
+                    except ValueError:
+                        pass
+        except (OSError, ValueError):
+            pass
+        self.responses.put(None)
+
+    def send(self, script):
+        """Writes one request and returns its id; raises OSError if the worker is gone"""
+        self._next_id += 1
+        request = json.dumps({"id": self._next_id, "script": script}) + "\n"
+        self.process.stdin.write(request.encode('utf-8'))
+        self.process.stdin.flush()
+        return self._next_id
+
+    def receive(self, request_id, timeout):
+        """The response frame for request_id; raises queue.Empty on timeout, returns None if the worker exited"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            frame = self.responses.get(timeout=wait)
+            if frame is None or frame.get("id") == request_id:
+                return frame # Older ids are answers to requests that timed out
+
+    def close(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.process.stdin.close() # The host loop ends at EOF
+                self.process.wait(2)
+        except Exception:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+
+class PowerShellPool:
+    """
+    A few long-lived PowerShell processes taking script blocks over stdin/stdout, so a call
+    costs a round trip instead of a powershell.exe start (300-1000 ms).
+    Workers start on first use, up to `size` run scripts at once (further callers wait for a
+    free one). A worker that dies or misses a timeout is killed and replaced on the next call.
+    One pool is shared by the whole process (see shared()).
+    :param command: Worker command line (default: default_command()); tests and benchmarks
+                    can pass the stand-in worker from scripts/powershell_standin.py.
+    """
+    SIZE = 2
+    TIMEOUT = 60 # Seconds for a script when the caller does not say
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+                atexit.register(cls._shared.close)
+            return cls._shared
+
+    def __init__(self, size=None, command=None):
+        self.logger = Logger()
+        self.size = size or self.SIZE
+        self.command = command or default_command()
+        self._idle = []
+        self._count = 0 # Workers started and not retired
+        self._cond = threading.Condition()
+        self.restarts = 0
+
+    def run(self, script, timeout=None):
+        """Runs script (PowerShell source) on a free worker and returns a PowerShellResult"""
+        start = time.monotonic()
+        timeout = timeout or self.TIMEOUT
+
+        def result(status, output=None, error=None):
+            return PowerShellResult(status, output, error, time.monotonic() - start)
+
+        try:
+            worker = self._acquire()
+        except OSError as e:
+            self.logger.log(f"Could not start PowerShell: {e}", "ERROR")
+            return result(ERROR, error=str(e))
+        try:
+            try:
+                request_id = worker.send(script)
+            except OSError:
+                # Died while idle, so the script never ran: safe to retry once on a fresh worker
+                self._retire(worker)
+                worker = None
+                worker = self._acquire()
+                request_id = worker.send(script)
+            try:
+                frame = worker.receive(request_id, timeout)
+            except queue.Empty:
+                self.logger.log(f"PowerShell script timed out after {timeout}s; restarting its worker.", "WARNING")
+                self._retire(worker, kill=True)
+                worker = None
+                return result(TIMEOUT, error=f"Timed out after {timeout}s")
+            if frame is None:
+                self.logger.log("PowerShell worker exited during a script; restarting it.", "WARNING")
+                self._retire(worker)
+                worker = None
+                return result(ERROR, error="PowerShell worker exited")
+            if frame.get("ok"):
+                return result(OK, frame.get("output"))
+            return result(FAILED, error=frame.get("error") or "Unknown error")
+        except OSError as e:
+            if worker is not None:
+                self._retire(worker, kill=True)
+                worker = None
+            return result(ERROR, error=str(e))
+        finally:
+            if worker is not None:
+                self._release(worker)
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._count -= 1 # Died while idle
+                    self.restarts += 1
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._cond.wait()
+        try:
+            return PowerShellWorker(self.command) # Started outside the lock
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker):
+        with self._cond:
+            self._idle.append(worker)
+            self._cond.notify()
+
+    def _retire(self, worker, kill=False):
+        worker.close(kill)
+        with self._cond:
+            self._count -= 1
+            self.restarts += 1
+            self._cond.notify()
+
+    def close(self):
+        """Stops the idle workers (busy ones end when their stdin closes with the app)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for worker in idle:
+            worker.close()
+
+def run_script(script, timeout=None):
+    """Runs script on the shared pool; returns a PowerShellResult"""
+    return PowerShellPool.shared().run(script, timeout)
+
+def quote(value):
+    """value as a single-quoted PowerShell string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,121 @@
+import abc
+import ctypes
+import os
+import threading
+import time
+
+class CpuTimesProvider(abc.ABC):
+    """
+    Source of cumulative CPU times. read() returns (idle, total) counters since boot,
+    in any unit; usage is computed from the difference of two readings.
+    """
+    name = "base"
+
+    @classmethod
+    def available(cls):
+        return False
+
+    @abc.abstractmethod
+    def read(self):
+        """(idle, total) cumulative counters"""
+
+class WindowsCpuTimes(CpuTimesProvider):
+    """GetSystemTimes: kernel time already includes idle time (100 ns units)"""
+    name = "GetSystemTimes"
+
+    @classmethod
+    def available(cls):
+        return os.name == 'nt'
+
+    def __init__(self):
+        from ctypes import wintypes
+        self._get_system_times = ctypes.windll.kernel32.GetSystemTimes
+        self._idle = wintypes.FILETIME()
+        self._kernel = wintypes.FILETIME()
+        self._user = wintypes.FILETIME()
+        self._refs = (ctypes.byref(self._idle), ctypes.byref(self._kernel), ctypes.byref(self._user))
+
+    def read(self):
+        if not self._get_system_times(*self._refs):
+            raise OSError("GetSystemTimes failed")
+        idle = (self._idle.dwHighDateTime << 32) | self._idle.dwLowDateTime
+        kernel = (self._kernel.dwHighDateTime << 32) | self._kernel.dwLowDateTime
+        user = (self._user.dwHighDateTime << 32) | self._user.dwLowDateTime
+        return idle, kernel + user
+
+class ProcStatCpuTimes(CpuTimesProvider):
+    """Aggregate "cpu" line of /proc/stat (clock ticks)"""
+    name = "/proc/stat"
+    PATH = "/proc/stat"
+
+    @classmethod
+    def available(cls):
+        return os.path.exists(cls.PATH)
+
+    def read(self):
+        with open(self.PATH, 'rb') as f:
+            line = f.readline()
+        # cpu user nice system idle iowait irq softirq steal [guest guest_nice] - guest time is already in user
+        fields = [int(v) for v in line.split()[1:9]]
+        return fields[3] + fields[4], sum(fields)
+
+CPU_PROVIDERS = [WindowsCpuTimes, ProcStatCpuTimes]
+
+def default_cpu_provider():
+    """First provider that works on this platform, or None"""
+    for cls in CPU_PROVIDERS:
+        if cls.available():
+            try:
+                provider = cls()
+                provider.read()
+                return provider
+            except Exception:
+                continue
+    return None
+
+class CpuSampler:
+    """
+    Long-lived CPU usage sampler: keeps the previous counter reading and turns the delta
+    into a percentage, so a sample is one system call instead of a process launch.
+    The value is the average load since the previous sample; calls closer together than
+    min_interval return the last value (several readers do not shrink each other's window),
+    unless the caller asks for a fresh reading because it paces its own samples.
+    """
+    def __init__(self, provider=None, min_interval=0.25):
+        self.provider = provider or default_cpu_provider()
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last = None # (monotonic, idle, total)
+        self._value = 0.0
+        if self.provider is not None:
+            self._prime()
+
+    def _prime(self):
+        try:
+            idle, total = self.provider.read()
+            self._last = (time.monotonic(), idle, total)
+        except Exception:
+            self._last = None
+
+    def percent(self, fresh=False):
+        """Returns float cpu percent (0.0 when no provider is available); fresh=True skips min_interval"""
+        if self.provider is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            if self._last is None:
+                self._prime()
+                return self._value
+            if not fresh and now - self._last[0] < self.min_interval:
+                return self._value
+            try:
+                idle, total = self.provider.read()
+            except Exception:
+                return self._value
+            _, last_idle, last_total = self._last
+            d_total = total - last_total
+            if d_total > 0:
+                busy = d_total - (idle - last_idle)
+                self._value = max(0.0, min(100.0, busy * 100.0 / d_total))
+            self._last = (now, idle, total)
+            return self._value
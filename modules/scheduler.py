@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+from modules.logger import Logger
+
+class TaskStats:
+    """Sampling cost of one scheduled task"""
+    def __init__(self):
+        self.runs = 0
+        self.skipped = 0 # Periods dropped because the previous call was still running
+        self.errors = 0
+        self.last_cost = 0.0 # seconds
+        self.max_cost = 0.0
+        self.total_cost = 0.0
+
+    @property
+    def avg_cost(self):
+        return self.total_cost / self.runs if self.runs else 0.0
+
+class ScheduledTask:
+    def __init__(self, name, fn, interval, on_result=None, background=False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.on_result = on_result
+        self.background = background # Keeps its interval while the UI is hidden
+        self.due = 0.0
+        self.running = False
+        self.stats = TaskStats()
+
+class MetricScheduler:
+    """
+    One persistent scheduler thread keeps every registered getter on its own interval and hands
+    due calls to a few persistent worker threads, so a slow getter never delays the others.
+    The workers are daemon threads: a getter that hangs forever cannot hold up the app's exit.
+    A call that is still running when its next period comes is not queued: that period is
+    counted as skipped. While the UI is hidden (other tab, minimized) intervals are stretched
+    by HIDDEN_BACKOFF, except for background tasks.
+    """
+    HIDDEN_BACKOFF = 10
+    MAX_WORKERS = 4
+
+    def __init__(self):
+        self.logger = Logger()
+        self.tasks = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self._visible = True
+        self._thread = None
+        self._queue = queue.SimpleQueue() # Due tasks for the workers; None stops one
+        self._workers = []
+
+    def add(self, name, fn, interval, on_result=None, background=False):
+        """fn() runs on one of the worker threads; on_result(value) is called on that same thread."""
+        with self._lock:
+            self.tasks.append(ScheduledTask(name, fn, interval, on_result, background))
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._workers = [threading.Thread(target=self._work, name=f"metric-{i}", daemon=True) for i in range(self.MAX_WORKERS)]
+            for worker in self._workers:
+                worker.start()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop = True
+        self._wake.set()
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def set_visible(self, visible):
+        """Called by the UI when the dashboard is shown/hidden or the window is (un)minimized"""
+        if visible != self._visible:
+            self._visible = visible
+            if visible:
+                # Refresh everything right away instead of waiting out the stretched intervals
+                with self._lock:
+                    for task in self.tasks:
+                        task.due = 0.0
+            self._wake.set()
+
+    def stats(self):
+        """{task name: TaskStats}"""
+        with self._lock:
+            return {task.name: task.stats for task in self.tasks}
+
+    def describe_stats(self):
+        return ", ".join(f"{name}: {s.avg_cost * 1000:.2f} ms avg / {s.max_cost * 1000:.1f} ms max ({s.runs} runs, {s.skipped} skipped)"
+                         for name, s in self.stats().items())
+
+    def _interval(self, task):
+        if self._visible or task.background:
+            return task.interval
+        return task.interval * self.HIDDEN_BACKOFF
+
+    def _loop(self):
+        while not self._stop:
+            now = time.monotonic()
+            with self._lock:
+                task = min(self.tasks, key=lambda t: t.due, default=None)
+            if task is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            if task.due > now:
+                self._wake.wait(task.due - now)
+                self._wake.clear()
+                continue # Re-pick: a task may have been added or visibility changed
+            self._dispatch(task, now)
+
+    def _dispatch(self, task, now):
+        # Next slot on the task's own grid; periods already missed are dropped, not queued
+        interval = self._interval(task)
+        base = task.due if task.due > now - interval else now # First run, or back from a long backoff
+        due = base + interval
+        if due <= now:
+            due += (int((now - due) // interval) + 1) * interval
+        task.due = due
+
+        if task.running:
+            task.stats.skipped += 1 # Previous call overran its period
+            return
+        task.running = True
+        self._queue.put(task)
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None or self._stop:
+                return
+            self._run(task)
+
+    def _run(self, task):
+        stats = task.stats
+        start = time.monotonic()
+        try:
+            result = task.fn()
+        except Exception as e:
+            stats.errors += 1
+            result = None
+            if stats.errors == 1:
+                self.logger.log(f"Metric '{task.name}' failed: {e}", "WARNING")
+        finally:
+            cost = time.monotonic() - start
+            stats.runs += 1
+            stats.last_cost = cost
+            stats.total_cost += cost
+            stats.max_cost = max(stats.max_cost, cost)
+            task.running = False
+
+        if result is not None and task.on_result:
+            try:
+                task.on_result(result)
+            except Exception:
+                pass
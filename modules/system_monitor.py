@@ -1,4 +1,5 @@
 import ctypes
+import heapq
 import os
 import platform
 import shutil
@@ -6,9 +7,15 @@ import subprocess
 import threading
 import time
 
+from modules.sampler import CpuSampler
+from modules.volumes import VolumeSampler
+
 class SystemMonitor:
     def __init__(self):
-        pass
+        # Kept for the whole session: each reading is a delta against the previous one
+        self.cpu_sampler = CpuSampler()
+        self.process_monitor = None # Created on first use
+        self.volume_sampler = None
 
     def get_ram_usage(self):
         """Returns (total_gb, available_gb, percent_used)"""
@@ -79,30 +86,29 @@ class SystemMonitor:
         except:
             return 0, 0, 0
 
+    def get_volume_usage(self):
+        """Returns [VolumeUsage] for every mounted volume (slow/unreachable ones keep their last values)"""
+        if self.volume_sampler is None:
+            self.volume_sampler = VolumeSampler()
+        return self.volume_sampler.sample()
+
     def get_disk_model(self):
         """Returns disk model string e.g. 'SSD Samsung MZVLB1T0...'"""
         try:
-            import subprocess
-            # 1. Get FriendlyName (Model) reliably
-            cmd_model = ['powershell', '-Command', "Get-Partition -DriveLetter C | Get-Disk | Select-Object -ExpandProperty FriendlyName"]
-            try:
-                model_name = subprocess.check_output(cmd_model, creationflags=subprocess.CREATE_NO_WINDOW).decode().strip()
-            except:
+            from modules.powershell import run_script
+            # One pooled PowerShell call for both FriendlyName (Model) and MediaType (SSD or HDD)
+            result = run_script("$d = Get-Partition -DriveLetter C | Get-Disk; "
+                                "[pscustomobject]@{ Name = [string]$d.FriendlyName; Media = [string]$d.MediaType }", timeout=20)
+            if not result.ok or not isinstance(result.output, dict):
                 return "Unknown Model"
 
+            model_name = (result.output.get("Name") or "").strip()
+            media_type = (result.output.get("Media") or "").strip()
             if not model_name: return "Unknown Model"
 
-            # 2. Try to get MediaType separately (Non-critical)
-            try:
-                cmd_type = ['powershell', '-Command', "Get-Partition -DriveLetter C | Get-Disk | Select-Object -ExpandProperty MediaType"]
-                media_type = subprocess.check_output(cmd_type, creationflags=subprocess.CREATE_NO_WINDOW).decode().strip() # SSD or HDD
-                
-                # If media type is known and not in name, prepend it
-                if media_type in ["SSD", "HDD"] and media_type not in model_name:
-                    return f"{media_type} {model_name}"
-            except:
-                pass # If media type fails, just return model name
-
+            # If media type is known and not in name, prepend it
+            if media_type in ["SSD", "HDD"] and media_type not in model_name:
+                return f"{media_type} {model_name}"
             return model_name
         except:
             return "Unknown Model"
@@ -135,6 +141,19 @@ class SystemMonitor:
         except:
             return "Windows"
 
+    def get_boot_time(self):
+        """Returns the boot time as a unix timestamp (0 if unknown)"""
+        try:
+            if os.name == 'nt':
+                return round(time.time() - ctypes.windll.kernel32.GetTickCount64() / 1000)
+            with open('/proc/stat', 'r') as f:
+                for line in f:
+                    if line.startswith('btime'):
+                        return int(line.split()[1])
+        except:
+            pass
+        return 0
+
     def get_system_uptime(self):
         """Returns string 'D days, H hours, M mins'"""
         try:
@@ -149,34 +168,19 @@ class SystemMonitor:
         except:
             return "Unknown"
 
-    def get_cpu_usage(self):
-        """Returns int cpu percent. Tries typeperf (fast) then wmic (reliable)."""
-        # Try typeperf first (English locale usually)
-        try:
-            cmd = ['typeperf', r'\Processor(_Total)\% Processor Time', '-sc', '1']
-            output = subprocess.check_output(cmd, creationflags=subprocess.CREATE_NO_WINDOW).decode()
-            lines = output.strip().split('\n')
-            if len(lines) > 1:
-                val = lines[-1].split(',')[-1].replace('"', '')
-                return float(val)
-        except:
-            pass
-            
-        # Fallback to wmic (Locale independent usually)
-        # wmic cpu get loadpercentage
-        try:
-            cmd = ['wmic', 'cpu', 'get', 'loadpercentage']
-            output = subprocess.check_output(cmd, creationflags=subprocess.CREATE_NO_WINDOW).decode()
-            # Output:
-            # LoadPercentage
-            # 12
-            lines = [l.strip() for l in output.split('\n') if l.strip()]
-            if len(lines) > 1 and lines[1].isdigit():
-                return float(lines[1])
-        except:
-            pass
-            
-        return 0.0
+    def get_cpu_usage(self, fresh=False):
+        """
+        Returns float cpu percent, averaged since the previous call (GetSystemTimes / /proc/stat deltas).
+        fresh=True always takes a new reading, for callers that pace their own samples.
+        """
+        return self.cpu_sampler.percent(fresh)
+
+    def get_top_processes(self, n=5):
+        """Returns (top_by_cpu, top_by_memory): lists of ProcessInfo, CPU% since the previous call"""
+        if self.process_monitor is None:
+            self.process_monitor = ProcessMonitor(top_n=n)
+        self.process_monitor.top_n = n
+        return self.process_monitor.sample()
 
     def get_battery_status(self):
         """Returns (percent, is_plugged_str)"""
@@ -211,20 +215,19 @@ $optional = 0
 foreach ($update in $result.Updates) {
     if ($update.AutoSelectOnWebSites) { $mandatory++ } else { $optional++ }
 }
-Write-Output "$mandatory,$optional"
+[pscustomobject]@{ mandatory = $mandatory; optional = $optional }
 """
-            cmd = ['powershell', '-Command', ps_script]
-            output = subprocess.check_output(cmd, creationflags=subprocess.CREATE_NO_WINDOW, timeout=45).decode().strip()
-            
-            lines = output.splitlines()
-            if not lines: return 0, 0, "Unknown"
-            
-            parts = lines[-1].split(',')
-            if len(parts) == 2:
-                mandatory = int(parts[0])
-                optional = int(parts[1])
-            else:
+            from modules.commands import TIMEOUT
+            from modules.powershell import run_script
+            result = run_script(ps_script, timeout=45)
+            if result.status == TIMEOUT:
+                return -1, -1, "Check Timed Out"
+            if not result.ok:
+                return -1, -1, "Check Failed"
+            if not isinstance(result.output, dict):
                 return -1, -1, "Parse Error"
+            mandatory = int(result.output.get("mandatory", 0))
+            optional = int(result.output.get("optional", 0))
             
             if mandatory == 0 and optional == 0:
                 return 0, 0, "System Up to Date"
@@ -235,7 +238,164 @@ Write-Output "$mandatory,$optional"
             else:
                 return 0, optional, f"{optional} Optional Updates"
                 
-        except subprocess.TimeoutExpired:
-             return -1, -1, "Check Timed Out"
         except Exception as e:
             return -1, -1, "Check Failed"
+
+class ProcessInfo:
+    def __init__(self, pid, name, cpu_percent, working_set):
+        self.pid = pid
+        self.name = name
+        self.cpu_percent = cpu_percent # Share of the whole machine (all cores = 100%)
+        self.working_set = working_set # bytes
+
+    def __repr__(self):
+        return f"ProcessInfo({self.pid}, {self.name!r}, {self.cpu_percent:.1f}%, {self.working_set // (1024*1024)} MB)"
+
+class _ProcEntry:
+    __slots__ = ("pid", "name", "cpu_time", "cpu_percent", "working_set", "generation")
+
+    def __init__(self, pid, name, cpu_time, working_set, generation):
+        self.pid = pid
+        self.name = name
+        self.cpu_time = cpu_time
+        self.cpu_percent = 0.0 # Unknown until the second sample
+        self.working_set = working_set
+        self.generation = generation
+
+class SYSTEM_PROCESS_INFORMATION(ctypes.Structure):
+    # ULONG/LONG spelled as fixed 32-bit types so the layout does not depend on the platform's long
+    _fields_ = [
+        ("NextEntryOffset", ctypes.c_uint32),
+        ("NumberOfThreads", ctypes.c_uint32),
+        ("WorkingSetPrivateSize", ctypes.c_longlong),
+        ("HardFaultCount", ctypes.c_uint32),
+        ("NumberOfThreadsHighWatermark", ctypes.c_uint32),
+        ("CycleTime", ctypes.c_ulonglong),
+        ("CreateTime", ctypes.c_longlong),
+        ("UserTime", ctypes.c_longlong), # 100 ns units
+        ("KernelTime", ctypes.c_longlong),
+        ("ImageNameLength", ctypes.c_ushort), # UNICODE_STRING, in bytes
+        ("ImageNameMaximumLength", ctypes.c_ushort),
+        ("ImageNameBuffer", ctypes.c_void_p),
+        ("BasePriority", ctypes.c_int32),
+        ("UniqueProcessId", ctypes.c_void_p),
+        ("InheritedFromUniqueProcessId", ctypes.c_void_p),
+        ("HandleCount", ctypes.c_uint32),
+        ("SessionId", ctypes.c_uint32),
+        ("UniqueProcessKey", ctypes.c_void_p),
+        ("PeakVirtualSize", ctypes.c_size_t),
+        ("VirtualSize", ctypes.c_size_t),
+        ("PageFaultCount", ctypes.c_uint32),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+    ]
+
+class WindowsProcessSource:
+    """
+    Every process in one NtQuerySystemInformation(SystemProcessInformation) call, into a buffer
+    that is kept and only grown. Image names are decoded only for processes not seen before.
+    """
+    SystemProcessInformation = 5
+    STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+
+    def __init__(self):
+        self._query = ctypes.windll.ntdll.NtQuerySystemInformation
+        self._buffer = ctypes.create_string_buffer(512 * 1024)
+        self._needed = ctypes.c_ulong(0)
+
+    def read(self):
+        """Yields (key, pid, cpu_seconds, working_set, raw_name)"""
+        while True:
+            status = self._query(self.SystemProcessInformation, self._buffer, len(self._buffer), ctypes.byref(self._needed))
+            if (status & 0xFFFFFFFF) != self.STATUS_INFO_LENGTH_MISMATCH:
+                break
+            self._buffer = ctypes.create_string_buffer(self._needed.value + 64 * 1024) # Room for new processes
+        if status != 0:
+            raise OSError(f"NtQuerySystemInformation failed: 0x{status & 0xFFFFFFFF:08X}")
+
+        buf = self._buffer
+        offset = 0
+        while True:
+            info = SYSTEM_PROCESS_INFORMATION.from_buffer(buf, offset)
+            pid = info.UniqueProcessId or 0
+            if pid:  # pid 0 is the idle process
+                yield ((pid, info.CreateTime), pid, (info.UserTime + info.KernelTime) / 1e7,
+                       info.WorkingSetSize, (info.ImageNameBuffer, info.ImageNameLength))
+            if not info.NextEntryOffset:
+                break
+            offset += info.NextEntryOffset
+
+    def name(self, raw):
+        address, length = raw
+        return ctypes.wstring_at(address, length // 2) if address else "System"
+
+class ProcProcessSource:
+    """/proc/<pid>/stat of every process (Linux)"""
+    def __init__(self):
+        self._ticks = os.sysconf('SC_CLK_TCK')
+        self._page = os.sysconf('SC_PAGE_SIZE')
+
+    def read(self):
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue # Exited meanwhile
+            # "pid (comm) state ppid ..." - comm may contain spaces and parentheses
+            close = data.rfind(b')')
+            fields = data[close + 2:].split()
+            # utime, stime, starttime and rss are fields 14, 15, 22 and 24
+            yield ((int(entry), fields[19]), int(entry), (int(fields[11]) + int(fields[12])) / self._ticks,
+                   int(fields[21]) * self._page, data[data.find(b'(') + 1:close])
+
+    def name(self, raw):
+        return raw.decode(errors='replace')
+
+class ProcessMonitor:
+    """
+    Per-process CPU% and working set, from the delta between two samples.
+    The pid table is kept between samples (keyed by pid + start time, so a reused pid is a new
+    process): only new processes are named and allocated, exited ones are dropped.
+    Top-N by CPU and by memory come from heap selection, not a full sort.
+    """
+    def __init__(self, top_n=10, source=None):
+        self.top_n = top_n
+        self.source = source or (WindowsProcessSource() if os.name == 'nt' else ProcProcessSource())
+        self.cpu_count = os.cpu_count() or 1
+        self._table = {}
+        self._generation = 0
+        self._last = None
+
+    def sample(self):
+        """Returns (top_by_cpu, top_by_memory) as lists of ProcessInfo"""
+        now = time.monotonic()
+        elapsed = (now - self._last) if self._last is not None else 0.0
+        self._last = now
+        self._generation += 1
+        generation = self._generation
+        table = self._table
+        # CPU seconds per wall second, as a share of all cores
+        scale = 100.0 / (elapsed * self.cpu_count) if elapsed > 0 else 0.0
+
+        for key, pid, cpu_time, working_set, raw_name in self.source.read():
+            entry = table.get(key)
+            if entry is None:
+                table[key] = _ProcEntry(pid, self.source.name(raw_name), cpu_time, working_set, generation)
+                continue
+            entry.cpu_percent = max(0.0, (cpu_time - entry.cpu_time) * scale)
+            entry.cpu_time = cpu_time
+            entry.working_set = working_set
+            entry.generation = generation
+
+        gone = [key for key, entry in table.items() if entry.generation != generation]
+        for key in gone:
+            del table[key]
+
+        entries = table.values()
+        top_cpu = heapq.nlargest(self.top_n, entries, key=lambda e: e.cpu_percent)
+        top_mem = heapq.nlargest(self.top_n, entries, key=lambda e: e.working_set)
+        return ([ProcessInfo(e.pid, e.name, e.cpu_percent, e.working_set) for e in top_cpu],
+                [ProcessInfo(e.pid, e.name, e.cpu_percent, e.working_set) for e in top_mem])
@@ -0,0 +1,142 @@
+import re
+from modules.output_filters import get_packs
+
+# ToolEvent kinds
+PROGRESS = "progress"
+STAGE = "stage"
+VERDICT = "verdict"
+
+# Verdicts (the phrases behind them live in the locale packs, see modules.output_filters)
+OK = "ok" # Nothing wrong found / operation completed
+REPAIRED = "repaired"
+REPAIRABLE = "repairable" # Damage found, a repair run can fix it (DISM)
+CORRUPT = "corrupt" # Damage found that could not be repaired
+FAILED = "failed" # The tool could not do its job
+UNKNOWN = "unknown"
+
+PERCENT = re.compile(r'(\d{1,3}(?:[.,]\d+)?)\s*%')
+
+class ToolEvent:
+    """One typed observation from a tool's output: progress (0-100), a new stage or the final verdict"""
+    __slots__ = ("kind", "percent", "stage", "verdict", "text")
+
+    def __init__(self, kind, percent=None, stage=None, verdict=None, text=None):
+        self.kind = kind
+        self.percent = percent
+        self.stage = stage
+        self.verdict = verdict
+        self.text = text # The line it came from
+
+    def __repr__(self):
+        return f"ToolEvent({self.kind!r}, percent={self.percent}, stage={self.stage!r}, verdict={self.verdict!r})"
+
+class ToolParser:
+    """
+    Streaming parser for one run of a tool: feed() every output line (progress redraws
+    included, before any noise filtering) and get back the ToolEvents it contains.
+    Percent never goes backwards within a stage; when RESET_PER_STAGE it restarts at each stage.
+    The verdict is taken from the last result line seen, matched against the locale packs.
+    """
+    TOOL = None
+    RESET_PER_STAGE = False
+
+    def __init__(self, packs=None):
+        self.verdict_patterns = (packs or get_packs()).verdict_patterns(self.TOOL)
+        self.percent = 0.0
+        self.stage = None
+        self.stages = []
+        self.verdict = None
+        self.verdict_line = None
+        self.lines = 0
+
+    def feed(self, line):
+        """Returns [ToolEvent] for one line"""
+        self.lines += 1
+        events = []
+        stage, percent = self.parse(line)
+        if stage is not None and stage != self.stage:
+            self.stage = stage
+            self.stages.append(stage)
+            if self.RESET_PER_STAGE:
+                self.percent = 0.0
+            events.append(ToolEvent(STAGE, self.percent, stage, text=line))
+        if percent is not None:
+            percent = max(0.0, min(100.0, percent))
+            if percent > self.percent:
+                self.percent = percent
+                events.append(ToolEvent(PROGRESS, percent, self.stage, text=line))
+        for verdict, pattern in self.verdict_patterns:
+            if pattern.search(line):
+                self.verdict = verdict
+                self.verdict_line = line
+                events.append(ToolEvent(VERDICT, self.percent, self.stage, verdict, line))
+                break
+        return events
+
+    def parse(self, line):
+        """(stage or None, percent or None) of a line; by default the last percentage on it"""
+        return None, self._percent(line)
+
+    def _percent(self, line, last=True):
+        found = PERCENT.findall(line)
+        if not found:
+            return None
+        return float(found[-1 if last else 0].replace(",", "."))
+
+    @property
+    def fraction(self):
+        return self.percent / 100
+
+    def summary(self, returncode_ok=True):
+        """Machine-readable outcome of the run"""
+        verdict = self.verdict or (UNKNOWN if returncode_ok else FAILED)
+        return {"tool": self.TOOL, "verdict": verdict, "verdict_line": self.verdict_line,
+                "percent": round(self.percent, 1), "stages": list(self.stages), "lines": self.lines}
+
+class SfcParser(ToolParser):
+    """sfc /scannow: "Verification 45% complete." redraws, one result line"""
+    TOOL = "sfc"
+
+class DismParser(ToolParser):
+    """DISM: "[=====   20.0%   ]" redraws; ScanHealth/RestoreHealth may run the bar twice"""
+    TOOL = "dism"
+
+    def parse(self, line):
+        percent = self._percent(line)
+        if percent is not None and "[" in line:
+            return None, percent
+        return None, None
+
+class ChkdskParser(ToolParser):
+    """
+    chkdsk /scan: "Stage 1: Examining basic file system structure ..." headers and
+    "Progress: x of y done; Stage: 52%; Total: 20%; ETA: ..." lines - the last percentage
+    is the overall one.
+    """
+    TOOL = "chkdsk"
+    STAGE_HEADER = re.compile(r'^\s*\S+\s+(\d)\s*:\s*(.+?)\s*\.*$') # "Stage 1: ..." / "Fase 1: ..."
+
+    def parse(self, line):
+        header = self.STAGE_HEADER.match(line)
+        if header and "%" not in line:
+            return f"{header.group(1)}: {header.group(2)}", None
+        return None, self._percent(line)
+
+class DefragParser(ToolParser):
+    """defrag /O: one "<Pass>: 45% complete..." bar per pass (Analysis, Retrim, Defragmentation...)"""
+    TOOL = "defrag"
+    RESET_PER_STAGE = True
+    PASS = re.compile(r'^\s*([^:\d%]+?)\s*:\s*(\d{1,3}(?:[.,]\d+)?)\s*%')
+
+    def parse(self, line):
+        m = self.PASS.match(line)
+        if m:
+            return m.group(1), float(m.group(2).replace(",", "."))
+        return None, None
+
+PARSERS = {
+    "sfc": SfcParser,
+    "dism": DismParser,
+    "chkdsk": ChkdskParser,
+    "defrag": DefragParser,
+}
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+from modules.logger import Logger
+
+CACHE_VERSION = 1
+
+class UpdateStatusService:
+    """
+    Windows Update status (mandatory, optional, status text) served from a cache file next to the
+    log. The PowerShell/COM search behind it takes up to 45 s, so callers get the saved result at
+    once and a background search runs only when that result is older than MAX_AGE.
+    Failed searches keep the last good result and push the next attempt out exponentially
+    (BACKOFF_BASE doubled per consecutive failure, up to BACKOFF_MAX). Only one search runs at a
+    time; callers that ask while one is running are notified when it completes.
+    """
+    MAX_AGE = 6 * 3600
+    BACKOFF_BASE = 60
+    BACKOFF_MAX = 6 * 3600
+
+    def __init__(self, monitor, path=None):
+        self.logger = Logger()
+        self.monitor = monitor
+        self.path = path or os.path.join(os.path.dirname(self.logger.get_log_path()), 'update_status.json')
+        self._lock = threading.Lock()
+        self._running = False
+        self._waiters = [] # on_update callbacks of the search in flight
+        self._cache = self._load()
+
+    # --- Cache ---
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CACHE_VERSION:
+            return {}
+        return cache
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.logger.log(f"Failed to save update status: {e}", "ERROR")
+
+    def cached(self):
+        """Last successful (mandatory, optional, status), or None if no search ever succeeded"""
+        cache = self._cache
+        if "checked" not in cache:
+            return None
+        return cache["mandatory"], cache["optional"], cache["status"]
+
+    def age(self):
+        """Seconds since the last successful search (None if there was none)"""
+        checked = self._cache.get("checked")
+        return None if checked is None else max(0.0, time.time() - checked)
+
+    def is_stale(self):
+        age = self.age()
+        return age is None or age > self.MAX_AGE
+
+    def backoff_remaining(self):
+        """Seconds until a failed search may be retried (0 when not backing off)"""
+        return max(0.0, self._cache.get("next_attempt", 0) - time.time())
+
+    def invalidate(self):
+        """Marks the cached result stale (e.g. after the user started installing updates)"""
+        with self._lock:
+            self._cache.pop("checked", None)
+            self._cache["next_attempt"] = 0
+            self._save()
+
+    # --- Refresh ---
+    def get(self, on_update=None):
+        """
+        Returns the cached (mandatory, optional, status) or None, without searching.
+        If the cache is stale (and not backing off) a background search starts and
+        on_update(mandatory, optional, status) is called from its thread when it completes.
+        """
+        if self.is_stale() and not self.backoff_remaining():
+            self.refresh_async(on_update)
+        return self.cached()
+
+    def refresh_async(self, on_update=None, force=False):
+        """
+        Starts a background search (force skips the backoff). If one is already running,
+        on_update is attached to it instead of starting another. Returns False if backing off.
+        """
+        with self._lock:
+            if on_update: self._waiters.append(on_update)
+            if self._running:
+                return True
+            if not force and self.backoff_remaining():
+                self._waiters.clear()
+                return False
+            self._running = True
+        threading.Thread(target=self._search, daemon=True).start()
+        return True
+
+    def _search(self):
+        start = time.monotonic()
+        try:
+            mandatory, optional, status = self.monitor.get_windows_update_status()
+        except Exception as e:
+            mandatory, optional, status = -1, -1, f"Check Failed ({e})"
+        elapsed = time.monotonic() - start
+
+        with self._lock:
+            cache = self._cache
+            cache["version"] = CACHE_VERSION
+            if mandatory >= 0:
+                cache.update({"checked": time.time(), "mandatory": mandatory, "optional": optional,
+                              "status": status, "failures": 0, "next_attempt": 0})
+                self.logger.log(f"Update search: {status} ({elapsed:.1f}s)")
+            else:
+                failures = cache.get("failures", 0) + 1
+                delay = min(self.BACKOFF_BASE * 2 ** (failures - 1), self.BACKOFF_MAX)
+                cache.update({"failures": failures, "next_attempt": time.time() + delay, "last_error": status})
+                self.logger.log(f"Update search failed: {status} ({elapsed:.1f}s), retrying in {delay}s", "WARNING")
+            self._save()
+            waiters, self._waiters = self._waiters, []
+            self._running = False
+
+        # A failure still reports the last good result when there is one
+        result = self.cached() or (mandatory, optional, status)
+        for callback in waiters:
+            try:
+                callback(*result)
+            except Exception:
+                pass
@@ -18,3 +18,21 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
 
     return os.path.join(base_path, relative_path)
+
+FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+IO_REPARSE_TAG_MOUNT_POINT = 0xA0000003 # Junctions (and volume mount points)
+
+def is_junction(entry, st=None):
+    """
+    True for an NTFS junction. Before Python 3.12 DirEntry.is_dir(follow_symlinks=False) is
+    True for them, so every walker must check this before entering a folder.
+    :param st: entry.stat(follow_symlinks=False) when the caller already has it.
+    """
+    if hasattr(entry, "is_junction"): # Python 3.12+
+        return entry.is_junction()
+    if st is None:
+        st = entry.stat(follow_symlinks=False)
+    if not getattr(st, "st_file_attributes", 0) & FILE_ATTRIBUTE_REPARSE_POINT:
+        return False
+    # Other reparse points (e.g. OneDrive placeholders) are real folders
+    return getattr(st, "st_reparse_tag", IO_REPARSE_TAG_MOUNT_POINT) == IO_REPARSE_TAG_MOUNT_POINT
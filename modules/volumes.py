@@ -0,0 +1,220 @@
+import ctypes
+import os
+import re
+import shutil
+import string
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from modules.logger import Logger
+from modules.metric_store import MetricStore
+
+# GetDriveTypeW
+DRIVE_KINDS = {2: "removable", 3: "fixed", 4: "network", 6: "ramdisk"} # CD-ROM (5) and unknown types are not sampled
+
+# Pseudo/virtual file systems that are never worth reporting on Linux
+IGNORED_FSTYPES = {"proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "cgroup", "cgroup2", "overlay", "squashfs", "mqueue",
+                   "debugfs", "tracefs", "securityfs", "pstore", "bpf", "autofs", "hugetlbfs", "configfs", "fusectl",
+                   "binfmt_misc", "nsfs", "ramfs", "rpc_pipefs", "efivarfs"}
+
+# Disk usage moves slowly: minute averages for a week, hourly for a year
+VOLUME_LEVELS = [("1m", 60, 7 * 24 * 60), ("1h", 3600, 365 * 24)]
+
+class VolumeUsage:
+    """Usage of one volume from the last sampling pass"""
+    def __init__(self, root, kind, total=0, free=0, status="ok", sampled=0.0):
+        self.root = root # "C:\\" on Windows, mount point elsewhere
+        self.kind = kind
+        self.total = total # bytes
+        self.free = free
+        self.status = status # "ok", "timeout" (last known values) or "error"
+        self.sampled = sampled # time.time() of the values
+
+    @property
+    def name(self):
+        return self.root.rstrip("\\") if os.name == 'nt' else self.root
+
+    @property
+    def percent(self):
+        return round((self.total - self.free) * 100 / self.total, 1) if self.total else 0.0
+
+    def __repr__(self):
+        return f"VolumeUsage({self.name!r}, {self.kind}, {self.percent}%, {self.status})"
+
+class VolumeSampler:
+    """
+    Usage of every mounted volume in one batched pass.
+    The drive list is cached: on Windows GetLogicalDrives() is checked every pass (a single call)
+    and drive types are only queried again when the mask changes or DISCOVERY_INTERVAL passed.
+    Each volume is queried on its own daemon thread and the pass waits at most `timeout`
+    seconds: a slow or dead volume (network share, ejected USB stick) keeps its last values with
+    status "timeout" and is not queried again until its stuck call returns. Daemon threads are
+    never joined, so a call that hangs forever cannot hold up the app's exit either.
+    """
+    DISCOVERY_INTERVAL = 60
+
+    def __init__(self, timeout=1.0):
+        self.logger = Logger()
+        self.timeout = timeout
+        self._volumes = [] # [(root, kind)]
+        self._mask = None
+        self._discovered = 0.0
+        self._last = {} # root -> VolumeUsage
+        self._pending = {} # root -> future of a call that overran its timeout
+        self._lock = threading.Lock()
+
+    # --- Discovery ---
+    def volumes(self):
+        """[(root, kind)] of the mounted volumes, from cache when nothing changed"""
+        now = time.monotonic()
+        mask = self._drive_mask()
+        if mask != self._mask or now - self._discovered > self.DISCOVERY_INTERVAL:
+            self._volumes = self._discover_windows(mask) if os.name == 'nt' else self._discover_mounts()
+            self._mask = mask
+            self._discovered = now
+        return self._volumes
+
+    def _drive_mask(self):
+        if os.name != 'nt':
+            return None
+        try:
+            return ctypes.windll.kernel32.GetLogicalDrives()
+        except Exception:
+            return None
+
+    def _discover_windows(self, mask):
+        volumes = []
+        if not mask:
+            return volumes
+        get_type = ctypes.windll.kernel32.GetDriveTypeW
+        for i, letter in enumerate(string.ascii_uppercase):
+            if mask & (1 << i):
+                root = f"{letter}:\\"
+                kind = DRIVE_KINDS.get(get_type(root))
+                if kind:
+                    volumes.append((root, kind))
+        return volumes
+
+    def _discover_mounts(self):
+        volumes, seen = [], set()
+        try:
+            with open('/proc/mounts', 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) < 3 or parts[2] in IGNORED_FSTYPES:
+                        continue
+                    mount = parts[1].replace("\\040", " ")
+                    if mount in seen:
+                        continue
+                    seen.add(mount)
+                    kind = "network" if parts[2] in ("nfs", "nfs4", "cifs", "smbfs", "sshfs", "fuse.sshfs") else "fixed"
+                    volumes.append((mount, kind))
+        except OSError:
+            volumes.append(("/", "fixed"))
+        return volumes
+
+    # --- Sampling ---
+    def sample(self):
+        """Returns [VolumeUsage] for every volume, in drive order"""
+        with self._lock:
+            volumes = self.volumes()
+            futures = {}
+            for root, kind in volumes:
+                stuck = self._pending.get(root)
+                if stuck is not None:
+                    if not stuck.done():
+                        continue # Still hanging since an earlier pass
+                    del self._pending[root]
+                futures[root] = self._probe(root)
+
+            deadline = time.monotonic() + self.timeout
+            results = []
+            for root, kind in volumes:
+                usage = self._collect(root, kind, futures.get(root), deadline)
+                self._last[root] = usage
+                results.append(usage)
+            # Forget volumes that went away
+            roots = {root for root, _ in volumes}
+            for root in list(self._last):
+                if root not in roots:
+                    del self._last[root]
+            return results
+
+    def _probe(self, root):
+        """Future of shutil.disk_usage(root), run on a daemon thread of its own"""
+        future = Future()
+        def run():
+            try:
+                future.set_result(shutil.disk_usage(root))
+            except BaseException as e:
+                future.set_exception(e)
+        threading.Thread(target=run, name=f"volume {root}", daemon=True).start()
+        return future
+
+    def _collect(self, root, kind, future, deadline):
+        last = self._last.get(root)
+        if future is not None:
+            try:
+                total, used, free = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                return VolumeUsage(root, kind, total, free, "ok", time.time())
+            except FutureTimeout: # Checked first: it is an OSError subclass on Python 3.11+
+                # Leave the call running, skip the volume until it returns
+                self._pending[root] = future
+                if root not in self._last or last.status == "ok":
+                    self.logger.log(f"Volume {root} did not answer within {self.timeout}s, skipping it until it does.", "WARNING")
+            except Exception:
+                return VolumeUsage(root, kind, status="error", sampled=time.time()) # Not ready / no media
+        if last is not None and last.total:
+            return VolumeUsage(root, kind, last.total, last.free, "timeout", last.sampled)
+        return VolumeUsage(root, kind, status="timeout")
+
+class VolumeHistory:
+    """
+    Per-volume used-% history for trend display: one small MetricStore file per volume under
+    volumes/ next to the log, opened on first use, so volumes coming and going never reset
+    each other's history.
+    """
+    def __init__(self, folder=None, levels=VOLUME_LEVELS):
+        self.logger = Logger()
+        self.folder = folder or os.path.join(os.path.dirname(self.logger.get_log_path()), 'volumes')
+        self.levels = levels
+        self._stores = {}
+        self._lock = threading.Lock()
+
+    def _key(self, root):
+        key = re.sub(r'[^A-Za-z0-9]+', '_', root).strip('_')
+        return key or "root"
+
+    def store(self, root):
+        with self._lock:
+            store = self._stores.get(root)
+            if store is None:
+                path = os.path.join(self.folder, f"{self._key(root)}.dat")
+                store = self._stores[root] = MetricStore(path, metrics=("used",), levels=self.levels)
+            return store
+
+    def add(self, usages, ts=None):
+        """Records the used % of every VolumeUsage that was sampled successfully"""
+        for usage in usages:
+            if usage.status == "ok" and usage.total:
+                try:
+                    self.store(usage.root).add("used", usage.percent, ts)
+                except OSError as e:
+                    self.logger.log(f"Volume history for {usage.root} unavailable: {e}", "WARNING")
+
+    def query(self, root, start, end=None):
+        """[(timestamp, used %)] of a volume, oldest first"""
+        return self.store(root).query("used", start, end)
+
+    def trend(self, root, seconds=86400):
+        """Change of used % over the last `seconds` (None without enough history)"""
+        points = self.query(root, time.time() - seconds)
+        if len(points) < 2:
+            return None
+        return round(points[-1][1] - points[0][1], 1)
+
+    def close(self):
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores = {}
@@ -1,14 +1,27 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import customtkinter as ctk
 import threading
+import collections
+import shutil
+import tempfile
 import webbrowser
 from datetime import datetime
 from modules.cleanup import CleanupManager
+from modules.duplicates import DuplicateFinder
+from modules.jobs import CleanupJob, JobCancelled, FINISHED
+from modules.godmode import ResurrectionProtocol, PHASES
 from modules.disk import DiskOptimizer
+from modules.disk_analyzer import DiskAnalyzer
 from modules.commands import CommandRunner
 from modules.logger import Logger
 from modules.system_monitor import SystemMonitor
+from modules.inventory import HardwareInventory
+from modules.updates import UpdateStatusService
+from modules.volumes import VolumeHistory
+from modules.metric_store import MetricStore
+from modules.scheduler import MetricScheduler
+from modules.exporter import MetricsExporter
 from modules.restore import RestoreManager
 from modules.performance import PerformanceManager
 from modules.utils import resource_path
@@ -19,6 +32,9 @@ ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("dark-blue")
 
 class PanaceaApp(ctk.CTk):
+    GRAPH_HISTORY = 15 * 60 # Seconds of CPU/RAM history on the dashboard graphs
+    UPDATE_CHECK_INTERVAL = 10 * 60 # Seconds between update cache checks (cheap: a search only when stale)
+
     def __init__(self, root_is_deprecated_use_self):
         super().__init__()
         
@@ -44,6 +60,21 @@ class PanaceaApp(ctk.CTk):
         self.disk_opt = DiskOptimizer()
         self.cmd_runner = CommandRunner()
         self.monitor = SystemMonitor()
+        self.inventory = HardwareInventory(self.monitor)
+        self.updates = UpdateStatusService(self.monitor) # Cached Windows Update search
+        try:
+            self.metrics = MetricStore() # CPU/RAM/disk history, kept across restarts
+        except Exception as e:
+            self.logger.log(f"Metric history unavailable: {e}", "WARNING")
+            self.metrics = None
+        self.volume_history = VolumeHistory() # Per-volume used % for the trend column
+        self.scheduler = MetricScheduler() # All dashboard polling, one interval per metric
+        self.exporter = MetricsExporter.from_config() # Optional OpenMetrics endpoint (exporter.json)
+        if self.exporter and not self.exporter.start():
+            self.exporter = None
+        self.battery_status = (0, "Unknown")
+        self._dashboard_shown = False
+        self._minimized = False
         self.restore_mgr = RestoreManager()
         self.perf_mgr = PerformanceManager()
 
@@ -77,10 +108,15 @@ class PanaceaApp(ctk.CTk):
         self._setup_resurrect_frame()
         
         self.select_frame("Dashboard")
-        self.update_dashboard()
-        
-        # Start update check
-        threading.Thread(target=self._check_updates_thread, daemon=True).start()
+        # Static facts come from the saved snapshot; a background refresh updates the labels if needed
+        snapshot = self.inventory.get(on_update=lambda snap: self.after(0, lambda: self._apply_inventory(snap)))
+        if snapshot:
+            self._apply_inventory(snapshot)
+        if self.metrics:
+            # Graphs resume where the last session left off
+            for graph, metric in ((self.cpu_graph, "cpu"), (self.ram_graph, "ram")):
+                graph.set_values(self.metrics.latest(metric, graph.points.maxlen))
+        self._start_dashboard_polling()
 
     def _load_icons(self):
         self.icons = {}
@@ -197,6 +233,9 @@ class PanaceaApp(ctk.CTk):
         self.frame_turbo.grid_forget()
         self.frame_resurrect.grid_forget()
         
+        self._dashboard_shown = name == "Dashboard"
+        self._update_poll_visibility()
+
         if name == "Dashboard": self.frame_dashboard.grid(row=0, column=1, sticky="nsew")
         elif name == "Cleaning": self.frame_cleaning.grid(row=0, column=1, sticky="nsew")
         elif name == "Disk": self.frame_disk.grid(row=0, column=1, sticky="nsew")
@@ -248,12 +287,16 @@ class PanaceaApp(ctk.CTk):
         self.dash_disk_info.pack()
         self.dash_disk_perc = ctk.CTkLabel(self.card_disk, text="0%", font=ctk.CTkFont(size=20, weight="bold"))
         self.dash_disk_perc.pack(pady=5)
+        # Other volumes (data drives, USB, network shares): one line each with the 24 h trend
+        self.dash_volumes = ctk.CTkLabel(self.card_disk, text="", font=ctk.CTkFont(family="Consolas", size=11), justify="left")
+        self.dash_volumes.pack(pady=(0, 10))
 
         # --- Card 3: CPU Graph ---
         self.card_cpu = ctk.CTkFrame(self.frame_dashboard)
         self.card_cpu.grid(row=2, column=0, padx=(20, 10), pady=10, sticky="nsew")
         ctk.CTkLabel(self.card_cpu, text="CPU Usage History", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(15, 5))
-        self.cpu_graph = LiveGraph(self.card_cpu, width=300, height=80, line_color="#4CAF50")
+        self.cpu_graph = LiveGraph(self.card_cpu, width=300, height=80, line_color="#4CAF50",
+                                   capacity=self.GRAPH_HISTORY) # CPU is sampled every second
         self.cpu_graph.pack(pady=5)
         self.dash_cpu_name = ctk.CTkLabel(self.card_cpu, text="CPU: ...", text_color="gray", wraplength=280)
         self.dash_cpu_name.pack()
@@ -264,7 +307,8 @@ class PanaceaApp(ctk.CTk):
         self.card_ram = ctk.CTkFrame(self.frame_dashboard)
         self.card_ram.grid(row=2, column=1, padx=(10, 20), pady=10, sticky="nsew")
         ctk.CTkLabel(self.card_ram, text="Memory (RAM) History", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(15, 5))
-        self.ram_graph = LiveGraph(self.card_ram, width=300, height=80, line_color="#FFC107")
+        self.ram_graph = LiveGraph(self.card_ram, width=300, height=80, line_color="#FFC107",
+                                   capacity=self.GRAPH_HISTORY // 2) # RAM every 2 seconds
         self.ram_graph.pack(pady=5)
         self.dash_ram_val = ctk.CTkLabel(self.card_ram, text="0GB / 0GB")
         self.dash_ram_val.pack()
@@ -273,6 +317,17 @@ class PanaceaApp(ctk.CTk):
         self.dash_ram_perc = ctk.CTkLabel(self.card_ram, text="0%", font=ctk.CTkFont(size=20, weight="bold"))
         self.dash_ram_perc.pack(pady=5)
 
+        # --- Card 5: Top Processes ---
+        self.card_procs = ctk.CTkFrame(self.frame_dashboard)
+        self.card_procs.grid(row=3, column=0, columnspan=2, padx=20, pady=10, sticky="nsew")
+        self.card_procs.grid_columnconfigure((0, 1), weight=1)
+        ctk.CTkLabel(self.card_procs, text="Top Processes by CPU", font=ctk.CTkFont(size=16, weight="bold")).grid(row=0, column=0, pady=(15, 5))
+        ctk.CTkLabel(self.card_procs, text="Top Processes by Memory", font=ctk.CTkFont(size=16, weight="bold")).grid(row=0, column=1, pady=(15, 5))
+        self.dash_top_cpu = ctk.CTkLabel(self.card_procs, text="", font=ctk.CTkFont(family="Consolas", size=11), justify="left")
+        self.dash_top_cpu.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="n")
+        self.dash_top_mem = ctk.CTkLabel(self.card_procs, text="", font=ctk.CTkFont(family="Consolas", size=11), justify="left")
+        self.dash_top_mem.grid(row=1, column=1, padx=10, pady=(0, 10), sticky="n")
+
     def _setup_cleaning_frame(self):
         self.frame_cleaning.grid_columnconfigure(0, weight=1)
         ctk.CTkLabel(self.frame_cleaning, text="System Cleanup", font=ctk.CTkFont(size=24, weight="bold")).grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
@@ -281,8 +336,27 @@ class PanaceaApp(ctk.CTk):
         
         c_base, c_hover = self.col_clean_tuple
         
-        ctk.CTkButton(btn_frame, text="Clean Temporary Files", fg_color=c_base, hover_color=c_hover, command=self.run_clean_temp).pack(fill="x", padx=20, pady=10)
+        ctk.CTkButton(btn_frame, text="Analyze Reclaimable Space (Dry Run)", fg_color=c_base, hover_color=c_hover, command=self.run_analyze_cleanup).pack(fill="x", padx=20, pady=(10, 0))
+        self.lbl_reclaimable = ctk.CTkLabel(btn_frame, text="Reclaimable: not analyzed yet", text_color="gray", font=ctk.CTkFont(size=11))
+        self.lbl_reclaimable.pack(anchor="w", padx=20)
+        ctk.CTkButton(btn_frame, text="Clean Temporary Files", fg_color=c_base, hover_color=c_hover, command=self.run_clean_temp).pack(fill="x", padx=20, pady=(10, 0))
+        # Job progress (bytes done / total, rate, ETA) with pause and cancel
+        self.clean_job = None
+        self.clean_progress = ctk.CTkProgressBar(btn_frame, orientation="horizontal", progress_color=c_base)
+        self.clean_progress.set(0)
+        self.clean_progress.pack(fill="x", padx=20, pady=(5, 0))
+        job_row = ctk.CTkFrame(btn_frame, fg_color="transparent")
+        job_row.pack(fill="x", padx=20)
+        self.lbl_clean_job = ctk.CTkLabel(job_row, text="", text_color="gray", font=ctk.CTkFont(size=11))
+        self.lbl_clean_job.pack(side="left")
+        self.btn_clean_cancel = ctk.CTkButton(job_row, text="Cancel", width=70, height=24, fg_color="darkred", hover_color="#800000",
+                                              state="disabled", command=self.cancel_clean_job)
+        self.btn_clean_cancel.pack(side="right", padx=(5, 0))
+        self.btn_clean_pause = ctk.CTkButton(job_row, text="Pause", width=70, height=24, fg_color=c_base, hover_color=c_hover,
+                                             state="disabled", command=self.toggle_clean_pause)
+        self.btn_clean_pause.pack(side="right")
         ctk.CTkButton(btn_frame, text="Empty Recycle Bin", fg_color=c_base, hover_color=c_hover, command=self.run_empty_recycle).pack(fill="x", padx=20, pady=10)
+        ctk.CTkButton(btn_frame, text="Find Duplicate Files...", fg_color=c_base, hover_color=c_hover, command=self.run_find_duplicates).pack(fill="x", padx=20, pady=10)
         ctk.CTkButton(btn_frame, text="Open Windows Disk Cleanup", fg_color=c_base, hover_color=c_hover, command=self.run_cleanmgr).pack(fill="x", padx=20, pady=10)
         ctk.CTkLabel(btn_frame, text="Expert Warning: Takes 10+ minutes.", text_color="orange").pack(anchor="w", padx=20, pady=(10,0))
         ctk.CTkButton(btn_frame, text="Run Deep Clean (WinSxS)", fg_color="darkred", hover_color="#800000", command=self.run_deep_clean).pack(fill="x", padx=20, pady=10)
@@ -293,6 +367,9 @@ class PanaceaApp(ctk.CTk):
         self.clean_log.tag_config("info", foreground="#00FF00")
         self.clean_log.tag_config("warn", foreground="#FFD700")
         self.clean_log.tag_config("err", foreground="#F44336")
+        self.clean_view = LogView(self.clean_log)
+        ctk.CTkButton(self.frame_cleaning, text="Save Log", width=80, height=24, fg_color=c_base, hover_color=c_hover,
+                      command=lambda: self.save_log(self.clean_view, "cleanup_log.txt")).grid(row=3, column=0, padx=20, pady=(0, 10), sticky="e")
 
     def _setup_disk_frame(self):
         self.frame_disk.grid_columnconfigure(0, weight=1)
@@ -320,6 +397,7 @@ class PanaceaApp(ctk.CTk):
         
         ctk.CTkButton(btn_row, text="Run Optimization (Defrag/Trim)", fg_color=d_base, hover_color=d_hover, command=self.run_optimize_drive).pack(side="left", padx=(0, 10))
         ctk.CTkButton(btn_row, text="Open Windows Defrag GUI", fg_color=d_base, hover_color=d_hover, command=self.run_dfrgui).pack(side="left")
+        ctk.CTkButton(btn_row, text="Analyze Space Usage", fg_color=d_base, hover_color=d_hover, command=self.run_analyze_space).pack(side="left", padx=(10, 0))
         
         # Log takes remaining space
         self.disk_log = ctk.CTkTextbox(self.frame_disk, height=150, font=ctk.CTkFont(family="Consolas", size=11), fg_color="black", text_color="#00FF00")
@@ -328,6 +406,9 @@ class PanaceaApp(ctk.CTk):
         self.disk_log.tag_config("info", foreground="#00FF00")
         self.disk_log.tag_config("warn", foreground="#FFD700")
         self.disk_log.tag_config("err", foreground="#F44336")
+        self.disk_view = LogView(self.disk_log)
+        ctk.CTkButton(btn_row, text="Save Log", width=80, fg_color=d_base, hover_color=d_hover,
+                      command=lambda: self.save_log(self.disk_view, "disk_log.txt")).pack(side="left", padx=(10, 0))
         
         self.refresh_drives()
 
@@ -368,6 +449,9 @@ class PanaceaApp(ctk.CTk):
         self.tools_log.tag_config("info", foreground="#00FF00")
         self.tools_log.tag_config("warn", foreground="#FFD700")
         self.tools_log.tag_config("err", foreground="#F44336")
+        self.tools_view = LogView(self.tools_log)
+        ctk.CTkButton(self.frame_tools, text="Save Log", width=80, height=24, fg_color=t_base, hover_color=t_hover,
+                      command=lambda: self.save_log(self.tools_view, "tools_log.txt")).grid(row=2, column=0, padx=20, pady=(5, 0), sticky="e")
         
         self.frame_tools.grid_rowconfigure(3, weight=1)
 
@@ -378,10 +462,7 @@ class PanaceaApp(ctk.CTk):
         ctk.CTkButton(f, text=text, fg_color=col, hover_color=hover_col, command=lambda: self.run_cmd(cmd, name)).pack(side="right", fill="x", expand=True)
 
     def log_tools_msg(self, msg):
-        self.tools_log.configure(state="normal")
-        self.tools_log.insert(tk.END, msg + "\n")
-        self.tools_log.see(tk.END)
-        self.tools_log.configure(state="disabled")
+        self.tools_view.write(msg)
 
     def _setup_apps_frame(self):
         self.frame_apps.grid_columnconfigure(0, weight=1)
@@ -520,29 +601,91 @@ class PanaceaApp(ctk.CTk):
                 self.perf_mgr.set_spooler(True)
         threading.Thread(target=apply_all, daemon=True).start()
 
-    def update_dashboard(self):
-        threading.Thread(target=self._update_data_thread, daemon=True).start()
-
-    def _update_data_thread(self):
-        try:
-            os_info = self.monitor.get_os_info()
-            cpu_name = self.monitor.get_cpu_info()
-            uptime = self.monitor.get_system_uptime()
-            t_ram, a_ram, p_ram = self.monitor.get_ram_usage()
-            t_disk, f_disk, p_disk = self.monitor.get_disk_usage()
-            cpu_usage = self.monitor.get_cpu_usage()
-            bat_perc, bat_plug = self.monitor.get_battery_status()
-            self.after(0, lambda: self._update_gui(os_info, cpu_name, uptime, t_ram, a_ram, p_ram, t_disk, f_disk, p_disk, cpu_usage, bat_perc, bat_plug))
-        except Exception as e:
-            pass
-        self.after(3000, self.update_dashboard)
-        
-    def _check_updates_thread(self):
-        try:
-            mandatory, optional, status = self.monitor.get_windows_update_status()
-            self.after(0, lambda: self._update_updates_gui(mandatory, optional, status))
-        except:
-             self.after(0, lambda: self._update_updates_gui(-1, -1, "Check Failed"))
+    def _start_dashboard_polling(self):
+        # Volatile metrics only: static hardware facts come from self.inventory
+        def on_ui(fn):
+            return lambda value: self.after(0, lambda: fn(value))
+        exporter = self.exporter
+        gb = 1024 ** 3
+        def record(metric, fn, pick=lambda v: v, export=None):
+            # History/exporter are written from the scheduler thread, the widgets are updated on the Tk thread
+            def handler(value):
+                if self.metrics:
+                    self.metrics.add(metric, pick(value))
+                if exporter and export:
+                    exporter.update(*export(value))
+                fn(value)
+            return handler
+        # A scraped machine must keep sampling while its window is minimized
+        keep = exporter is not None
+
+        sched = self.scheduler
+        sched.add("cpu", self.monitor.get_cpu_usage, 1, record("cpu", on_ui(self._show_cpu),
+                  export=lambda v: ({"panacea_cpu_usage_percent": v},)), background=keep)
+        sched.add("ram", self.monitor.get_ram_usage, 2, record("ram", on_ui(self._show_ram), lambda v: v[2],
+                  export=lambda v: ({"panacea_memory_total_bytes": v[0] * gb, "panacea_memory_available_bytes": v[1] * gb,
+                                     "panacea_memory_used_percent": v[2]},)), background=keep)
+        sched.add("volumes", self.monitor.get_volume_usage, 10, self._on_volumes, background=keep)
+        sched.add("battery", self.monitor.get_battery_status, 30, self._on_battery, background=keep)
+        sched.add("uptime", self.monitor.get_system_uptime, 60, on_ui(self._show_uptime))
+        sched.add("processes", self.monitor.get_top_processes, 1, on_ui(self._show_processes))
+        # Update status: saved result at once, then re-checked so a stale result or an expired backoff
+        # starts a new search during long sessions (a search reports through _on_update_status)
+        sched.add("updates", lambda: self.updates.get(on_update=self._on_update_status), self.UPDATE_CHECK_INTERVAL,
+                  self._on_update_check, background=True)
+        sched.add("cost report", lambda: self.logger.log(f"Dashboard sampling cost: {sched.describe_stats()}"), 600, background=True)
+        if exporter:
+            def export_costs():
+                for name, stats in sched.stats().items():
+                    exporter.update({"panacea_sample_cost_seconds": stats.avg_cost}, (("task", name),))
+            sched.add("exporter costs", export_costs, 15, background=True)
+        sched.start()
+
+        # Back off while minimized
+        self.bind("<Unmap>", lambda e: self._on_window_state(e, True), add="+")
+        self.bind("<Map>", lambda e: self._on_window_state(e, False), add="+")
+
+    def _on_volumes(self, usages):
+        # Scheduler thread: history, exporter and trends here, widgets on the Tk thread
+        self.volume_history.add(usages)
+        for u in usages:
+            if self.exporter and u.status == "ok":
+                self.exporter.update({"panacea_disk_total_bytes": u.total, "panacea_disk_free_bytes": u.free,
+                                      "panacea_disk_used_percent": u.percent}, (("volume", u.name),))
+        system = next((u for u in usages if u.name.upper() == "C:"), usages[0] if usages else None)
+        if system is not None and system.status == "ok" and self.metrics:
+            self.metrics.add("disk", system.percent)
+        trends = {u.root: self.volume_history.trend(u.root) for u in usages}
+        self.after(0, lambda: self._show_volumes(usages, system, trends))
+
+    def _on_battery(self, status):
+        self.battery_status = status
+        if self.exporter:
+            percent, plugged = status
+            self.exporter.update({"panacea_battery_percent": percent if plugged != "Unknown" else None,
+                                  "panacea_battery_plugged": 1 if plugged == "Plugged In" else 0})
+
+    def _on_window_state(self, event, minimized):
+        if event.widget is self:
+            self._minimized = minimized
+            self._update_poll_visibility()
+
+    def _update_poll_visibility(self):
+        self.scheduler.set_visible(self._dashboard_shown and not self._minimized)
+
+    def _on_update_check(self, cached):
+        # Scheduler thread: the cached result, or None while no search has succeeded yet
+        if cached:
+            self._on_update_status(*cached)
+        elif self.updates.backoff_remaining():
+            self.after(0, lambda: self._update_updates_gui(-1, -1, "Check Failed")) # Recent searches failed, not retrying yet
+
+    def _on_update_status(self, mandatory, optional, status):
+        # Called with the cached result and from the service's search thread
+        if self.exporter and mandatory >= 0:
+            self.exporter.update({"panacea_updates_pending": mandatory}, (("kind", "mandatory"),))
+            self.exporter.update({"panacea_updates_pending": optional}, (("kind", "optional"),))
+        self.after(0, lambda: self._update_updates_gui(mandatory, optional, status))
 
     def _update_updates_gui(self, mandatory, optional, status):
         # Hide button row first
@@ -569,31 +712,52 @@ class PanaceaApp(ctk.CTk):
             # Check failed
             self.lbl_update_status.configure(text="Update check failed", text_color="gray")
 
-    def _update_gui(self, os_info, cpu_name, uptime, t_ram, a_ram, p_ram, t_disk, f_disk, p_disk, cpu_usage, bat_perc, bat_plug):
-        if self.dash_os.cget("text").startswith("OS: Win ..."):
-            self.dash_os.configure(text=os_info)
-            self.dash_cpu_name.configure(text=cpu_name)
-            # Get RAM info once
-            ram_info = self.monitor.get_ram_info()
-            if ram_info:
-                self.dash_ram_info.configure(text=ram_info)
-            # Get Disk info once
-            disk_model = self.monitor.get_disk_model()
-            if disk_model:
-                self.dash_disk_info.configure(text=disk_model)
-        
+    def _apply_inventory(self, snapshot):
+        self.dash_os.configure(text=snapshot.get("os_info", ""))
+        self.dash_cpu_name.configure(text=snapshot.get("cpu_info", ""))
+        if snapshot.get("ram_info"):
+            self.dash_ram_info.configure(text=snapshot["ram_info"])
+        if snapshot.get("disk_model"):
+            self.dash_disk_info.configure(text=snapshot["disk_model"])
+
+    def _show_uptime(self, uptime):
         self.dash_uptime_val.configure(text=f"Time since restart: {uptime}")
-        
-        # Update CPU Graph
+
+    def _show_cpu(self, cpu_usage):
         self.cpu_graph.add_value(cpu_usage)
         self.dash_cpu_val.configure(text=f"{round(cpu_usage, 1)}%")
-        
-        # Update RAM Graph
+
+    def _show_ram(self, ram):
+        t_ram, a_ram, p_ram = ram
         self.ram_graph.add_value(p_ram)
         self.dash_ram_val.configure(text=f"{round(t_ram - a_ram, 1)} GB / {t_ram} GB")
         self.dash_ram_perc.configure(text=f"{round(p_ram, 1)}%")
 
-        # Disk
+    def _show_processes(self, top):
+        top_cpu, top_mem = top
+        self.dash_top_cpu.configure(text="\n".join(f"{p.name[:24]:<24} {p.cpu_percent:5.1f}%" for p in top_cpu))
+        self.dash_top_mem.configure(text="\n".join(f"{p.name[:24]:<24} {p.working_set / (1024*1024):7.0f} MB" for p in top_mem))
+
+    def _show_volumes(self, usages, system, trends):
+        gb = 1024 ** 3
+        if system is not None and system.total:
+            self._show_disk((round(system.total / gb, 1), round(system.free / gb, 1), system.percent))
+        lines = []
+        for u in usages:
+            if u is system:
+                continue
+            if not u.total:
+                lines.append(f"{u.name:<6} {'not responding' if u.status == 'timeout' else 'unavailable'}")
+                continue
+            trend = trends.get(u.root)
+            line = f"{u.name:<6} {u.percent:5.1f}%  {u.free / gb:7.1f} GB free"
+            if trend: line += f"  {'+' if trend > 0 else ''}{trend}%/24h"
+            if u.status == "timeout": line += "  (stale)"
+            lines.append(line)
+        self.dash_volumes.configure(text="\n".join(lines))
+
+    def _show_disk(self, disk):
+        t_disk, f_disk, p_disk = disk
         def get_color(perc):
             if perc < 60: return "#4CAF50"
             if perc < 85: return "#FFC107"
@@ -604,16 +768,20 @@ class PanaceaApp(ctk.CTk):
         self.dash_disk_perc.configure(text=f"{p_disk}%")
 
     def log_msg(self, msg):
-        self.clean_log.configure(state="normal")
-        self.clean_log.insert(tk.END, msg + "\n")
-        self.clean_log.see(tk.END)
-        self.clean_log.configure(state="disabled")
+        self.clean_view.write(msg)
 
     def log_disk_msg(self, msg):
-        self.disk_log.configure(state="normal")
-        self.disk_log.insert(tk.END, msg + "\n")
-        self.disk_log.see(tk.END)
-        self.disk_log.configure(state="disabled")
+        self.disk_view.write(msg)
+
+    def save_log(self, view, default_name):
+        """Writes the full (untrimmed) history of a log view to a file chosen by the user"""
+        path = filedialog.asksaveasfilename(defaultextension=".txt", initialfile=default_name,
+                                            filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if not path: return
+        try:
+            view.save(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save log: {e}")
 
     def refresh_drives(self):
         drives = self.disk_opt.get_drive_info()
@@ -625,12 +793,89 @@ class PanaceaApp(ctk.CTk):
             self.drive_menu.configure(values=["No drives"])
             self.selected_drive.set("No drives")
 
-    def run_clean_temp(self):
+    def run_analyze_cleanup(self):
         def task():
-            self.log_msg("Starting cleanup...")
-            count, freed = self.cleanup_mgr.clean_temp_files(progress_callback=self.log_msg)
+            self.log_msg("Analyzing (nothing will be deleted)...")
+            temp = self.cleanup_mgr.analyze_temp_files(progress_callback=self.log_msg)
+            browser = self.cleanup_mgr.analyze_browser_caches(progress_callback=self.log_msg)
+            for label, index in (("Temp files", temp), ("Browser caches", browser)):
+                self.log_msg(f"{label}: {index.file_count} files, {index.total_bytes / (1024*1024):.2f} MB")
+                for root, (c, b) in index.by_root.items():
+                    self.log_msg(f"  {root}: {c} files, {b / (1024*1024):.2f} MB")
+                for age, (c, b) in index.by_age.items():
+                    if c: self.log_msg(f"  {age}: {c} files, {b / (1024*1024):.2f} MB")
+                for ext, c, b in index.top_extensions():
+                    self.log_msg(f"  {ext}: {c} files, {b / (1024*1024):.2f} MB")
+            total = temp.total_bytes + browser.total_bytes
+            text = f"Reclaimable: {total / (1024*1024):.2f} MB (Temp {temp.total_bytes / (1024*1024):.2f} MB, Browsers {browser.total_bytes / (1024*1024):.2f} MB)"
+            self.after(0, lambda: self.lbl_reclaimable.configure(text=text, text_color="#4CAF50"))
+        threading.Thread(target=task, daemon=True).start()
+
+    def run_clean_temp(self):
+        if self.clean_job is not None:
+            return # One cleanup at a time
+        self.log_msg("Starting cleanup...")
+        # Pre-count with a dry run; the clean then deletes straight from that index
+        job = CleanupJob("Temp cleanup",
+                         count_fn=lambda c: self.cleanup_mgr.analyze_temp_files(control=c),
+                         clean_fn=lambda c: self.cleanup_mgr.clean_temp_files(progress_callback=self.log_msg, control=c))
+        self.clean_job = job
+        self.btn_clean_pause.configure(state="normal", text="Pause")
+        self.btn_clean_cancel.configure(state="normal")
+
+        def on_done(result):
+            self.clean_job = None
+            self.after(0, lambda: (self.btn_clean_pause.configure(state="disabled", text="Pause"),
+                                   self.btn_clean_cancel.configure(state="disabled")))
+            if result is None:
+                self.log_msg(f"Cleanup failed: {job.error}" if job.state == "failed" else "Cleanup cancelled.")
+                return
+            count, freed = result
             self.log_msg(f"Finished. Deleted {count} files. Freed {freed / (1024*1024):.2f} MB.")
             messagebox.showinfo("Cleanup Complete", f"Deleted {count} files.\nFreed {freed / (1024*1024):.2f} MB.")
+
+        self.watch_job(job, self.clean_progress, self.lbl_clean_job)
+        job.start(on_done)
+
+    def toggle_clean_pause(self):
+        job = self.clean_job
+        if job is None: return
+        if job.control.paused:
+            job.resume()
+            self.btn_clean_pause.configure(text="Pause")
+        else:
+            job.pause()
+            self.btn_clean_pause.configure(text="Resume")
+
+    def cancel_clean_job(self):
+        if self.clean_job is not None:
+            self.clean_job.cancel()
+
+    def watch_job(self, job, bar, label, start=0.0, span=1.0):
+        """Polls a CleanupJob from the UI thread, mapping its progress onto bar[start, start+span]"""
+        def tick():
+            p = job.progress()
+            bar.set(start + span * p.fraction)
+            label.configure(text=f"{job.name}: {p.describe()}")
+            if p.state not in FINISHED:
+                self.after(200, tick)
+        self.after(0, tick)
+
+    def run_find_duplicates(self):
+        folder = filedialog.askdirectory(title="Select a folder to search for duplicates")
+        if not folder: return
+
+        def task():
+            self.log_msg(f"Searching duplicates in {folder}...")
+            groups, wasted = 0, 0
+            # Groups stream in as they are confirmed, largest files first
+            for group in DuplicateFinder().find([folder], progress_callback=self.log_msg):
+                groups += 1
+                wasted += group.wasted
+                self.log_msg(f"[{len(group.paths)} copies, {group.size / (1024*1024):.2f} MB each, {group.wasted / (1024*1024):.2f} MB wasted]")
+                for path in group.paths:
+                    self.log_msg(f"  {path}")
+            self.log_msg(f"Duplicate search finished: {groups} groups, {wasted / (1024*1024):.2f} MB wasted.")
         threading.Thread(target=task, daemon=True).start()
 
     def run_empty_recycle(self):
@@ -664,6 +909,28 @@ class PanaceaApp(ctk.CTk):
 
     def run_dfrgui(self): self.disk_opt.open_optimize_gui()
 
+    def run_analyze_space(self):
+        letter = self.selected_drive.get()
+        if not letter or letter == "No drives": messagebox.showwarning("Selection", "Select a drive."); return
+
+        def task():
+            analyzer = DiskAnalyzer(letter + "\\")
+            first = not analyzer.has_index()
+            self.log_disk_msg(f"--- Space Analysis {letter} ({'full scan, this can take a while' if first else 'refreshing saved index'}) ---")
+            listed, reused, elapsed = analyzer.scan(progress_callback=self.log_disk_msg)
+            total, files = analyzer.total()
+            self.log_disk_msg(f"Indexed {files} files, {total / (1024**3):.2f} GB in {elapsed:.1f}s ({listed} folders listed, {reused} unchanged).")
+            self.log_disk_msg("Largest folders:")
+            for path, size, count in analyzer.largest_folders(10):
+                self.log_disk_msg(f"  {size / (1024**3):8.2f} GB  {path}")
+            self.log_disk_msg("Largest files:")
+            for path, size in analyzer.largest_files(10):
+                self.log_disk_msg(f"  {size / (1024**3):8.2f} GB  {path}")
+            self.log_disk_msg("By extension:")
+            for ext, count, size in analyzer.extension_breakdown(10):
+                self.log_disk_msg(f"  {size / (1024**3):8.2f} GB  {ext} ({count} files)")
+        threading.Thread(target=task, daemon=True).start()
+
     def run_cmd(self, cmd, desc):
         """Runs command streaming to tools log instead of external window"""
         # Ensure user confirms first
@@ -710,7 +977,9 @@ class PanaceaApp(ctk.CTk):
             self.btn_update_row.pack_forget()
             self.lbl_update_status.configure(text="Updating... please wait", text_color="gray")
             self.lbl_update_status.pack(pady=(10, 5), before=self.dash_uptime_val)
-            self.after(30000, lambda: threading.Thread(target=self._check_updates_thread, daemon=True).start())
+            # The installed set is about to change: drop the cached result and search once the scan is under way
+            self.updates.invalidate()
+            self.after(30000, lambda: self.updates.refresh_async(self._on_update_status, force=True))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to launch updater: {e}")
 
@@ -719,11 +988,7 @@ class PanaceaApp(ctk.CTk):
         try:
             import os
             os.system("start ms-settings:windowsupdate-optionalupdates")
-            # Refresh update status after a delay
-            self.btn_update_row.pack_forget()
-            self.lbl_update_status.configure(text="Looking for updates...", text_color="gray")
-            self.lbl_update_status.pack(pady=(10, 5), before=self.dash_uptime_val)
-            self.after(30000, lambda: threading.Thread(target=self._check_updates_thread, daemon=True).start())
+            # Only opens the page; the cached status stays valid until something gets installed
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open settings: {e}")
 
@@ -759,7 +1024,12 @@ class PanaceaApp(ctk.CTk):
                                              fg_color="#FFD700", hover_color="#B8860B", text_color="black",
                                              height=40,
                                              command=self.run_god_mode)
-        self.btn_resurrect_start.pack(pady=20)
+        self.btn_resurrect_start.pack(pady=(20, 5))
+        # Stops the running cleanup job at once and the protocol before its next phase
+        self.god_protocol = None
+        self.btn_resurrect_cancel = ctk.CTkButton(self.action_frame, text="CANCEL", width=120, fg_color="darkred", hover_color="#800000",
+                                                  state="disabled", command=self.cancel_god_mode)
+        self.btn_resurrect_cancel.pack(pady=(0, 20))
         
         # Log Area (Terminal Style)
         log_frame = ctk.CTkFrame(self.frame_resurrect, corner_radius=10, fg_color="black")
@@ -777,99 +1047,55 @@ class PanaceaApp(ctk.CTk):
         self.god_log.tag_config("warn", foreground="#FFD700") # Gold
         self.god_log.tag_config("err", foreground="#F44336")  # Red
         self.god_log.tag_config("head", foreground="#00BFFF") # Blue
+        self.god_view = LogView(self.god_log)
+        ctk.CTkButton(log_frame, text="Save Log", width=80, height=24, fg_color="#FFD700", hover_color="#B8860B", text_color="black",
+                      command=lambda: self.save_log(self.god_view, "resurrection_log.txt")).place(relx=1.0, x=-10, y=5, anchor="ne")
 
     def log_god_msg(self, msg, level="info"):
-        import re
-        self.god_log.configure(state="normal")
-        self.god_log.insert(tk.END, f"{msg}\n", level)
-        self.god_log.see(tk.END)
-        self.god_log.configure(state="disabled")
+        self.god_view.write(msg, level)
+
+    def cancel_god_mode(self):
+        if self.god_protocol is not None:
+            self.god_protocol.cancel()
+        self.lbl_status.configure(text="Cancelling...", text_color="orange")
+
+    def _run_god_job(self, job, index, total):
+        # The bar moves through this phase's slice as bytes are deleted
+        self.watch_job(job, self.progress_bar, self.lbl_status, index / total, 1 / total)
+        return job.run()
 
     def run_god_mode(self):
         if not messagebox.askyesno("Confirm Resurrection", "Initiate System Resurrection Protocol?\n\nThis process is intensive and may take time.\nEnsure all work is saved."):
             return
 
         self.btn_resurrect_start.configure(state="disabled", text="PROTOCOL RUNNING...")
+        self.btn_resurrect_cancel.configure(state="normal")
         self.lbl_status.configure(text="Initializing...", text_color="#FFD700")
         self.progress_bar.set(0)
-        self.god_log.configure(state="normal"); self.god_log.delete("0.0", tk.END); self.god_log.configure(state="disabled")
-        
-        # Filters for Cleaner Output
-        def health_filter(line):
-            # SFC / DISM / CHKDSK filter
-            bad_phrases = [
-                "Avvio in corso", "Attendere", "L'operazione richieder", "100%", "completed", "Avanzamento:", "ETA:", "Fase:", "totale:", "percent complete",
-                # CHKDSK Noise
-                "Il file system", "etichetta del volume", "Durata fase", "Verifica file", "Verifica indici", "Verifica descrittori", "journal USN",
-                "KB di spazio", "KB in", "KB occupati", "KB disponibili", "byte in ogni", "unit", "allocazione"
-            ]
-            # Keep final results or phase indicators, drop progress noise if needed or verbose intros
-            for phrase in bad_phrases:
-                if phrase in line: return False
-            if line.strip() == "": return False
-            return True
-            
+        self.god_view.clear()
+        
+        protocol = ResurrectionProtocol(self.log_god_msg, run_job=self._run_god_job,
+                                        cleanup_mgr=self.cleanup_mgr, restore_mgr=self.restore_mgr,
+                                        cmd_runner=self.cmd_runner, disk_opt=self.disk_opt)
+        self.god_protocol = protocol
+
         def sequence():
-            steps = 8 # Safety, Browser, Cleanup, Network, Disk Opt, Disk Scan, Health, Verification
-            current_step = 0
-            
+            steps = len(PHASES) # Safety, Browser, Cleanup, Network, Disk Opt, Disk Scan, Health, Verification
+
             def update_progress(step_i, status_text):
                 self.progress_bar.set(step_i / steps)
                 self.lbl_status.configure(text=status_text)
-            
+
+            titles = {key: title for key, title, _ in PHASES}
+
+            def tool_progress(i, total, key, fraction, stage):
+                # Moves the bar through the phase's slice as the tool reports its percentage
+                self.progress_bar.set((i + fraction) / total)
+                self.lbl_status.configure(text=f"Phase {i + 1}: {titles[key]} - " + (f"{stage} " if stage else "") + f"{fraction * 100:.0f}%")
+
             try:
-                # PHASE 1: SAFETY (Auto-Enable Restore)
-                current_step += 1; update_progress(current_step, "Phase 1: Safety Backup")
-                self.log_god_msg("\n[PHASE 1] SAFETY BACKUP INITIATED...", "head")
-                
-                # Verify/Enable System Restore first
-                self.log_god_msg("Verifying System Restore state...", "info")
-                self.restore_mgr.ensure_restore_enabled("C:\\")
-                
-                success, msg = self.restore_mgr.create_restore_point("Panacea GodMode Auto-Restore")
-                if success: self.log_god_msg(f"Restore Point: {msg}", "info")
-                else: self.log_god_msg(f"Restore Point Warning: {msg}", "warn")
-                
-                # PHASE 2: BROWSER CLEANUP
-                current_step += 1; update_progress(current_step, "Phase 2: Browser Cleanup")
-                self.log_god_msg("\n[PHASE 2] BROWSER CLEANUP...", "head")
-                bc_count, bc_size = self.cleanup_mgr.clean_browser_caches()
-                self.log_god_msg(f"Browser Cache: Cleared {bc_count} files ({bc_size / (1024*1024):.2f} MB)", "info")
-
-                # PHASE 3: SYSTEM CLEANUP
-                current_step += 1; update_progress(current_step, "Phase 3: System Junk Cleanup")
-                self.log_god_msg("\n[PHASE 3] SYSTEM JUNK CLEANUP...", "head")
-                count, freed = self.cleanup_mgr.clean_temp_files(progress_callback=lambda m: self.log_god_msg(m, "info"))
-                self.log_god_msg(f"Temp Files: Deleted {count}, Freed {freed / (1024*1024):.2f} MB", "info")
-                success, msg = self.cleanup_mgr.empty_recycle_bin()
-                self.log_god_msg(f"Recycle Bin: {msg}", "info")
-
-                # PHASE 4: NETWORK
-                current_step += 1; update_progress(current_step, "Phase 4: Network Reset")
-                self.log_god_msg("\n[PHASE 4] NETWORK RESET...", "head")
-                self.cmd_runner.run_command_stream("ipconfig /flushdns", "DNS Flush", lambda m: self.log_god_msg(m, "info"))
-                self.cmd_runner.run_command_stream("netsh winsock reset", "Winsock Reset", lambda m: self.log_god_msg(m, "info"))
-
-                # PHASE 5: DISK OPTIMIZATION
-                current_step += 1; update_progress(current_step, "Phase 5: Disk Defrag/Trim")
-                self.log_god_msg("\n[PHASE 5] DISK OPTIMIZATION (C:)...", "head")
-                self.disk_opt.analyze_optimize_drive("C:", progress_callback=lambda m: self.log_god_msg(m, "info"))
-
-                # PHASE 6: DISK HEALTH
-                current_step += 1; update_progress(current_step, "Phase 6: Disk Health Scan")
-                self.log_god_msg("\n[PHASE 6] DISK HEALTH CHECK (CHKDSK)...", "head")
-                # /scan runs online (no reboot), /perf speeds it up
-                self.cmd_runner.run_command_stream("chkdsk C: /scan /perf", "CHKDSK", lambda m: self.log_god_msg(m, "info"), filter_func=health_filter)
-
-                # PHASE 7: SYSTEM IMAGE HEALTH
-                current_step += 1; update_progress(current_step, "Phase 7: DISM Health Check")
-                self.log_god_msg("\n[PHASE 7] DISM IMAGE HEALTH...", "head")
-                self.cmd_runner.run_command_stream("DISM /Online /Cleanup-Image /CheckHealth", "DISM Check", lambda m: self.log_god_msg(m, "info"), filter_func=health_filter)
-                
-                # PHASE 8: SFC (skipped for speed if preferred, but kept for god mode)
-                current_step += 1; update_progress(current_step, "Phase 8: Integrity Scan (SFC)")
-                self.log_god_msg("\n[PHASE 8] SFC INTEGRITY SCAN...", "head")
-                self.cmd_runner.run_command_stream("sfc /scannow", "SFC Scan", lambda m: self.log_god_msg(m, "info"), filter_func=health_filter)
+                protocol.run(on_phase=lambda i, total, key, title: update_progress(i, f"Phase {i + 1}: {title}"),
+                             on_progress=tool_progress)
 
                 update_progress(steps, "Protocol Complete")
                 self.log_god_msg("\n=== RESURRECTION PROTOCOL COMPLETE ===", "head")
@@ -879,45 +1105,206 @@ class PanaceaApp(ctk.CTk):
                 
                 messagebox.showinfo("Success", "Resurrection Protocol Finished Successfully.\n\nA system restart is highly recommended.")
 
+            except JobCancelled:
+                self.log_god_msg("\n[!] PROTOCOL CANCELLED BY USER", "warn")
+
             except Exception as e:
                 self.log_god_msg(f"\n[!] ERROR: {str(e)}", "err")
                 self.lbl_status.configure(text="Protocol Failed", text_color="red")
                 messagebox.showerror("Error", f"Sequence failed: {e}")
             
             finally:
+                self.god_protocol = None
                 self.btn_resurrect_start.configure(state="normal", text="INITIATE PROTOCOL")
+                self.btn_resurrect_cancel.configure(state="disabled")
                 self.lbl_status.configure(text="Ready", text_color="gray")
 
         threading.Thread(target=sequence, daemon=True).start()
 class LiveGraph(ctk.CTkFrame):
-    def __init__(self, master, width=200, height=80, line_color="#00EE00", **kwargs):
+    """
+    Line graph of 0-100 values. The polyline item is created once and reshaped in place with
+    canvas.coords; add_value() only records the value, the shared GraphClock redraws
+    graphs that changed, and only while they can actually be seen.
+    :param capacity: Points kept (default one every 5 pixels). A history longer than twice
+                     the width is drawn as a min/max pair per pixel column.
+    """
+    def __init__(self, master, width=200, height=80, line_color="#00EE00", capacity=None, **kwargs):
         super().__init__(master, **kwargs)
         self.canvas = ctk.CTkCanvas(self, width=width, height=height, bg="#1a1a1a", highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
         self.width = width
         self.height = height
         self.line_color = line_color
-        self.points = [0] * (width // 5) # one point every 5 pixels
-        
+        self.points = collections.deque([0] * (capacity or width // 5), maxlen=capacity or width // 5)
+        self.line = self.canvas.create_line(0, height, width, height, fill=line_color, width=2, smooth=True)
+        self.dirty = True
+        GraphClock.get(self).register(self)
+
     def add_value(self, value):
         # value 0-100
-        self.points.pop(0)
         self.points.append(value)
-        self.draw()
-        
+        self.dirty = True
+
+    def set_values(self, values):
+        """Replaces the newest points with values (e.g. history from the metric store)"""
+        self.points.extend(values)
+        self.dirty = True
+
     def draw(self):
-        self.canvas.delete("all")
+        self.dirty = False
+        values = self._decimate(list(self.points))
         w = self.width
         h = self.height
-        step = w / (len(self.points) - 1)
-        
+        step = w / max(1, len(values) - 1)
+
         coords = []
-        for i, val in enumerate(self.points):
-            x = i * step
-            # val is % so 100 is top (0 y), 0 is bottom (h y)
-            # Actually 100% should be at y=0, 0% at y=h
-            y = h - (val / 100 * h)
-            coords.extend([x, y])
-            
+        for i, val in enumerate(values):
+            # 100% at y=0, 0% at y=h
+            coords.append(i * step)
+            coords.append(h - (val / 100 * h))
         if len(coords) >= 4:
-            self.canvas.create_line(coords, fill=self.line_color, width=2, smooth=True)
+            self.canvas.coords(self.line, coords)
+
+    def _decimate(self, values):
+        """At most two points (min and max, in order) per pixel column, so peaks survive"""
+        n = len(values)
+        if n <= 2 * self.width:
+            return values # Already no more than two points per column
+        out = []
+        per_col = n / self.width
+        for col in range(self.width):
+            chunk = values[int(col * per_col):int((col + 1) * per_col)]
+            if not chunk:
+                continue
+            lo, hi = min(chunk), max(chunk)
+            if chunk.index(lo) < chunk.index(hi):
+                out.extend((lo, hi))
+            else:
+                out.extend((hi, lo))
+        return out
+
+class GraphClock:
+    """
+    One redraw tick shared by every LiveGraph of a window. Each tick redraws only graphs with new
+    values that are on screen; nothing is drawn while the window is minimized or the graph's
+    frame is hidden (a hidden graph stays dirty and catches up when it is shown again).
+    """
+    FRAME_MS = 250
+    _clocks = {}
+
+    @classmethod
+    def get(cls, widget):
+        root = widget.winfo_toplevel()
+        clock = cls._clocks.get(root)
+        if clock is None:
+            clock = cls._clocks[root] = cls(root)
+        return clock
+
+    def __init__(self, root):
+        self.root = root
+        self.graphs = []
+        self.root.after(self.FRAME_MS, self._tick)
+
+    def register(self, graph):
+        self.graphs.append(graph)
+
+    def _tick(self):
+        try:
+            if self.root.state() != "iconic":
+                for graph in self.graphs:
+                    if graph.dirty and graph.winfo_viewable():
+                        graph.draw()
+        except tk.TclError:
+            return # Window destroyed
+        self.root.after(self.FRAME_MS, self._tick)
+
+class LogView:
+    """
+    Thread-safe sink in front of a CTkTextbox.
+    Workers call write() from any thread; it only appends to a ring buffer. The Tk main loop
+    drains the buffer every FRAME_MS through after() and inserts the whole batch at once.
+    The widget keeps only the newest max_lines lines. The full history is spooled to a temporary
+    file by the drain (memory holds at most one frame's worth), and save() copies that file.
+    """
+    FRAME_MS = 50 # ~20 redraws per second at most
+    MAX_LINES = 2000
+
+    def __init__(self, textbox, max_lines=MAX_LINES):
+        self.textbox = textbox
+        self.max_lines = max_lines
+        # Anything older than max_lines would be trimmed from the widget anyway
+        self._pending = collections.deque(maxlen=max_lines)
+        self._unspooled = [] # Lines written since the last drain
+        self._spool = None # Temporary history file, created on first use
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self.textbox.after(self.FRAME_MS, self._drain)
+
+    def write(self, msg, tag=None):
+        with self._lock:
+            self._pending.append((msg, tag))
+            self._unspooled.append(msg)
+
+    def clear(self):
+        """Empties widget, buffer and history (main thread only)"""
+        with self._lock:
+            self._pending.clear()
+            self._unspooled = []
+        with self._spool_lock:
+            if self._spool is not None:
+                self._spool.seek(0)
+                self._spool.truncate()
+        self.textbox.configure(state="normal")
+        self.textbox.delete("0.0", tk.END)
+        self.textbox.configure(state="disabled")
+
+    def save(self, path):
+        with self._spool_lock:
+            self._flush_spool()
+            with open(path, "w", encoding="utf-8") as f:
+                if self._spool is not None:
+                    self._spool.seek(0)
+                    shutil.copyfileobj(self._spool, f)
+                    self._spool.seek(0, 2) # Back to the end for the next appends
+
+    def _flush_spool(self):
+        """Appends the lines written since the last call to the history file (holding _spool_lock)"""
+        with self._lock:
+            lines, self._unspooled = self._unspooled, []
+        if lines:
+            if self._spool is None:
+                self._spool = tempfile.TemporaryFile("w+", encoding="utf-8", newline="\n")
+            self._spool.write("\n".join(lines) + "\n")
+
+    def _drain(self):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        try:
+            with self._spool_lock:
+                self._flush_spool()
+        except OSError:
+            pass # History is best effort; the widget still shows the lines
+        if batch:
+            try:
+                self._insert(batch)
+            except tk.TclError:
+                return # Widget destroyed
+        self.textbox.after(self.FRAME_MS, self._drain)
+
+    def _insert(self, batch):
+        self.textbox.configure(state="normal")
+        # Coalesce consecutive lines sharing a tag into a single insert
+        chunk, chunk_tag = [], batch[0][1]
+        for msg, tag in batch:
+            if tag != chunk_tag:
+                self.textbox.insert(tk.END, "".join(chunk), chunk_tag)
+                chunk, chunk_tag = [], tag
+            chunk.append(msg + "\n")
+        self.textbox.insert(tk.END, "".join(chunk), chunk_tag)
+
+        line_count = int(self.textbox.index("end-1c").split(".")[0])
+        if line_count > self.max_lines:
+            self.textbox.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+        self.textbox.see(tk.END)
+        self.textbox.configure(state="disabled")
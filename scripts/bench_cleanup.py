@@ -0,0 +1,92 @@
+"""
+Benchmark: legacy os.walk cleanup vs the scandir CleanupEngine.
+Builds the same synthetic temp tree twice and times both deleters on it.
+
+Usage: python scripts/bench_cleanup.py [file_count] [workers]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.cleanup_engine import CleanupEngine
+from modules.logger import Logger
+
+FILES_PER_DIR = 100
+DIRS_PER_LEVEL = 20
+
+def build_tree(root, file_count):
+    """Creates file_count small files spread over a two-level folder tree (loose files at every level)"""
+    created = 0
+    d = 0
+    payload = b"x" * 512
+    while created < file_count:
+        if d == 0:
+            folder = root
+        elif d % (DIRS_PER_LEVEL + 1) == 1:
+            folder = os.path.join(root, f"d{d // (DIRS_PER_LEVEL + 1)}")
+        else:
+            folder = os.path.join(root, f"d{d // (DIRS_PER_LEVEL + 1)}", f"s{d % (DIRS_PER_LEVEL + 1)}")
+        os.makedirs(folder, exist_ok=True)
+        for i in range(min(FILES_PER_DIR, file_count - created)):
+            with open(os.path.join(folder, f"f{i}.tmp"), "wb") as f:
+                f.write(payload)
+        created += FILES_PER_DIR
+        d += 1
+
+def legacy_clean(base_path):
+    """
+    The original CleanupManager.clean_temp_files loop (without per-file logging), walked
+    bottom-up so every file is removed and counted one by one like the engine does -
+    rmtree on each top-level folder would skip the counting and flatter the legacy time.
+    """
+    total_deleted, total_freed = 0, 0
+    for root, dirs, files in os.walk(base_path, topdown=False):
+        for name in files:
+            file_path = os.path.join(root, name)
+            try:
+                size = os.path.getsize(file_path)
+                os.remove(file_path)
+                total_deleted += 1
+                total_freed += size
+            except Exception:
+                pass
+        for name in dirs:
+            try:
+                os.rmdir(os.path.join(root, name)) # Emptied on the way up
+            except Exception:
+                pass
+    return total_deleted, total_freed
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    Logger().console = False # Keep engine log lines out of the timings and the report
+    base = tempfile.mkdtemp(prefix="panacea_bench_")
+    try:
+        print(f"Building {file_count} files...")
+        build_tree(base, file_count)
+        t = time.perf_counter()
+        count, size = legacy_clean(base)
+        legacy = time.perf_counter() - t
+        print(f"legacy os.walk : {legacy:7.2f}s  ({count}/{file_count} files, {size / (1024*1024):.1f} MB reported)")
+
+        print(f"Rebuilding {file_count} files...")
+        build_tree(base, file_count)
+        engine = CleanupEngine(max_workers=workers)
+        result = engine.clean([base])
+        print(f"CleanupEngine  : {result.elapsed:7.2f}s  ({result.files}/{file_count} files, {result.bytes / (1024*1024):.1f} MB, "
+              f"{result.dirs_removed} dirs, {engine.max_workers} workers)")
+        for w in result.workers:
+            print(f"  worker {w.worker_id}: {w.files} files, {w.bytes / (1024*1024):.1f} MB")
+        if count != result.files:
+            print(f"WARNING: the two runs deleted different file counts ({count} vs {result.files})")
+        print(f"Speedup: {legacy / result.elapsed:.2f}x")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
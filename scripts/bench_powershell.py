@@ -0,0 +1,65 @@
+"""
+Benchmark: per-call latency of spawning a PowerShell process for every call (the old way)
+vs the PowerShellPool's persistent workers. With --standin both sides use the stand-in
+worker (scripts/powershell_standin.py), so it runs without PowerShell; the real
+difference is larger since powershell.exe starts far slower than Python.
+
+Usage: python scripts/bench_powershell.py [calls] [--standin]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.powershell import PowerShellPool, PowerShellWorker, default_command
+
+STANDIN = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "powershell_standin.py")]
+SCRIPT = "Write-Output 42"
+
+def spawn_call(command, script):
+    """One call the old way: start a worker, run one script, let it exit"""
+    if command is STANDIN:
+        worker = PowerShellWorker(command)
+        frame = worker.receive(worker.send(script), 30)
+        worker.close()
+        return frame["output"]
+    exe = command[0]
+    out = subprocess.check_output([exe, "-NoProfile", "-Command", script],
+                                  creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    return int(out.decode().strip())
+
+def timed(fn, calls):
+    """Milliseconds per call"""
+    times = []
+    for _ in range(calls):
+        t = time.perf_counter()
+        assert fn() == 42
+        times.append((time.perf_counter() - t) * 1000)
+    return times
+
+def report(name, times):
+    print(f"{name:<18} median {statistics.median(times):8.2f} ms | min {min(times):8.2f} ms | "
+          f"max {max(times):8.2f} ms | total {sum(times) / 1000:6.2f} s")
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    calls = int(args[0]) if args else 20
+    command = STANDIN if "--standin" in sys.argv else default_command()
+    print(f"{calls} calls, worker: {'stand-in' if command is STANDIN else command[0]}")
+
+    spawn = timed(lambda: spawn_call(command, SCRIPT), calls)
+    report("spawn per call", spawn)
+
+    pool = PowerShellPool(size=1, command=command)
+    t = time.perf_counter()
+    assert pool.run(SCRIPT).output == 42 # Starts the worker
+    print(f"pool warm-up       {(time.perf_counter() - t) * 1000:8.2f} ms (first call only)")
+    pooled = timed(lambda: pool.run(SCRIPT).output, calls)
+    report("pooled worker", pooled)
+    pool.close()
+    print(f"speedup            {statistics.median(spawn) / statistics.median(pooled):8.1f}x (median)")
+
+if __name__ == "__main__":
+    main()
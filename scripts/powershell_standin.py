@@ -0,0 +1,64 @@
+"""
+Stand-in PowerShell worker: speaks the PowerShellPool protocol (modules/powershell.py) without
+PowerShell, so the pool can be exercised and benchmarked on any OS. A script is a ';'-separated
+list of a few commands:
+    Write-Output <json>        adds a value to the output (bare words are strings)
+    Start-Sleep -Seconds <n>   (or -Milliseconds <n>)
+    throw '<message>'          fails the script
+    exit [code]                ends the worker without answering (a crash)
+    $PID                       adds the worker's process id to the output
+Stray non-protocol lines (like real PowerShell warnings) are printed with Write-Host <text>.
+
+Usage: python scripts/powershell_standin.py   (then one JSON request per stdin line)
+"""
+import json
+import os
+import sys
+import time
+
+FRAME = "@@PSPOOL "
+
+def run(script):
+    """The script's output values; raises RuntimeError for throw"""
+    output = []
+    for statement in script.split(";"):
+        statement = statement.strip()
+        if not statement:
+            continue
+        name, _, arg = statement.partition(" ")
+        arg = arg.strip()
+        if name == "Write-Output":
+            try:
+                output.append(json.loads(arg))
+            except ValueError:
+                output.append(arg.strip("'\""))
+        elif name == "Start-Sleep":
+            unit, _, value = arg.partition(" ")
+            time.sleep(float(value) / (1000 if unit.lower() == "-milliseconds" else 1))
+        elif name == "throw":
+            raise RuntimeError(arg.strip("'\""))
+        elif name == "exit":
+            sys.exit(int(arg or 0))
+        elif name == "Write-Host":
+            sys.stdout.write(arg + "\n")
+        elif name == "$PID":
+            output.append(os.getpid())
+        else:
+            raise RuntimeError(f"The term '{name}' is not recognized by the stand-in worker.")
+    return output
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            output = run(request["script"])
+            response = {"id": request["id"], "ok": True, "output": output[0] if len(output) == 1 else (output or None)}
+        except RuntimeError as e:
+            response = {"id": request["id"], "ok": False, "error": str(e)}
+        sys.stdout.write(FRAME + json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
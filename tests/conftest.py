@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# The modules import as modules.<name> from the app folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Logger() writes to <USERPROFILE>/Documents/SystemOptimizer; keep test runs out of the real one
+os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="panacea-tests-")
+
+from modules.logger import Logger
+Logger().console = False # Log lines go to the file only, not into the test output
@@ -0,0 +1,65 @@
+import os
+import subprocess
+
+import pytest
+
+from modules import browsers, cleanup
+from modules.browsers import BrowserProfile, get_running_process_names
+from modules.cleanup import CleanupManager
+
+TASKLIST = (b'"System Idle Process","0","Services","0","8 K"\r\n'
+            b'"chrome.exe","1234","Console","1","120,000 K"\r\n'
+            b'"Firefox.EXE","5678","Console","1","300,000 K"\r\n')
+
+@pytest.fixture
+def tasklist(monkeypatch):
+    """Replaces the tasklist call; set .output to bytes, or to an exception to raise"""
+    class Fake:
+        output = TASKLIST
+        def __call__(self, args, **kwargs):
+            if isinstance(self.output, Exception):
+                raise self.output
+            return self.output
+    fake = Fake()
+    monkeypatch.setattr(subprocess, "CREATE_NO_WINDOW", 0x08000000, raising=False)
+    monkeypatch.setattr(browsers.subprocess, "check_output", fake)
+    return fake
+
+def test_process_names_are_lower_cased(tasklist):
+    assert get_running_process_names() == {"system idle process", "chrome.exe", "firefox.exe"}
+
+def test_tasklist_failure_is_unknown_not_empty(tasklist):
+    tasklist.output = subprocess.TimeoutExpired("tasklist", 10)
+    assert get_running_process_names() is None
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A CleanupManager that sees one Chrome and one Chromium profile, each with a cached file"""
+    mgr = CleanupManager()
+    profiles = []
+    for browser in ("Chrome", "Chromium"):
+        cache = tmp_path / browser / "Default" / "Cache"
+        cache.mkdir(parents=True)
+        (cache / "data_0").write_bytes(b"x" * 100)
+        profiles.append(BrowserProfile(browser, "Default", str(cache.parent), [str(cache)], "chrome.exe"))
+    monkeypatch.setattr(mgr.browser_locator, "discover", lambda refresh=False: list(profiles))
+    mgr.caches = {p.browser: os.path.join(p.cache_dirs[0], "data_0") for p in profiles}
+    return mgr
+
+def test_unknown_running_state_skips_every_browser(manager, monkeypatch):
+    monkeypatch.setattr(cleanup, "get_running_process_names", lambda: None)
+    messages = []
+    assert manager.clean_browser_caches(progress_callback=messages.append) == (0, 0)
+    assert all(os.path.exists(path) for path in manager.caches.values())
+    assert any("Skipping all browsers" in m for m in messages)
+
+def test_shared_image_name_counts_both_browsers_as_running(manager, monkeypatch):
+    # Chrome and Chromium are both chrome.exe: neither cache may be touched while one runs
+    monkeypatch.setattr(cleanup, "get_running_process_names", lambda: {"chrome.exe"})
+    assert manager.get_running_browsers() == {"Chrome", "Chromium"}
+    assert manager.clean_browser_caches() == (0, 0)
+
+def test_caches_are_cleaned_when_nothing_runs(manager, monkeypatch):
+    monkeypatch.setattr(cleanup, "get_running_process_names", lambda: set())
+    assert manager.clean_browser_caches() == (2, 200)
+    assert not any(os.path.exists(path) for path in manager.caches.values())
@@ -0,0 +1,35 @@
+import os
+
+from modules import cleanup_rules
+from modules.cleanup_engine import CleanupEngine
+from modules.cleanup_rules import CompiledRules, Rule
+
+def write(path, data=b"junk"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def test_nothing_behind_a_junction_is_deleted(tmp_path, monkeypatch):
+    temp = tmp_path / "Temp"
+    write(str(temp / "a.tmp"))
+    write(str(temp / "sub" / "b.tmp"))
+    # "Documents" stands in for a junction under %TEMP% pointing at the user's files
+    write(str(temp / "Documents" / "thesis.docx"))
+    write(str(temp / "Documents" / "deep" / "photo.jpg"))
+    monkeypatch.setattr(cleanup_rules, "is_junction", lambda entry, st=None: entry.name == "Documents")
+
+    rule = Rule("Temp", str(temp), remove_dirs=True)
+    result = CleanupEngine().clean_rules(CompiledRules([rule]))
+
+    assert result.files == 2
+    assert not (temp / "a.tmp").exists()
+    assert not (temp / "sub").exists() # Emptied and removed
+    assert (temp / "Documents" / "thesis.docx").exists()
+    assert (temp / "Documents" / "deep" / "photo.jpg").exists()
+
+def test_real_folders_are_still_walked(tmp_path):
+    temp = tmp_path / "Temp"
+    write(str(temp / "Documents" / "x.tmp"))
+    result = CleanupEngine().clean_rules(CompiledRules([Rule("Temp", str(temp), remove_dirs=True)]))
+    assert result.files == 1
+    assert not (temp / "Documents").exists()
@@ -0,0 +1,16 @@
+from modules import cli
+
+def test_clean_keeps_the_recycle_bin_unless_asked():
+    args = cli.build_parser().parse_args(["clean", "temp"])
+    assert args.empty_recycle_bin is False
+    args = cli.build_parser().parse_args(["clean", "temp", "--empty-recycle-bin"])
+    assert args.empty_recycle_bin is True
+
+def test_monitor_json_rejects_endless_count(capsys):
+    assert cli.run(["monitor", "--json", "--count", "0"]) == cli.EXIT_USAGE
+    captured = capsys.readouterr()
+    assert captured.out == "" # Nothing half-written on stdout
+    assert "--ndjson" in captured.err
+
+def test_bad_arguments_exit_with_usage():
+    assert cli.run(["clean", "everything"]) == cli.EXIT_USAGE
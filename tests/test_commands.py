@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+
+import pytest
+
+from modules.commands import (CommandEngine, CommandRunner, OutputDecoder, OK, FAILED, TIMEOUT, IDLE_TIMEOUT, CANCELLED)
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="stand-ins are POSIX shell commands")
+
+PY = sys.executable
+
+def run(command, timeout=None, idle_timeout=None):
+    """(CommandResult, [output chunks as text])"""
+    chunks = []
+    handle = CommandEngine.shared().start(command, lambda b: chunks.append(b.decode()), timeout=timeout, idle_timeout=idle_timeout)
+    return handle.result(30), chunks
+
+def process_gone(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] == "Z" # Killed, waiting to be reaped
+    except OSError:
+        return True
+
+def test_exit_code_zero_is_ok():
+    result, chunks = run("echo hello; exit 0")
+    assert result.status == OK and result.ok
+    assert result.returncode == 0
+    assert "hello" in "".join(chunks)
+
+def test_nonzero_exit_code_is_failed():
+    result, _ = run("echo oops; exit 3")
+    assert result.status == FAILED
+    assert result.returncode == 3
+
+def test_wall_clock_timeout_stops_a_chatty_command():
+    # Keeps printing, so only the wall clock can stop it
+    script = "import sys, time\nwhile True:\n    print('tick', flush=True)\n    time.sleep(0.05)"
+    start = time.monotonic()
+    result, chunks = run(f'{PY} -c "{script}"', timeout=0.5, idle_timeout=5)
+    assert result.status == TIMEOUT
+    assert time.monotonic() - start < 5
+    assert "tick" in "".join(chunks)
+
+def test_idle_timeout_stops_a_silent_command():
+    start = time.monotonic()
+    result, _ = run("echo started; sleep 30", idle_timeout=0.3)
+    assert result.status == IDLE_TIMEOUT
+    assert time.monotonic() - start < 10
+
+def test_cancel_kills_the_process_tree():
+    chunks = []
+    # The shell starts a grandchild and reports its pid; cancel() must kill both
+    handle = CommandEngine.shared().start("sleep 60 & echo $!; wait", lambda b: chunks.append(b.decode()))
+    deadline = time.monotonic() + 10
+    while not "".join(chunks).strip() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    child = int("".join(chunks).split()[0])
+    handle.cancel()
+    result = handle.result(10)
+    assert result.status == CANCELLED
+    deadline = time.monotonic() + 5
+    while not process_gone(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert process_gone(child)
+    assert process_gone(handle.pid)
+
+def test_run_many_runs_streams_concurrently():
+    lines = []
+    commands = [(f"sleep 0.5; echo done {i}", f"stand-in {i}") for i in range(4)]
+    start = time.monotonic()
+    results = CommandRunner().run_many(commands, lines.append, timeout=10)
+    elapsed = time.monotonic() - start
+    assert results == [True] * 4
+    assert sorted(lines) == [f"done {i}" for i in range(4)]
+    assert elapsed < 1.5 # One after the other would take 2 s
+
+def test_run_many_reports_each_result_in_order():
+    results = CommandRunner().run_many([("exit 0", "ok"), ("exit 1", "bad"), ("echo fine", "ok too")], lambda line: None)
+    assert results == [True, False, True]
+
+def test_decoder_detects_utf16_from_a_short_first_chunk():
+    # sfc writes UTF-16 and flushes each redraw, so the first read can be a lone "\r"
+    lines = []
+    decoder = OutputDecoder(lines.append)
+    data = "\r\nVerifica completata al 5%.\rnon è stato in grado\r\n".encode("utf-16-le")
+    for i in range(0, len(data), 2):
+        decoder.feed(data[i:i + 2])
+    decoder.close()
+    assert decoder.encoding == "utf-16-le"
+    assert lines == ["Verifica completata al 5%.", "non è stato in grado"]
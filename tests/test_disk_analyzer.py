@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from modules import disk_analyzer
+from modules.disk_analyzer import DiskAnalyzer
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, "Users", "AppData"))
+    with open(os.path.join(root, "Users", "AppData", "big.bin"), "wb") as f:
+        f.write(b"x" * 4096)
+    os.makedirs(os.path.join(root, "Users", "Application Data"))
+    with open(os.path.join(root, "Users", "Application Data", "big.bin"), "wb") as f:
+        f.write(b"x" * 4096)
+
+def test_junctions_are_not_counted(tmp_path, monkeypatch):
+    root = str(tmp_path / "vol")
+    make_tree(root)
+    # "Application Data" plays the junction pointing back at AppData
+    monkeypatch.setattr(disk_analyzer, "is_junction", lambda entry, st=None: entry.name == "Application Data")
+    analyzer = DiskAnalyzer(root, index_path=str(tmp_path / "index.db"))
+    analyzer.scan()
+    assert analyzer.total() == (4096, 1)
+
+@pytest.mark.skipif(os.name == 'nt', reason="creating symlinks needs extra rights on Windows")
+def test_symlinked_folders_are_not_followed(tmp_path):
+    root = str(tmp_path / "vol")
+    make_tree(root)
+    os.symlink(os.path.join(root, "Users"), os.path.join(root, "Users", "loop"))
+    analyzer = DiskAnalyzer(root, index_path=str(tmp_path / "index.db"))
+    analyzer.scan()
+    assert analyzer.total() == (8192, 2)
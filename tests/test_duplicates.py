@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules import duplicates
+from modules.duplicates import DuplicateFinder
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def groups(root, finder=None):
+    """{size: sorted lists of names per group}"""
+    found = {}
+    for group in (finder or DuplicateFinder(min_size=1)).find([str(root)]):
+        found.setdefault(group.size, []).append(sorted(os.path.relpath(p, root) for p in group.paths))
+    return found
+
+def test_copies_are_grouped_and_different_content_is_not(tmp_path):
+    write(str(tmp_path / "a.txt"), b"same" * 100)
+    write(str(tmp_path / "sub" / "b.txt"), b"same" * 100)
+    write(str(tmp_path / "c.txt"), b"diff" * 100) # Same size, other bytes
+    write(str(tmp_path / "d.txt"), b"unique")
+    assert groups(tmp_path) == {400: [["a.txt", os.path.join("sub", "b.txt")]]}
+
+def test_large_files_differing_only_in_the_middle(tmp_path):
+    edge = DuplicateFinder.EDGE
+    head, tail = b"h" * edge, b"t" * edge
+    write(str(tmp_path / "x.bin"), head + b"A" * 1000 + tail)
+    write(str(tmp_path / "y.bin"), head + b"B" * 1000 + tail)
+    write(str(tmp_path / "z.bin"), head + b"A" * 1000 + tail)
+    assert groups(tmp_path) == {2 * edge + 1000: [["x.bin", "z.bin"]]}
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="no hard links")
+def test_hard_links_are_one_file(tmp_path):
+    write(str(tmp_path / "a.txt"), b"data" * 100)
+    os.link(str(tmp_path / "a.txt"), str(tmp_path / "a_link.txt"))
+    assert groups(tmp_path) == {} # Deleting "one copy" would delete the only one
+
+    write(str(tmp_path / "copy.txt"), b"data" * 100)
+    (found,) = groups(tmp_path)[400]
+    assert len(found) == 2 and "copy.txt" in found
+
+def test_junctions_are_not_followed(tmp_path, monkeypatch):
+    write(str(tmp_path / "a.txt"), b"data" * 100)
+    write(str(tmp_path / "Junction" / "a.txt"), b"data" * 100) # Plays the junction's view of a.txt
+    monkeypatch.setattr(duplicates, "is_junction", lambda entry, st=None: entry.name == "Junction")
+    assert groups(tmp_path) == {}
+
+def test_chunks_give_the_same_groups_largest_first(tmp_path):
+    for size in (100, 200, 300):
+        for name in ("a", "b"):
+            write(str(tmp_path / f"{name}{size}.bin"), bytes([size % 256]) * size)
+    finder = DuplicateFinder(min_size=1)
+    finder.CHUNK_FILES = 2 # One size per chunk
+    sizes = [g.size for g in finder.find([str(tmp_path)])]
+    assert sizes == [300, 200, 100]
+    assert groups(tmp_path) == groups(tmp_path, finder)
+
+def test_hash_jobs_of_all_buckets_share_one_map_per_stage(tmp_path):
+    edge = DuplicateFinder.EDGE
+    for size in (3 * edge, 4 * edge):
+        for name in ("a", "b"):
+            write(str(tmp_path / f"{name}{size}.bin"), b"x" * size)
+    calls = []
+    class CountingPool(ThreadPoolExecutor):
+        def map(self, fn, items):
+            items = list(items)
+            calls.append(len(items))
+            return super().map(fn, items)
+    finder = DuplicateFinder(min_size=1)
+    with CountingPool(2) as pool:
+        found = finder._confirm_chunk([str(tmp_path)], {3 * edge, 4 * edge}, pool)
+    assert [g.size for g in found] == [4 * edge, 3 * edge]
+    assert calls == [4, 4] # Edge hashes, then full hashes, each across both buckets
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from modules.jobs import CleanupJob, JobCancelled, FINISHED
+
+class Index:
+    def __init__(self, file_count, total_bytes):
+        self.file_count = file_count
+        self.total_bytes = total_bytes
+
+def started(job):
+    """Starts job and waits for on_done; returns the result it was called with"""
+    done = threading.Event()
+    results = []
+    def on_done(result):
+        results.append(result)
+        done.set()
+    job.start(on_done)
+    assert done.wait(5), "on_done was not called"
+    return results[0]
+
+def test_finished_job_returns_its_result():
+    job = CleanupJob("test", lambda c: Index(2, 10), lambda c: (2, 10))
+    assert started(job) == (2, 10)
+    assert job.state == "done" and job.progress().state in FINISHED
+
+def test_cancelled_job_calls_on_done_with_none():
+    def clean(control):
+        raise JobCancelled()
+    job = CleanupJob("test", lambda c: Index(1, 1), clean)
+    assert started(job) is None
+    assert job.state == "cancelled"
+
+@pytest.mark.parametrize("stage", ["count", "clean"])
+def test_failed_job_ends_in_failed_state_and_calls_on_done(stage):
+    def boom(control):
+        raise PermissionError("access denied")
+    job = CleanupJob("test",
+                     boom if stage == "count" else (lambda c: Index(1, 1)),
+                     boom if stage == "clean" else (lambda c: (1, 1)))
+    assert started(job) is None
+    assert job.state == "failed" and job.state in FINISHED
+    assert isinstance(job.error, PermissionError)
+    assert "failed" in job.progress().describe()
+
+def test_run_reraises_a_failure():
+    def boom(control):
+        raise OSError("disk gone")
+    job = CleanupJob("test", lambda c: Index(1, 1), boom)
+    with pytest.raises(OSError):
+        job.run()
+    assert job.state == "failed"
@@ -0,0 +1,80 @@
+import pytest
+
+from modules.metric_store import MetricStore
+
+LEVELS = [("raw", 1, 10), ("1m", 60, 5), ("1h", 3600, 4)]
+T = 3600 * 500_000 # Hour-aligned, so every level's slots start together
+
+@pytest.fixture
+def open_store(tmp_path):
+    stores = []
+    def open_(metrics=("cpu", "ram"), levels=LEVELS):
+        store = MetricStore(str(tmp_path / "metrics.dat"), metrics=metrics, levels=levels)
+        stores.append(store)
+        return store
+    yield open_
+    for store in stores:
+        store.close()
+
+def test_ring_wraps_around_keeping_the_newest_slots(open_store):
+    store = open_store()
+    for i in range(15):
+        store.add("cpu", i, T + i)
+    assert store.query("cpu", T, T + 14, level="raw") == [(T + i, float(i)) for i in range(5, 15)]
+    assert store.latest("cpu", 3) == [12.0, 13.0, 14.0]
+
+def test_slots_without_samples_are_gaps(open_store):
+    store = open_store()
+    for i, v in ((0, 1), (1, 2), (5, 5)):
+        store.add("cpu", v, T + i)
+    assert store.query("cpu", T, T + 5, level="raw") == [(T, 1.0), (T + 1, 2.0), (T + 5, 5.0)]
+    assert store.latest("cpu", 10) == [1.0, 2.0, 5.0]
+
+def test_gap_longer_than_the_ring_clears_it(open_store):
+    store = open_store()
+    for i in range(10):
+        store.add("cpu", i, T + i)
+    store.add("cpu", 50, T + 30)
+    assert store.query("cpu", T, T + 30, level="raw") == [(T + 30, 50.0)]
+
+def test_coarse_levels_average_their_slot(open_store):
+    store = open_store()
+    for i in range(60):
+        store.add("cpu", i, T + i)
+    store.add("cpu", 100, T + 60)
+    assert store.query("cpu", T, T + 60, level="1m") == [(T, 29.5), (T + 60, 100.0)]
+    (ts, avg), = store.query("cpu", T, T + 60, level="1h")
+    assert ts == T and avg == pytest.approx((sum(range(60)) + 100) / 61)
+
+def test_query_range_and_level_choice(open_store):
+    store = open_store()
+    for i in range(10):
+        store.add_sample({"cpu": i, "ram": 50, "gpu": 1}, T + i) # Unknown metrics are ignored
+    assert store.query("cpu", T + 3, T + 5, level="raw") == [(T + 3, 3.0), (T + 4, 4.0), (T + 5, 5.0)]
+    assert store.query("cpu", T - 100, T - 1, level="raw") == []
+    assert store.query("ram", T + 8, T + 9) == [(T + 8, 50.0), (T + 9, 50.0)] # Raw covers 10 s
+    assert store.level_for(10) == 0 and store.level_for(300) == 1 and store.level_for(10 ** 6) == 2
+    assert store.query("cpu", T, T + 600) == [(T, 4.5)] # 1m level for a 10 min range
+
+def test_older_samples_never_overwrite_newer_slots(open_store):
+    store = open_store()
+    store.add("cpu", 10, T + 5)
+    store.add("cpu", 99, T + 2) # Clock went backwards
+    assert store.query("cpu", T, T + 5, level="raw") == [(T + 5, 10.0)]
+
+def test_history_survives_reopening(open_store):
+    store = open_store()
+    for i in range(12):
+        store.add("cpu", i, T + i)
+    store.close()
+    store = open_store()
+    assert store.latest("cpu", 3) == [9.0, 10.0, 11.0]
+    store.add("cpu", 12, T + 12) # Keeps writing where it left off
+    assert store.query("cpu", T, T + 12, level="raw")[-2:] == [(T + 11, 11.0), (T + 12, 12.0)]
+
+def test_different_layout_starts_an_empty_history(open_store):
+    store = open_store()
+    store.add("cpu", 1, T)
+    store.close()
+    store = open_store(metrics=("cpu", "ram", "disk"))
+    assert store.query("cpu", T, T, level="raw") == []
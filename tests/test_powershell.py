@@ -0,0 +1,72 @@
+import os
+import queue
+import sys
+import threading
+import time
+
+import pytest
+
+from modules.commands import OK, TIMEOUT, ERROR, FAILED
+from modules.powershell import PowerShellPool, PowerShellWorker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STANDIN = [sys.executable, os.path.join(ROOT, "scripts", "powershell_standin.py")]
+
+@pytest.fixture
+def pool():
+    pool = PowerShellPool(size=2, command=STANDIN)
+    yield pool
+    pool.close()
+
+def test_runs_scripts_and_reports_failures(pool):
+    assert pool.run("Write-Host a warning; Write-Output 42").output == 42
+    result = pool.run("throw 'broken'")
+    assert result.status == FAILED and result.error == "broken"
+    assert pool.restarts == 0 # A failing script keeps its worker
+
+def test_timeout_kills_and_replaces_the_worker(pool):
+    first = pool.run("$PID").output
+    worker = pool._idle[-1]
+    result = pool.run("Start-Sleep -Seconds 10", timeout=0.5)
+    assert result.status == TIMEOUT
+    assert worker.process.wait(5) is not None # Killed, not left running the script
+    assert pool.restarts == 1 and pool._count == 0
+    second = pool.run("$PID")
+    assert second.status == OK and second.output != first
+
+def test_exit_restarts_the_worker(pool):
+    first = pool.run("$PID").output
+    result = pool.run("exit 3")
+    assert result.status == ERROR
+    assert pool.restarts == 1
+    second = pool.run("$PID")
+    assert second.status == OK and second.output != first
+
+def test_stale_frames_are_ignored():
+    worker = PowerShellWorker(STANDIN)
+    try:
+        slow = worker.send("Start-Sleep -Milliseconds 300; Write-Output 1")
+        with pytest.raises(queue.Empty):
+            worker.receive(slow, 0.05)
+        # The late answer to the first request arrives before this one and must be skipped
+        frame = worker.receive(worker.send("Write-Output 2"), 5)
+        assert frame["id"] == slow + 1 and frame["output"] == 2
+    finally:
+        worker.close()
+
+def test_concurrency_is_capped_at_size(pool):
+    results = []
+    def call():
+        results.append(pool.run("Start-Sleep -Milliseconds 300; $PID"))
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    elapsed = time.monotonic() - start
+    assert len(results) == 5 and all(r.ok for r in results)
+    pids = {r.output for r in results}
+    assert len(pids) <= pool.size
+    assert pool._count <= pool.size and len(pool._idle) <= pool.size
+    assert elapsed >= 0.8 # Five 0.3 s scripts on two workers take three rounds
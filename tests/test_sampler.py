@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from modules.sampler import CpuSampler, CpuTimesProvider, ProcStatCpuTimes
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+class FakeTimes(CpuTimesProvider):
+    """Every read advances 100 ticks, 25 of them idle (75% busy)"""
+    name = "fake"
+
+    def __init__(self):
+        self.idle = self.total = 0
+
+    def read(self):
+        self.idle += 25
+        self.total += 100
+        return self.idle, self.total
+
+def test_provider_must_implement_read():
+    class Incomplete(CpuTimesProvider):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_calls_within_min_interval_return_the_cached_value():
+    sampler = CpuSampler(FakeTimes(), min_interval=60)
+    assert sampler.percent() == 0.0 # Too soon after priming
+
+def test_fresh_reading_bypasses_min_interval():
+    sampler = CpuSampler(FakeTimes(), min_interval=60)
+    assert sampler.percent(fresh=True) == 75.0
+    assert sampler.percent() == 75.0 # Cached again until min_interval passes
+
+@pytest.fixture
+def proc_stat(monkeypatch):
+    """Points ProcStatCpuTimes at a fixture; call the result with the fixture number to switch"""
+    def use(n):
+        monkeypatch.setattr(ProcStatCpuTimes, "PATH", os.path.join(FIXTURES, f"proc_stat_{n}.txt"))
+    use(1)
+    return use
+
+def test_proc_stat_reads_idle_and_total_from_the_cpu_line(proc_stat):
+    # idle + iowait, and user..steal without guest (already counted in user)
+    assert ProcStatCpuTimes().read() == (80000 + 1000, 10000 + 200 + 3000 + 80000 + 1000 + 100 + 50 + 0)
+
+def test_proc_stat_delta_between_two_readings(proc_stat):
+    sampler = CpuSampler(ProcStatCpuTimes(), min_interval=60)
+    proc_stat(2)
+    # 2000 ticks elapsed, 500 of them idle or iowait
+    assert sampler.percent(fresh=True) == 75.0
+
+def test_proc_stat_first_sample_is_zero_until_a_second_reading(proc_stat):
+    sampler = CpuSampler(ProcStatCpuTimes(), min_interval=60)
+    assert sampler.percent() == 0.0 # Only the priming reading so far
+    assert sampler.percent(fresh=True) == 0.0 # Same counters again: no elapsed ticks, value kept
+
+def test_proc_stat_missing_file(proc_stat, monkeypatch):
+    monkeypatch.setattr(ProcStatCpuTimes, "PATH", os.path.join(FIXTURES, "missing_stat.txt"))
+    assert not ProcStatCpuTimes.available()
+    sampler = CpuSampler(ProcStatCpuTimes())
+    assert sampler.percent(fresh=True) == 0.0 # Priming failed; no reading yet
+    proc_stat(1)
+    assert sampler.percent(fresh=True) == 0.0 # First successful reading only primes
+    proc_stat(2)
+    assert sampler.percent(fresh=True) == 75.0
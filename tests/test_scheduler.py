@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+from modules.scheduler import MetricScheduler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_getters_run_on_worker_threads_and_results_arrive():
+    sched = MetricScheduler()
+    got = threading.Event()
+    threads = []
+    def on_result(value):
+        threads.append((value, threading.current_thread()))
+        got.set()
+    sched.add("cpu", lambda: threading.current_thread(), 0.05, on_result)
+    sched.start()
+    try:
+        assert got.wait(5)
+    finally:
+        sched.stop()
+    fn_thread, result_thread = threads[0]
+    assert fn_thread is result_thread # on_result runs where fn ran
+    assert fn_thread is not sched._thread and fn_thread.daemon
+
+def test_slow_getter_skips_periods_without_delaying_others():
+    sched = MetricScheduler()
+    release = threading.Event()
+    fast = []
+    sched.add("slow", lambda: release.wait(5), 0.05)
+    sched.add("fast", lambda: fast.append(1) or 1, 0.05)
+    sched.start()
+    time.sleep(0.5)
+    release.set()
+    sched.stop()
+    stats = sched.stats()
+    assert stats["slow"].skipped > 0
+    assert len(fast) >= 5
+
+def test_hung_getter_does_not_block_exit():
+    code = textwrap.dedent("""
+        import threading, time
+        from modules.scheduler import MetricScheduler
+        sched = MetricScheduler()
+        sched.add("stuck", lambda: threading.Event().wait(), 0.01)
+        sched.start()
+        time.sleep(0.2)
+        print("exiting")
+    """)
+    start = time.monotonic()
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=20, cwd=ROOT)
+    assert out.stdout.strip() == "exiting"
+    assert time.monotonic() - start < 10
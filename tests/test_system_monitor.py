@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+
+from modules import system_monitor
+from modules.system_monitor import ProcessMonitor, ProcProcessSource
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+class FakeSource:
+    """Yields the processes in .procs: {key: (pid, cpu_seconds, working_set, name)}"""
+    def __init__(self):
+        self.procs = {}
+        self.named = []
+
+    def read(self):
+        for key, (pid, cpu_time, working_set, name) in self.procs.items():
+            yield key, pid, cpu_time, working_set, name
+
+    def name(self, raw):
+        self.named.append(raw)
+        return raw
+
+@pytest.fixture
+def monitor(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(system_monitor, "time", clock)
+    mon = ProcessMonitor(top_n=3, source=FakeSource())
+    mon.cpu_count = 2
+    mon.clock = clock
+    return mon
+
+def test_cpu_percent_is_the_delta_between_samples(monitor):
+    procs = monitor.source.procs
+    procs[(10, 1)] = (10, 5.0, 100, "a.exe")
+    top_cpu, _ = monitor.sample()
+    assert top_cpu[0].cpu_percent == 0.0 # Unknown until the second sample
+
+    monitor.clock.now += 2.0
+    procs[(10, 1)] = (10, 7.0, 100, "a.exe") # 2 CPU seconds in 2 wall seconds on 2 cores
+    top_cpu, _ = monitor.sample()
+    assert top_cpu[0].cpu_percent == pytest.approx(50.0)
+
+    monitor.clock.now += 1.0
+    top_cpu, _ = monitor.sample() # Idle since
+    assert top_cpu[0].cpu_percent == 0.0
+
+def test_reused_pid_is_a_new_process(monitor):
+    procs = monitor.source.procs
+    procs[(10, 1)] = (10, 50.0, 100, "old.exe")
+    monitor.sample()
+    monitor.clock.now += 1.0
+    del procs[(10, 1)]
+    procs[(10, 2)] = (10, 1.0, 100, "new.exe") # Same pid, later start time
+    top_cpu, _ = monitor.sample()
+    assert [(p.pid, p.name, p.cpu_percent) for p in top_cpu] == [(10, "new.exe", 0.0)]
+    assert monitor.source.named == ["old.exe", "new.exe"]
+
+def test_exited_processes_are_dropped_and_names_are_kept(monitor):
+    procs = monitor.source.procs
+    procs[(1, 1)] = (1, 0.0, 100, "stays.exe")
+    procs[(2, 1)] = (2, 0.0, 100, "exits.exe")
+    monitor.sample()
+    del procs[(2, 1)]
+    monitor.clock.now += 1.0
+    top_cpu, top_mem = monitor.sample()
+    assert set(monitor._table) == {(1, 1)}
+    assert [p.name for p in top_mem] == ["stays.exe"]
+    assert monitor.source.named == ["stays.exe", "exits.exe"] # Named once, when first seen
+
+def test_top_n_by_cpu_and_by_memory(monitor):
+    procs = monitor.source.procs
+    for pid in range(1, 7):
+        procs[(pid, 0)] = (pid, 0.0, pid * 1000, f"p{pid}")
+    monitor.sample()
+    monitor.clock.now += 1.0
+    busy = {1: 0.6, 2: 0.1, 3: 0.9, 4: 0.0, 5: 0.3, 6: 0.2}
+    for pid, cpu in busy.items():
+        procs[(pid, 0)] = (pid, cpu, pid * 1000, f"p{pid}")
+    top_cpu, top_mem = monitor.sample()
+    assert [p.pid for p in top_cpu] == [3, 1, 5]
+    assert [p.pid for p in top_mem] == [6, 5, 4]
+    assert top_cpu[0].cpu_percent == pytest.approx(45.0)
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_proc_source_finds_this_process():
+    source = ProcProcessSource()
+    found = [(key, cpu_time, working_set, source.name(raw))
+             for key, pid, cpu_time, working_set, raw in source.read() if pid == os.getpid()]
+    assert len(found) == 1
+    key, cpu_time, working_set, name = found[0]
+    assert key[0] == os.getpid()
+    assert cpu_time > 0 and working_set > 0
+    assert name # comm, e.g. "python"
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from modules.commands import OutputDecoder
+from modules.output_filters import FilterPacks
+from modules.tool_parsers import PARSERS, PROGRESS, STAGE, VERDICT
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+@pytest.fixture(scope="module")
+def packs():
+    return FilterPacks(["en", "it"])
+
+def chunks(data):
+    """The recorded bytes cut after every CR, the way the tools flush each redraw"""
+    cr = b"\r\x00" if data[1:2] == b"\x00" else b"\r" # sfc writes UTF-16
+    out, start = [], 0
+    while True:
+        i = data.find(cr, start)
+        if i < 0:
+            break
+        out.append(data[start:i + len(cr)])
+        start = i + len(cr)
+    out.append(data[start:])
+    return [c for c in out if c]
+
+def replay(name, packs, whole=False):
+    """Feeds a recorded transcript through OutputDecoder into its tool's parser: (parser, events, kept lines)"""
+    tool = name.split("_")[0]
+    parser = PARSERS[tool](packs)
+    events, kept = [], []
+    decoder = OutputDecoder(kept.append, packs.get(tool), observer=lambda line: events.extend(parser.feed(line)))
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        data = f.read()
+    for chunk in ([data] if whole else chunks(data)):
+        decoder.feed(chunk)
+    decoder.close()
+    return parser, events, kept
+
+def percents(events):
+    return [e.percent for e in events if e.kind == PROGRESS]
+
+SFC_PERCENTS = [1, 5, 12, 27, 43, 61, 78, 94, 100]
+DISM_PERCENTS = [1.2, 4.5, 20, 37.9, 62.3, 85, 100]
+
+@pytest.mark.parametrize("name, verdict", [
+    ("sfc_en_ok.txt", "ok"),
+    ("sfc_en_repaired.txt", "repaired"),
+    ("sfc_it_corrupt.txt", "corrupt"),
+])
+def test_sfc(packs, name, verdict):
+    parser, events, _ = replay(name, packs)
+    assert percents(events) == SFC_PERCENTS
+    summary = parser.summary()
+    assert summary["verdict"] == verdict
+    assert summary["percent"] == 100
+    assert summary["stages"] == []
+    assert [e.verdict for e in events if e.kind == VERDICT] == [verdict]
+
+@pytest.mark.parametrize("name, verdict", [
+    ("dism_en_repairable.txt", "repairable"),
+    ("dism_it_ok.txt", "ok"),
+])
+def test_dism(packs, name, verdict):
+    parser, events, _ = replay(name, packs)
+    assert percents(events) == DISM_PERCENTS # Version numbers and repeated redraws add nothing
+    assert parser.summary()["verdict"] == verdict # "The operation completed successfully." does not override it
+
+def test_chkdsk_found_no_problems(packs):
+    parser, events, _ = replay("chkdsk_en_ok.txt", packs)
+    assert percents(events) == [3, 17, 33, 36, 58, 66, 80, 100] # The Total column, not Stage
+    assert [e.stage for e in events if e.kind == STAGE] == [
+        "1: Examining basic file system structure",
+        "2: Examining file name linkage",
+        "3: Examining security descriptors",
+    ]
+    summary = parser.summary()
+    assert summary["verdict"] == "ok"
+    assert summary["verdict_line"] == "Windows has scanned the file system and found no problems."
+
+def test_chkdsk_found_problems(packs):
+    parser, events, _ = replay("chkdsk_it_problems.txt", packs)
+    assert percents(events) == [3, 33, 36, 66, 80, 100]
+    assert parser.summary()["stages"] == [
+        "1: Analisi della struttura di base del file system in corso",
+        "2: Analisi del collegamento dei nomi file in corso",
+        "3: Analisi dei descrittori di sicurezza in corso",
+    ]
+    assert parser.summary()["verdict"] == "corrupt"
+
+@pytest.mark.parametrize("name, passes", [
+    ("defrag_en_ok.txt", [("Slab Consolidation", [35, 70, 100]), ("Retrim", [12, 48, 96, 100])]),
+    ("defrag_it_ok.txt", [("Consolidamento slab", [50, 100]), ("Ritaglio", [25, 75, 100])]),
+])
+def test_defrag_percent_restarts_per_pass(packs, name, passes):
+    parser, events, _ = replay(name, packs)
+    seen = {}
+    for e in events:
+        if e.kind == PROGRESS:
+            seen.setdefault(e.stage, []).append(e.percent)
+    assert list(seen.items()) == passes
+    assert parser.summary()["stages"] == [stage for stage, _ in passes]
+    assert parser.summary()["verdict"] == "ok"
+
+@pytest.mark.parametrize("name", [n for n in sorted(os.listdir(FIXTURES)) if n.split("_")[0] in PARSERS]) # Tool transcripts
+def test_one_chunk_gives_the_same_verdict(packs, name):
+    # A single read collapses the redraws, but the outcome must not change
+    by_redraw, _, _ = replay(name, packs)
+    whole, _, _ = replay(name, packs, whole=True)
+    assert whole.summary()["verdict"] == by_redraw.summary()["verdict"]
+    assert whole.summary()["stages"] == by_redraw.summary()["stages"]
+
+def test_noise_filter_still_applies_after_observing(packs):
+    parser, _, kept = replay("chkdsk_it_problems.txt", packs)
+    assert parser.lines > len(kept)
+    assert not any(line.startswith("Avanzamento:") for line in kept)
+    assert "Windows ha analizzato il file system e ha rilevato problemi nel file system." in kept
+
+def test_unknown_without_result_line(packs):
+    parser = PARSERS["sfc"](packs)
+    parser.feed("Verification 50% complete.")
+    assert parser.summary()["verdict"] == "unknown"
+    assert parser.summary(returncode_ok=False)["verdict"] == "failed"
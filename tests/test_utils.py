@@ -0,0 +1,25 @@
+from modules.utils import FILE_ATTRIBUTE_REPARSE_POINT, IO_REPARSE_TAG_MOUNT_POINT, is_junction
+
+IO_REPARSE_TAG_CLOUD = 0x9000001A
+
+class FakeStat:
+    def __init__(self, attributes=0, tag=0):
+        self.st_file_attributes = attributes
+        self.st_reparse_tag = tag
+
+class FakeEntry:
+    """A DirEntry from before Python 3.12 (no is_junction)"""
+    def __init__(self, st):
+        self.st = st
+
+    def stat(self, follow_symlinks=True):
+        return self.st
+
+def test_junction_detected_from_reparse_tag():
+    assert is_junction(FakeEntry(FakeStat(FILE_ATTRIBUTE_REPARSE_POINT, IO_REPARSE_TAG_MOUNT_POINT)))
+    assert not is_junction(FakeEntry(FakeStat(FILE_ATTRIBUTE_REPARSE_POINT, IO_REPARSE_TAG_CLOUD)))
+    assert not is_junction(FakeEntry(FakeStat()))
+
+def test_given_stat_is_used():
+    junction = FakeStat(FILE_ATTRIBUTE_REPARSE_POINT, IO_REPARSE_TAG_MOUNT_POINT)
+    assert is_junction(FakeEntry(FakeStat()), junction)
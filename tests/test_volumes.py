@@ -0,0 +1,67 @@
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+from modules import volumes
+from modules.volumes import VolumeSampler
+
+def make_sampler(monkeypatch, usage, timeout=0.2):
+    sampler = VolumeSampler(timeout=timeout)
+    monkeypatch.setattr(sampler, "volumes", lambda: [("/fast", "fixed"), ("/dead", "network")])
+    monkeypatch.setattr(volumes.shutil, "disk_usage", usage)
+    return sampler
+
+def test_hung_volume_keeps_last_values_and_is_not_queried_again(monkeypatch):
+    release = threading.Event()
+    calls = []
+    hang = [False]
+
+    def usage(root):
+        calls.append(root)
+        if root == "/dead" and hang[0]:
+            release.wait(10)
+        return (1000, 250, 750)
+
+    sampler = make_sampler(monkeypatch, usage)
+    first = {u.root: u for u in sampler.sample()}
+    assert first["/dead"].status == "ok"
+
+    hang[0] = True
+    start = time.monotonic()
+    second = {u.root: u for u in sampler.sample()}
+    assert time.monotonic() - start < 2
+    assert second["/fast"].status == "ok"
+    assert second["/dead"].status == "timeout"
+    assert (second["/dead"].total, second["/dead"].free) == (1000, 750) # Last known values
+
+    sampler.sample()
+    assert calls.count("/dead") == 2 # Still pending: not queried a third time
+    release.set()
+    time.sleep(0.1)
+    sampler.sample()
+    assert calls.count("/dead") == 3
+
+def test_probe_threads_are_daemons(monkeypatch):
+    names = []
+    def usage(root):
+        names.append(threading.current_thread().daemon)
+        return (1, 0, 1)
+    make_sampler(monkeypatch, usage).sample()
+    assert names == [True, True]
+
+def test_hung_volume_does_not_block_exit():
+    code = textwrap.dedent("""
+        import shutil, threading
+        from modules import volumes
+        volumes.shutil.disk_usage = lambda root: threading.Event().wait() # Never returns
+        sampler = volumes.VolumeSampler(timeout=0.1)
+        sampler.volumes = lambda: [("/dead", "network")]
+        print(sampler.sample()[0].status)
+    """)
+    start = time.monotonic()
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=20,
+                         cwd=volumes.os.path.dirname(volumes.os.path.dirname(volumes.__file__)))
+    assert out.stdout.strip() == "timeout"
+    assert time.monotonic() - start < 10